@@ -52,6 +52,8 @@ INSTALLED_APPS = [
     'authentication.apps.AuthenticationConfig',
     'blog.apps.BlogConfig',
     'api.apps.ApiConfig',
+    'search.apps.SearchConfig',
+    'analytics.apps.AnalyticsConfig',
     
     # third party apps
     'taggit',
@@ -181,6 +183,112 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Extra Settings
 LOGIN_REDIRECT_URL = "/auth/"
 LOGIN_URL = "/auth/"
+BLOG_PAGE_SIZE = 12
+
+# Following timelines
+# entries kept per timeline by the trim_timelines command
+TIMELINE_LENGTH = 500
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+# posts of authors with more followers are pulled when reading instead of fanned out
+TIMELINE_PULL_THRESHOLD = 10000
+
+# Trending
+# posts served by a trending list
+TRENDING_SIZE = 50
+# seconds of publish time worth ten times the engagement
+TRENDING_DECAY = 45000
+# the refresh_trending command rebuilds the lists of tags used this recently, in seconds
+TRENDING_WINDOW = 60 * 60 * 24 * 7
+
+# Related posts
+# related posts shown with a post
+RELATED_POSTS = 5
+# newest posts sharing a tag that are scored when the tags of a post change
+RELATED_POSTS_CANDIDATES = 500
+
+# Recommendations
+# neighbours kept per post by the recommend_posts command
+POST_NEIGHBORS = 20
+# latest likes and bookmarks of each reader used to compute the neighbours
+POST_NEIGHBORS_HISTORY = 200
+# "readers who liked this also liked" posts shown with a post
+ALSO_LIKED = 5
+# posts on the "for you" page
+FOR_YOU_SIZE = 20
+# most recent likes and bookmarks whose neighbours make up the "for you" page
+FOR_YOU_HISTORY = 50
+
+# View counts
+# seconds of views buffered in each process before they are written
+VIEW_FLUSH_INTERVAL = 10
+# posts whose views are written per UPDATE
+VIEW_FLUSH_BATCH_SIZE = 500
+# a viewer counts once per post in this many seconds
+VIEW_DEDUP_WINDOW = 60 * 30
+# distinct (viewer, post) pairs per window and the share of them that may be wrongly deduplicated
+VIEW_DEDUP_CAPACITY = 1_000_000
+VIEW_DEDUP_ERROR = 0.01
+
+# Analytics
+# days shown on the analytics dashboard by default, and at most
+ANALYTICS_DAYS = 30
+ANALYTICS_MAX_DAYS = 366
+# posts listed with their totals on the dashboard
+ANALYTICS_TOP_POSTS = 10
+# events folded per transaction by the rollup_analytics command
+ANALYTICS_ROLLUP_BATCH_SIZE = 1000
+# events younger than this many seconds wait for the next run, their transaction may still be open
+ANALYTICS_ROLLUP_LAG = 60
+
+# Batch API
+# operations accepted by one request to the batch endpoint
+BATCH_MAX_OPERATIONS = 100
+
+# Search
+# postings of each query term read by a search, best impact first, the posts
+# they name are the only ones scored and paged through
+SEARCH_TERM_POSTINGS = 1000
+
+# Writing suggestions
+# similar posts shown while writing
+SIMILAR_POSTS = 5
+# posts sharing the draft's rarer terms whose whole vectors are compared to it
+SIMILAR_POSTS_CANDIDATES = 50
+# cosine similarity above which a similar post is flagged as a likely duplicate
+DUPLICATE_SIMILARITY = 0.8
+# tags suggested while writing
+SUGGESTED_TAGS = 5
+
+# Who to follow
+# suggested authors kept per user
+SUGGESTIONS_PER_USER = 20
+# points for a perfect tag affinity, a cosine between 0 and 1, where a mutual follow is one point
+SUGGESTION_TAG_WEIGHT = 2.0
+# authors followed by the users someone follows that are scored when they follow or unfollow
+SUGGESTION_CANDIDATES = 200
+
+# Cache
+# fragments are versioned and never served stale, the timeout only bounds memory use
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+# anonymous pages are purged by surrogate key, the timeout only bounds a race with a write
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+if env('REDIS_URL', default=None):
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": env('REDIS_URL'),
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
 
 
 # settings.py
@@ -43,6 +43,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('authentication.urls'), name='authentication'),
     path('api/', include('api.urls')),
+    path('search/', include('search.urls')),
+    path('analytics/', include('analytics.urls')),
     
     # docs
     path("swagger/", schema_view.with_ui('swagger', cache_timeout=0), name="schema-swagger-ui"),
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from analytics.rollup import rollup
+
+
+class Command(BaseCommand):
+    help = "Fold the likes, comments and saves created since the last run into the daily stats"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Number of events folded per transaction",
+        )
+
+    def handle(self, *args, **options):
+        folded = rollup(batch_size=options['batch_size'])
+
+        summary = ", ".join(f"{count} {field}" for field, count in folded.items())
+        self.stdout.write(self.style.SUCCESS(f"Folded {summary}"))
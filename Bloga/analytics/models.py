@@ -0,0 +1,54 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+from blog.models import Posts
+
+STAT_FIELDS = ("likes", "comments", "saves", "views")
+
+
+class RollupMark(models.Model):
+    """The id of the last row of an event table folded into the daily stats"""
+    source = models.CharField(max_length=32, unique=True)
+    last_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.source}: {self.last_id}"
+
+
+class DailyStats(models.Model):
+    """New likes, comments, saves and views of one day, added to with UPDATEs only"""
+    day = models.DateField()
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    saves = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailyPostStats(DailyStats):
+    post = models.ForeignKey(Posts, related_name='daily_stats', on_delete=models.CASCADE)
+    # copied from the post so that the stats of an author's posts are read from one index
+    author = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'day'], name='unique_daily_post_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['author', 'day']),
+        ]
+        verbose_name = 'Daily Post Stats'
+        verbose_name_plural = 'Daily Post Stats'
+
+
+class DailyAuthorStats(DailyStats):
+    author = models.ForeignKey(User, related_name='daily_stats', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'day'], name='unique_daily_author_stats'),
+        ]
+        verbose_name = 'Daily Author Stats'
+        verbose_name_plural = 'Daily Author Stats'
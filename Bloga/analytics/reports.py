@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import STAT_FIELDS, DailyPostStats, DailyAuthorStats
+
+
+def period(days=None):
+    """The first day of the last `days` days, today included, at most `ANALYTICS_MAX_DAYS`"""
+    days = min(days or settings.ANALYTICS_DAYS, settings.ANALYTICS_MAX_DAYS)
+    return timezone.localdate() - timedelta(days=days - 1)
+
+
+def daily(rows, since):
+    """One dict of stats per day from `since` to today, days without a row are zeros"""
+    found = {row["day"]: row for row in rows.values("day", *STAT_FIELDS)}
+    empty = dict.fromkeys(STAT_FIELDS, 0)
+    today = timezone.localdate()
+    return [
+        found.get(since + timedelta(days=offset), {"day": since + timedelta(days=offset), **empty})
+        for offset in range((today - since).days + 1)
+    ]
+
+
+def author_days(author, since):
+    return daily(DailyAuthorStats.objects.filter(author=author, day__gte=since), since)
+
+
+def post_days(post, since):
+    return daily(DailyPostStats.objects.filter(post=post, day__gte=since), since)
+
+
+def totals(days):
+    return {field: sum(day[field] for day in days) for field in STAT_FIELDS}
+
+
+def top_posts(author, since, limit=None):
+    """The posts of `author` with the most views since `since`, with their totals"""
+    limit = limit or settings.ANALYTICS_TOP_POSTS
+    return list(
+        DailyPostStats.objects.filter(author=author, day__gte=since)
+        .values("post_id", "post__title", "post__link")
+        .annotate(**{field: Sum(field) for field in STAT_FIELDS})
+        .order_by("-views", "-likes", "-post_id")[:limit]
+    )
@@ -0,0 +1,95 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, PositiveIntegerField, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from blog.models import Comments, PostReactions, SavedPost
+from .models import RollupMark, DailyPostStats, DailyAuthorStats
+
+# the event tables folded into each stat, and their timestamp column
+SOURCES = {
+    "likes": (PostReactions, "date"),
+    "comments": (Comments, "date"),
+    "saves": (SavedPost, "date"),
+}
+
+
+def _add(queryset, key, counts, field):
+    """Add `counts` {key: n} to `field` of the rows of `queryset` with one UPDATE"""
+    increment = Case(
+        *(When(**{key: pk}, then=Value(count)) for pk, count in counts.items()),
+        output_field=PositiveIntegerField(),
+    )
+    queryset.filter(**{f"{key}__in": list(counts)}).update(**{field: F(field) + increment})
+
+
+def fold(day, field, counts):
+    """
+    Add `counts` {(post id, author id): n} to `field` of the daily stats of
+    `day`, of the posts and of their authors. Missing rows are inserted empty
+    first and every row is incremented in the database, so the rollup job and
+    the view counters can fold into the same rows concurrently.
+    """
+    if not counts:
+        return
+    DailyPostStats.objects.bulk_create(
+        [DailyPostStats(post_id=post_id, author_id=author_id, day=day) for post_id, author_id in counts],
+        ignore_conflicts=True,
+    )
+    _add(DailyPostStats.objects.filter(day=day), "post_id", {post_id: count for (post_id, author_id), count in counts.items()}, field)
+
+    authors = Counter()
+    for (post_id, author_id), count in counts.items():
+        authors[author_id] += count
+    DailyAuthorStats.objects.bulk_create(
+        [DailyAuthorStats(author_id=author_id, day=day) for author_id in authors],
+        ignore_conflicts=True,
+    )
+    _add(DailyAuthorStats.objects.filter(day=day), "author_id", authors, field)
+
+
+def rollup_source(field, batch_size=None):
+    """
+    Fold the events of one source not folded yet, one batch per transaction.
+
+    Only rows past the source's high-water mark are read, and only those older
+    than `ANALYTICS_ROLLUP_LAG` seconds, so that a row whose transaction commits
+    after a row with a higher id is not skipped. The mark moves in the same
+    transaction as the stats, so every event is counted exactly once.
+    Returns the number of events folded.
+    """
+    batch_size = batch_size or settings.ANALYTICS_ROLLUP_BATCH_SIZE
+    model, date_field = SOURCES[field]
+    cutoff = timezone.now() - timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG)
+    folded = 0
+    while True:
+        with transaction.atomic():
+            mark, created = RollupMark.objects.select_for_update().get_or_create(source=field)
+            events = model.objects.filter(id__gt=mark.last_id, **{f"{date_field}__lt": cutoff})
+            ids = list(events.order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return folded
+
+            days = defaultdict(dict)
+            rows = (
+                events.filter(id__lte=ids[-1])
+                .annotate(day=TruncDate(date_field))
+                .values("day", "post_id", "post__author_id").annotate(events=Count("id")).order_by()
+            )
+            for row in rows:
+                days[row["day"]][(row["post_id"], row["post__author_id"])] = row["events"]
+            for day, counts in days.items():
+                fold(day, field, counts)
+
+            mark.last_id = ids[-1]
+            mark.save(update_fields=["last_id"])
+            folded += len(ids)
+
+
+def rollup(batch_size=None):
+    """Fold the new events of every source, returns the number folded by source"""
+    return {field: rollup_source(field, batch_size) for field in SOURCES}
@@ -0,0 +1,13 @@
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog.models import Posts
+from blog.view_counts import views_flushed
+from .rollup import fold
+
+
+@receiver(views_flushed)
+def fold_views(sender, counts, **kwargs):
+    # views are only counted, there are no rows to roll up, so they are folded as they are written
+    posts = Posts.published.filter(link__in=list(counts)).values_list("link", "id", "author_id")
+    fold(timezone.localdate(), "views", {(post_id, author_id): counts[link] for link, post_id, author_id in posts})
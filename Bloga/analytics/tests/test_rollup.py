@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from analytics.models import RollupMark, DailyPostStats, DailyAuthorStats
+from analytics.rollup import rollup, rollup_source
+from blog.models import Posts, Comments, PostReactions, CommentReactions, SavedPost
+from blog.view_counts import ViewBuffer
+
+
+@override_settings(ANALYTICS_ROLLUP_LAG=0)
+class RollupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="iamgroot")
+        cls.readers = [User.objects.create_user(username=f"reader{item}", password="iamgroot") for item in range(3)]
+        cls.first = Posts.objects.create(author=cls.author, title="First", content="content", status="PB")
+        cls.second = Posts.objects.create(author=cls.author, title="Second", content="content", status="PB")
+
+    def stats(self, post, day=None):
+        return DailyPostStats.objects.get(post=post, day=day or timezone.localdate())
+
+    def test_events_are_folded_into_post_and_author_days(self):
+        for reader in self.readers:
+            PostReactions.objects.create(user=reader, post=self.first)
+        SavedPost.objects.create(user=self.readers[0], post=self.second)
+        Comments.objects.create(user=self.readers[0], post=self.second, content="nice")
+
+        self.assertEqual(rollup(), {"likes": 3, "comments": 1, "saves": 1})
+        self.assertEqual(self.stats(self.first).likes, 3)
+        second = self.stats(self.second)
+        self.assertEqual((second.likes, second.comments, second.saves), (0, 1, 1))
+        author = DailyAuthorStats.objects.get(author=self.author)
+        self.assertEqual((author.likes, author.comments, author.saves), (3, 1, 1))
+
+    def test_only_new_events_are_read(self):
+        PostReactions.objects.create(user=self.readers[0], post=self.first)
+        rollup()
+        self.assertEqual(RollupMark.objects.get(source="likes").last_id, PostReactions.objects.get().pk)
+
+        PostReactions.objects.create(user=self.readers[1], post=self.first)
+        # in a transaction: mark, new ids, their aggregate, 4 writes for the day and the new mark,
+        # then a second transaction finding nothing past the mark
+        with self.assertNumQueries(14):
+            self.assertEqual(rollup_source("likes"), 1)
+        self.assertEqual(rollup(), {"likes": 0, "comments": 0, "saves": 0})
+        self.assertEqual(self.stats(self.first).likes, 2)
+
+    def test_events_are_folded_into_their_day(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        for reader in self.readers:
+            PostReactions.objects.create(user=reader, post=self.first)
+        PostReactions.objects.filter(user=self.readers[0]).update(date=yesterday)
+
+        self.assertEqual(rollup_source("likes", batch_size=2), 3)
+        self.assertEqual(self.stats(self.first, timezone.localdate(yesterday)).likes, 1)
+        self.assertEqual(self.stats(self.first).likes, 2)
+
+    @override_settings(ANALYTICS_ROLLUP_LAG=60)
+    def test_recent_events_wait_for_the_next_run(self):
+        PostReactions.objects.create(user=self.readers[0], post=self.first)
+        self.assertEqual(rollup_source("likes"), 0)
+        self.assertFalse(DailyPostStats.objects.exists())
+
+    def test_flushed_views_are_folded(self):
+        buffer = ViewBuffer()
+        buffer.record("user:1", self.first.link)
+        buffer.record("user:2", self.first.link)
+        buffer.record("user:1", self.second.link)
+        buffer.flush()
+        self.assertEqual(self.stats(self.first).views, 2)
+        self.assertEqual(DailyAuthorStats.objects.get(author=self.author).views, 3)
+
+
+class ReactionDatesMigrationTest(TransactionTestCase):
+    """Reactions made before 0017 are dated from their post or comment"""
+    before = [("blog", "0016_posts_views_count")]
+    after = [("blog", "0017_reaction_dates")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old = executor.loader.project_state(self.before).apps
+        Posts = old.get_model("blog", "Posts")
+        Comments = old.get_model("blog", "Comments")
+        user = old.get_model("auth", "User").objects.create(username="reader")
+        self.published = timezone.now() - timedelta(days=10)
+        post = Posts.objects.create(author=user, title="Old", link="old", status="PB", publish=self.published)
+        comment = Comments.objects.create(user=user, post=post, content="Old")
+        old.get_model("blog", "PostReactions").objects.create(user=user, post=post)
+        old.get_model("blog", "CommentReactions").objects.create(user=user, comment=comment)
+        self.commented = Comments.objects.get(pk=comment.pk).date
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_reactions_are_dated_from_their_post_and_comment(self):
+        self.assertEqual(list(PostReactions.objects.values_list("date", flat=True)), [self.published])
+        self.assertEqual(list(CommentReactions.objects.values_list("date", flat=True)), [self.commented])
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from analytics.models import DailyPostStats, DailyAuthorStats
+from blog.models import Posts
+
+
+class DashboardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="iamgroot")
+        cls.other = User.objects.create_user(username="other", password="iamgroot")
+        cls.post = Posts.objects.create(author=cls.author, title="Popular", content="content", status="PB")
+        cls.theirs = Posts.objects.create(author=cls.other, title="Theirs", content="content", status="PB")
+        today = timezone.localdate()
+        for offset, views in ((0, 5), (3, 2), (400, 100)):
+            day = today - timedelta(days=offset)
+            DailyPostStats.objects.create(post=cls.post, author=cls.author, day=day, views=views, likes=1)
+            DailyAuthorStats.objects.create(author=cls.author, day=day, views=views, likes=1)
+
+    def setUp(self):
+        self.client.login(username="author", password="iamgroot")
+
+    def test_dashboard(self):
+        response = self.client.get(reverse("analytics:dashboard"), {"days": 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "analytics/dashboard.html")
+        self.assertEqual(len(response.context["days"]), 7)
+        self.assertEqual(response.context["totals"], {"views": 7, "likes": 2, "comments": 0, "saves": 0})
+        self.assertEqual([top["post__title"] for top in response.context["top_posts"]], ["Popular"])
+
+    def test_period_is_bounded(self):
+        response = self.client.get(reverse("analytics:dashboard"), {"days": 10000})
+        self.assertEqual(len(response.context["days"]), 366)
+        self.assertEqual(response.context["totals"]["views"], 7)
+
+    def test_post_stats(self):
+        response = self.client.get(reverse("analytics:dashboard"), {"post": self.post.link, "days": 1})
+        self.assertEqual(response.context["totals"]["views"], 5)
+        self.assertEqual(self.client.get(reverse("analytics:dashboard"), {"post": self.theirs.link}).status_code, 404)
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("analytics:dashboard")).status_code, 302)
+
+    def test_api(self):
+        response = self.client.get(reverse("analytics"), {"days": 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["totals"]["views"], 7)
+        self.assertEqual(len(response.data["days"]), 30)
+        [post] = response.data["posts"]
+        self.assertEqual((post["title"], post["views"]), ("Popular", 7))
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("analytics")).status_code, 401)
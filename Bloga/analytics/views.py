@@ -0,0 +1,34 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render, get_object_or_404
+
+from blog.models import Posts
+from . import reports
+
+
+def days_param(request):
+    """The `?days=` of the request, None when it is missing or not a positive number"""
+    try:
+        days = int(request.GET.get("days", ""))
+    except ValueError:
+        return None
+    return days if days > 0 else None
+
+
+@login_required
+def dashboard(request):
+    user = request.user
+    since = reports.period(days_param(request))
+    link = request.GET.get("post")
+    
+    post = get_object_or_404(Posts, link=link, author=user) if link else None
+    days = reports.post_days(post, since) if post else reports.author_days(user, since)
+    
+    context = {
+        "user": user,
+        "post": post,
+        "since": since,
+        "days": days,
+        "totals": reports.totals(days),
+        "top_posts": reports.top_posts(user, since),
+    }
+    return render(request, 'analytics/dashboard.html', context)
@@ -0,0 +1,39 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework import permissions
+
+from analytics import reports
+from analytics.views import days_param
+from blog.models import Posts
+
+
+class AnalyticsView(APIView):
+    """
+    API v1 endpoint for the daily likes, comments, saves and views of the user's posts
+    Query parameters: days, and post for the stats of one of their posts
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        user = request.user
+        since = reports.period(days_param(request))
+        link = request.query_params.get('post')
+        
+        post = get_object_or_404(Posts, link=link, author=user) if link else None
+        days = reports.post_days(post, since) if post else reports.author_days(user, since)
+        
+        return Response({
+            "since": since,
+            "totals": reports.totals(days),
+            "days": days,
+            "posts": [
+                {
+                    "title": top["post__title"],
+                    "url": reverse('posts-detail', kwargs={'link': top["post__link"]}, request=request),
+                    **{field: top[field] for field in reports.STAT_FIELDS},
+                }
+                for top in reports.top_posts(user, since)
+            ],
+        })
@@ -3,9 +3,11 @@ from django.contrib.auth.models import Group, User
 from django.contrib.auth.hashers import check_password
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from authentication.models import Profile
+from authentication.models import Follow, Profile
+from blog import suggestions, timeline
+from api.fields import FastHyperlinkedRelatedField, HyperlinkedModelSerializer
 
-class UserSerializer(serializers.HyperlinkedModelSerializer):
+class UserSerializer(HyperlinkedModelSerializer):
     old_password = serializers.CharField(write_only=True, required=False)
 
     class Meta:
@@ -49,7 +51,7 @@ class UserSerializer(serializers.HyperlinkedModelSerializer):
         return instance
 
 
-class GroupSerializer(serializers.HyperlinkedModelSerializer):
+class GroupSerializer(HyperlinkedModelSerializer):
     class Meta:
         model = Group
         fields = ["url",'name']
@@ -59,18 +61,45 @@ class GroupSerializer(serializers.HyperlinkedModelSerializer):
 
 
 
-class ProfileSerializer(serializers.HyperlinkedModelSerializer):
+class SuggestedUserSerializer(HyperlinkedModelSerializer):
+    mutuals = serializers.IntegerField(read_only=True)
+    bio = serializers.CharField(source='profile.bio', read_only=True, default='')
+
+    class Meta:
+        model = User
+        fields = ['url', 'username', 'bio', 'mutuals']
+        extra_kwargs = {
+            'url': {'view_name': "user-detail", "lookup_field": "username"}
+        }
+
+
+class ProfileSerializer(HyperlinkedModelSerializer):
+    follows = FastHyperlinkedRelatedField(
+        view_name='user-detail', lookup_field='username', queryset=User.objects.all(), many=True, required=False,
+    )
+    followers = FastHyperlinkedRelatedField(
+        view_name='user-detail', lookup_field='username', read_only=True, many=True,
+    )
+    
     class Meta:
         model = Profile
-        fields = ['url', 'user', 'bio', 'dp', 'follows', 'followers']
+        fields = ['url', 'user', 'bio', 'dp', 'follows', 'followers', 'following_count', 'followers_count']
+        read_only_fields = ['following_count', 'followers_count']
         extra_kwargs = {
             'url': {'view_name': 'profile-detail', 'lookup_field':"pk",},
             'user': {'view_name': 'user-detail', 'lookup_field':"username", 'read_only': True},
-            'follows': {'view_name': 'user-detail', 'lookup_field':"username", 'queryset': User.objects.all(), 'many': True},
-            'followers': {'view_name': 'user-detail', 'lookup_field':"username", 'read_only': True, 'many': True},
             'dp': {'required': False}
         }
 
+    def create(self, validated_data):
+        follows = validated_data.pop('follows', None)
+        instance = super().create(validated_data)
+        if follows:
+            added = Follow.objects.follow(instance.user, follows)
+            timeline.backfill(instance.user)
+            suggestions.apply_follows(instance.user, added=added)
+        return instance
+
     def update(self, instance, validated_data):
         # Custom logic to ensure owner can only modify 'follows' and not 'followers'
         request_user = self.context['request'].user
@@ -80,21 +109,18 @@ class ProfileSerializer(serializers.HyperlinkedModelSerializer):
         # Handle the follows logic (can only modify follows, not followers)
         follows = validated_data.pop('follows', None)
         
-        # Update the follows field if it's provided
+        # Update the follows field if it's provided, applying only the difference
         if follows is not None:
-            # Sync the followers field for other users
-            for user in follows:
-                profile, created  = Profile.objects.get_or_create(user=user)
-                instance.follow(profile)
-                
-
-            for user in instance.follows.all():
-                profile, created  = Profile.objects.get_or_create(user=user)
-                if user not in follows:
-                    instance.unfollow(profile)
+            added, removed = Follow.objects.set_following(instance.user, follows)
+            
+            # keep the following timeline in step with the new follows
+            timeline.backfill(instance.user, authors=list(added))
+            for author_id in removed:
+                timeline.forget(instance.user, author_id)
+            suggestions.apply_follows(instance.user, added=added, removed=removed)
         
         instance.bio = validated_data.get('bio', instance.bio)
         instance.dp = validated_data.get('dp', instance.dp)
         instance.save()
         
-        return instance
\ No newline at end of file
+        return instance
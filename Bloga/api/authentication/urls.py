@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path("user/", views.UserListView.as_view(), name="user-list"),
+    path("user/suggested/", views.SuggestedUsersView.as_view(), name="user-suggested"),
     path("user/<str:username>/", views.UserDetailView.as_view(), name="user-detail"),
     path('group/', views.GroupListView.as_view(), name="group-list"),
     path('group/<str:name>', views.GroupDetailView.as_view(), name='group-detail'),
@@ -1,10 +1,11 @@
 from rest_framework import permissions, viewsets
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, RetrieveUpdateAPIView
+from rest_framework.generics import GenericAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView, RetrieveUpdateAPIView
 from django.contrib.auth.models import User, Group
 from authentication.models import Profile
 from .serializers import ProfileSerializer
 
-from .serializers import UserSerializer, GroupSerializer
+from .serializers import UserSerializer, GroupSerializer, SuggestedUserSerializer
+from blog import suggestions
 from .permissions import (
     IsAccountOwnerOrReadOnly,
     IsSuperUser, IsProfileOwnerOrReadOnly,
@@ -37,6 +38,18 @@ class UserDetailView(RetrieveUpdateDestroyAPIView):
     lookup_field = 'username'
     
 
+
+class SuggestedUsersView(GenericAPIView):
+    """
+    API v1 endpoint for the authors suggested to the user, best first
+    """
+    serializer_class = SuggestedUserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        serializer = self.get_serializer(suggestions.suggested_users(request.user), many=True)
+        return Response({"results": serializer.data})
+
     
 class GroupListView(ListCreateAPIView):
     """
@@ -61,7 +74,7 @@ class ProfileListView(ListCreateAPIView):
     """
     API v1 endpoint for profiles
     """
-    queryset = Profile.objects.all().order_by('id')
+    queryset = Profile.objects.select_related('user').order_by('id')
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated, HasProfileorCanCreate]
     lookup_field = 'pk'
@@ -0,0 +1,199 @@
+from collections import defaultdict
+from itertools import groupby
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from rest_framework.reverse import reverse
+
+from authentication.models import Follow, Profile
+from blog import page_cache, suggestions, timeline, toggles
+from blog.models import Posts, Comments
+from api.authentication.permissions import IsProfileOwnerOrReadOnly
+from api.blog.permissions import IsPostReactionOwernerOrReadOnly, IsCommentReactionOwernerOrReadOnly, IsSavedPostOwerner
+from .serializers import OperationSerializer
+
+TOGGLES = {
+    "post": {"like": toggles.POST_LIKE, "unlike": toggles.POST_LIKE, "save": toggles.POST_SAVE, "unsave": toggles.POST_SAVE},
+    "comment": {"like": toggles.COMMENT_LIKE, "unlike": toggles.COMMENT_LIKE},
+}
+# the permissions of the endpoints deleting the same rows one at a time
+OWNER_PERMISSIONS = {
+    toggles.POST_LIKE: IsPostReactionOwernerOrReadOnly,
+    toggles.COMMENT_LIKE: IsCommentReactionOwernerOrReadOnly,
+    toggles.POST_SAVE: IsSavedPostOwerner,
+}
+# operations that can only target published posts
+CREATING = {"like", "save", "comment"}
+
+NOT_FOUND = {"status": 404, "detail": "Not found."}
+FORBIDDEN = {"status": 403, "detail": "You do not have permission to perform this action."}
+FAILED = {"status": 409, "detail": "The operation could not be applied."}
+
+
+class Batch:
+    """
+    The operations of one batch request, applied in order.
+
+    Their targets are looked up with one query per kind of target, then every
+    run of consecutive operations of the same kind is applied with bulk
+    statements in a savepoint, except comments which are saved one by one so
+    `Comments.save` handles them. If that fails, the operations of the run are
+    retried one by one, each in its own savepoint, so a failing operation
+    fails alone. Caches, timelines and suggestions are updated once at the end.
+    """
+    def __init__(self, request, view):
+        self.request = request
+        self.view = view
+        self.user = request.user
+        self.purged = set()
+        # followed (True) and unfollowed (False) users, by id
+        self.follows = {}
+
+    def run(self, operations):
+        results = [None] * len(operations)
+        pending = []
+        for index, data in enumerate(operations):
+            serializer = OperationSerializer(data=data)
+            if serializer.is_valid():
+                pending.append((index, serializer.validated_data))
+            else:
+                results[index] = {"status": 400, "errors": serializer.errors}
+
+        found = self.resolve(pending)
+        ready = []
+        for index, operation in pending:
+            kind = operation["target"]
+            target = found[kind].get(operation[kind])
+            if target is None or (operation["op"] in CREATING and not target["published"]):
+                results[index] = NOT_FOUND
+            elif kind == "user" and target["id"] == self.user.pk:
+                results[index] = {"status": 400, "errors": {"user": [f"You can not {operation['op']} yourself."]}}
+            else:
+                ready.append((index, operation, target))
+
+        with transaction.atomic():
+            for (op, kind), run in groupby(ready, key=lambda item: (item[1]["op"], item[1]["target"])):
+                run = list(run)
+                try:
+                    with transaction.atomic():
+                        outcomes = self.apply(op, kind, run)
+                except DatabaseError:
+                    outcomes = {}
+                    for item in run:
+                        try:
+                            with transaction.atomic():
+                                outcomes.update(self.apply(op, kind, [item]))
+                        except DatabaseError:
+                            outcomes[item[0]] = FAILED
+                for index, result in outcomes.items():
+                    results[index] = result
+        self.finish()
+        return results
+
+    def resolve(self, pending):
+        """The targets of the operations by kind and by the value naming them, one query per kind"""
+        wanted = defaultdict(set)
+        for index, operation in pending:
+            wanted[operation["target"]].add(operation[operation["target"]])
+
+        found = {"post": {}, "comment": {}, "user": {}}
+        if wanted["post"]:
+            for row in Posts.objects.filter(link__in=wanted["post"]).values("id", "link", "status"):
+                found["post"][row["link"]] = {
+                    "id": row["id"], "post_id": row["id"], "published": row["status"] == Posts.Status.PUBLISHED,
+                }
+        if wanted["comment"]:
+            for row in Comments.objects.filter(pk__in=wanted["comment"]).values("id", "post_id", "post__status"):
+                found["comment"][row["id"]] = {
+                    "id": row["id"], "post_id": row["post_id"], "published": row["post__status"] == Posts.Status.PUBLISHED,
+                }
+        if wanted["user"]:
+            for row in User.objects.filter(username__in=wanted["user"]).values("id", "username"):
+                found["user"][row["username"]] = {"id": row["id"], "published": True}
+        return found
+
+    def apply(self, op, kind, run):
+        """Apply a run of operations of the same kind, returns their results by index"""
+        if kind == "user":
+            return self.follow(op == "follow", run)
+        if op == "comment":
+            return self.comment(run)
+        return self.toggle(TOGGLES[kind][op], op in CREATING, run)
+
+    def toggle(self, toggle, turn_on, run):
+        ids = [target["id"] for index, operation, target in run]
+        if turn_on:
+            changed = toggle.turn_on_many(self.user, ids)
+        else:
+            changed = toggle.turn_off_many(self.user, self.owned(toggle, ids))
+
+        results = {}
+        for index, operation, target in run:
+            # a target repeated in the run only changes the first time
+            results[index] = {"status": 200, "changed": target["id"] in changed}
+            if target["id"] in changed:
+                changed.discard(target["id"])
+                self.purged.add(f"post:{target['post_id']}")
+        return results
+
+    def owned(self, toggle, ids):
+        """The targets whose rows the user may delete"""
+        permission = OWNER_PERMISSIONS[toggle]()
+        rows = toggle.model.objects.filter(user=self.user, **{f"{toggle.field}_id__in": ids})
+        return [
+            getattr(row, f"{toggle.field}_id") for row in rows
+            if permission.has_object_permission(self.request, self.view, row)
+        ]
+
+    def comment(self, run):
+        # saved one by one, Comments.save refuses drafts and counts the comment,
+        # and the new primary keys are known on every backend
+        results = {}
+        for index, operation, target in run:
+            comment = Comments.objects.create(user=self.user, post_id=target["id"], content=operation["content"])
+            if comment.pk is None:
+                # unpublished since it was looked up
+                results[index] = NOT_FOUND
+                continue
+            self.purged.add(f"post:{target['id']}")
+            results[index] = {
+                "status": 201, "url": reverse("comments-detail", kwargs={"pk": comment.pk}, request=self.request),
+            }
+        return results
+
+    def follow(self, following, run):
+        profile, created = Profile.objects.get_or_create(user=self.user)
+        if not IsProfileOwnerOrReadOnly().has_object_permission(self.request, self.view, profile):
+            return {index: FORBIDDEN for index, operation, target in run}
+
+        ids = {target["id"] for index, operation, target in run}
+        if following:
+            changed = Follow.objects.follow(self.user, ids)
+        else:
+            changed = Follow.objects.unfollow(self.user, ids)
+
+        results = {}
+        for index, operation, target in run:
+            results[index] = {"status": 200, "changed": target["id"] in changed}
+            if target["id"] in changed:
+                changed.discard(target["id"])
+                if self.follows.get(target["id"]) is (not following):
+                    # undone within the batch, the graph is as it was
+                    del self.follows[target["id"]]
+                else:
+                    self.follows[target["id"]] = following
+        return results
+
+    def finish(self):
+        """Bring the timeline, suggestions and caches in step with the batch, once"""
+        if self.follows:
+            followed = [pk for pk, following in self.follows.items() if following]
+            unfollowed = [pk for pk, following in self.follows.items() if not following]
+            if followed:
+                timeline.backfill(self.user, authors=followed)
+            for pk in unfollowed:
+                timeline.forget(self.user, pk)
+            suggestions.apply_follows(self.user, added=followed, removed=unfollowed)
+            self.purged.update([f"user:{self.user.pk}", *(f"user:{pk}" for pk in self.follows)])
+        if self.purged:
+            page_cache.purge(*sorted(self.purged))
@@ -0,0 +1,37 @@
+from django.conf import settings
+from rest_framework import serializers
+
+# the targets every operation takes, one of them when there are several
+TARGETS = {
+    "like": ("post", "comment"),
+    "unlike": ("post", "comment"),
+    "save": ("post",),
+    "unsave": ("post",),
+    "comment": ("post",),
+    "follow": ("user",),
+    "unfollow": ("user",),
+}
+
+
+class OperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=list(TARGETS))
+    post = serializers.SlugField(required=False, max_length=250)
+    comment = serializers.IntegerField(required=False, min_value=1)
+    user = serializers.CharField(required=False, max_length=150)
+    content = serializers.CharField(required=False)
+
+    def validate(self, data):
+        targets = [name for name in TARGETS[data["op"]] if name in data]
+        if len(targets) != 1:
+            raise serializers.ValidationError(f"{data['op']} takes one of: {', '.join(TARGETS[data['op']])}.")
+        if data["op"] == "comment" and not data.get("content"):
+            raise serializers.ValidationError({"content": "This field is required."})
+        data["target"] = targets[0]
+        return data
+
+
+class BatchSerializer(serializers.Serializer):
+    # every operation is validated on its own, an invalid one fails alone
+    operations = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=settings.BATCH_MAX_OPERATIONS,
+    )
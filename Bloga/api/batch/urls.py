@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('batch/', views.BatchView.as_view(), name='batch'),
+]
@@ -0,0 +1,20 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import permissions
+
+from .operations import Batch
+from .serializers import BatchSerializer
+
+
+class BatchView(APIView):
+    """
+    API v1 endpoint applying an ordered list of likes, saves, comments and follows
+    in one request, e.g. {"operations": [{"op": "like", "post": "<link>"}, ...]}
+    Answers with the result of every operation, in order
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"results": Batch(request, self).run(serializer.validated_data["operations"])})
@@ -0,0 +1,104 @@
+from operator import attrgetter
+
+from django.db.models.manager import BaseManager
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def query_names(request, param):
+    """The comma separated names of the query parameter `param`, None when it is not given"""
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class Include:
+    """
+    A related resource a serializer embeds on `?include=<name>`.
+
+    It is serialised from the `source` attribute of the instance with
+    `serializer`, or by the serializer's `method`, and loaded for the whole
+    page by `select` and `prefetch`, the lookups added to the queryset.
+    `prefetch` may be a function of the request for lookups depending on the viewer.
+    """
+    def __init__(self, serializer=None, source=None, many=False, method=None, select=(), prefetch=()):
+        self.serializer = serializer
+        self.source = source
+        self.many = many
+        self.method = method
+        self.select = select
+        self.prefetch = prefetch
+
+    def lookups(self, request):
+        return self.prefetch(request) if callable(self.prefetch) else self.prefetch
+
+    def represent(self, instance, serializer):
+        if self.method:
+            return getattr(serializer, self.method)(instance)
+        value = attrgetter(self.source)(instance)
+        if isinstance(value, BaseManager):
+            value = value.all()
+        return self.serializer(value, many=self.many, context={"request": serializer.context.get("request")}).data
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin answering `?fields=` with only the fields named and
+    `?include=` with the related resources of `includes` embedded, under
+    their name, in place of their hyperlink if there is one.
+
+    Both are read from the context set by `IncludeViewMixin`, so the
+    serializers of the embedded resources render in full and embed nothing.
+    """
+    includes = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        names = self.context.get("fields")
+        if names is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in names}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for name in self.context.get("include", ()):
+            data[name] = self.includes[name].represent(instance, self)
+        return data
+
+
+class IncludeViewMixin:
+    """
+    View mixin passing `?fields=` and `?include=` to a `SparseFieldsMixin`
+    serializer and loading the included resources with the queryset, a query
+    per resource for the whole page. `?fields=` only trims responses to reads.
+    """
+    def get_includes(self):
+        if not hasattr(self, "_includes"):
+            names = query_names(self.request, "include") or set()
+            includes = self.get_serializer_class().includes
+            unknown = names - set(includes)
+            if unknown:
+                raise ParseError(f"Can not include {', '.join(sorted(unknown))}.")
+            self._includes = {name: includes[name] for name in sorted(names)}
+        return self._includes
+
+    def include_related(self, queryset):
+        """`queryset`, or each of a tuple of querysets, loading the included resources"""
+        if isinstance(queryset, tuple):
+            return tuple(self.include_related(branch) for branch in queryset)
+        for include in self.get_includes().values():
+            if include.select:
+                queryset = queryset.select_related(*include.select)
+            queryset = queryset.prefetch_related(*include.lookups(self.request))
+        return queryset
+
+    def get_queryset(self):
+        return self.include_related(super().get_queryset())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["include"] = list(self.get_includes())
+        if self.request.method in SAFE_METHODS:
+            context["fields"] = query_names(self.request, "fields")
+        return context
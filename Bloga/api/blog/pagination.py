@@ -0,0 +1,70 @@
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from blog.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_ordering
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over `keys` with the opaque `?after=` cursor of the blog,
+    a page is one LIMIT query and no COUNT is ever made.
+
+    A view whose rows are best read with several index scans returns them as a
+    tuple of querysets from `get_queryset`, the page is then read from the
+    UNION ALL of the branches, each filtered past the cursor.
+    """
+    keys = ("-publish", "-id")
+    nullable = ("publish",)
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "after"
+
+    def branches(self, queryset, request):
+        """The branches of `queryset`, each ordered by the keys and starting after the cursor"""
+        branches = queryset if isinstance(queryset, tuple) else (queryset,)
+        ordering = keyset_ordering(self.keys, self.nullable)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                values = decode_cursor(cursor, branches[0].model, self.keys)
+                branches = [branch.filter(keyset_filter(self.keys, values, self.nullable)) for branch in branches]
+            except (Http404, ValidationError, TypeError, ValueError):
+                raise NotFound("Invalid cursor")
+        return [branch.order_by(*ordering) for branch in branches]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        first, *others = self.branches(queryset, request)
+        if others:
+            # the branches can not be ordered inside the UNION, only the whole of it
+            first = first.order_by().union(*(other.order_by() for other in others), all=True)
+            first = first.order_by(*keyset_ordering(self.keys, self.nullable))
+
+        rows = list(first[:self.page_size + 1])
+        self.next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_cursor = encode_cursor(getattr(rows[-1], key.lstrip("-")) for key in self.keys)
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
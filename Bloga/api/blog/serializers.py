@@ -1,19 +1,66 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from api.fields import HyperlinkedModelSerializer
+from django.utils.text import Truncator
 from blog.models import (
     Posts, Comments, PostReactions, CommentReactions,
     SavedPost
 )
+from blog import recommendations, related, tagging
+from blog.rendering import EXCERPT_LENGTH
+from django.db.models import Prefetch
+from taggit.models import Tag
 from taggit.serializers import TagListSerializerField, TaggitSerializer
+from api.authentication.serializers import UserSerializer
+from .mixins import Include, SparseFieldsMixin
 
 
-class PostsSerializer(TaggitSerializer, serializers.HyperlinkedModelSerializer):
+def viewer_prefetch(*relations):
+    """The lookups loading the viewer's rows of every (relation, model, to_attr) as `to_attr`"""
+    def lookups(request):
+        if not request.user.is_authenticated:
+            return []
+        return [
+            Prefetch(relation, queryset=model.objects.filter(user=request.user), to_attr=to_attr)
+            for relation, model, to_attr in relations
+        ]
+    return lookups
+
+
+def viewer_rows(instance, relation, to_attr, request):
+    """The rows of the viewer prefetched by `viewer_prefetch`, queried if they were not"""
+    if not request.user.is_authenticated:
+        return []
+    rows = getattr(instance, to_attr, None)
+    if rows is None:
+        rows = list(getattr(instance, relation).filter(user=request.user))
+    return rows
+
+
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['name', 'slug']
+
+
+class PostsSerializer(SparseFieldsMixin, TaggitSerializer, HyperlinkedModelSerializer):
+    """
+    A post as listed, with a plain text excerpt in place of its content,
+    which is only written. The whole content is on `PostsDetailSerializer`.
+    """
     status = serializers.ChoiceField(choices=Posts.Status.choices)
     tags = TagListSerializerField(required=False)
+    content = serializers.CharField(write_only=True, style={'base_template': 'textarea.html'})
+    excerpt = serializers.SerializerMethodField()
     
     
     class Meta:
         model = Posts
-        fields = ['url','title', 'content', 'status', 'tags', 'link', 'author', 'publish', 'created', 'updated']
+        fields = [
+            'url','title', 'content', 'excerpt', 'status', 'tags', 'link', 'author', 'publish', 'created', 'updated',
+            'likes_count', 'comments_count', 'saves_count', 'views_count',
+        ]
+        read_only_fields = ['likes_count', 'comments_count', 'saves_count', 'views_count']
         extra_kwargs = {
             "link":  {"read_only": True},
             "author": {"read_only": True},
@@ -28,8 +75,10 @@ class PostsSerializer(TaggitSerializer, serializers.HyperlinkedModelSerializer):
         author = kwargs.get('author')
         update = kwargs.get('update', False)
         
+        was_status = None
         if update:
             post = self.instance
+            was_status = post.status
             post.title = self.validated_data.get('title', post.title)
             post.content = self.validated_data.get('content', post.content)
             post.status = self.validated_data.get('status', post.status)
@@ -44,25 +93,69 @@ class PostsSerializer(TaggitSerializer, serializers.HyperlinkedModelSerializer):
         # Save the post object
         post.save(update=update)
 
-        post.tags.set(self.validated_data.get('tags', []))
-        post.save(update=True)
+        # the related posts only depend on the tags and the status
+        if tagging.set_tags(post, self.validated_data.get('tags', [])) or (update and post.status != was_status):
+            related.refresh(post)
         self.instance = post
         
         self.instance
+    
+    def get_viewer_state(self, post):
+        request = self.context.get('request')
+        reactions = viewer_rows(post, 'reactions', 'viewer_reactions', request)
+        return {
+            'reaction': reactions[0].reaction if reactions else None,
+            'saved': bool(viewer_rows(post, 'savers', 'viewer_saves', request)),
+        }
+    
+    def get_excerpt(self, post):
+        # lists load only the `excerpt` of the content, see `PostsQuerySet.for_feed`
+        excerpt = getattr(post, 'excerpt', None)
+        return Truncator(post.content if excerpt is None else excerpt).chars(EXCERPT_LENGTH)
         
         
-class CommentsSerializer(serializers.HyperlinkedModelSerializer):
+class PostsDetailSerializer(PostsSerializer):
+    content = serializers.CharField(style={'base_template': 'textarea.html'})
+    related = serializers.SerializerMethodField()
+    also_liked = serializers.SerializerMethodField()
+    
+    class Meta(PostsSerializer.Meta):
+        fields = PostsSerializer.Meta.fields + ['related', 'also_liked']
+    
+    def _links(self, posts):
+        request = self.context.get('request')
+        return [
+            {
+                'title': other.title,
+                'url': reverse('posts-detail', kwargs={'link': other.link}, request=request),
+            }
+            for other in posts
+        ]
+    
+    def get_related(self, post):
+        return self._links(related.related_posts(post))
+    
+    def get_also_liked(self, post):
+        return self._links(recommendations.also_liked(post))
+        
+        
+class CommentsSerializer(SparseFieldsMixin, HyperlinkedModelSerializer):
     class Meta:
         model = Comments
-        fields = ['url', 'post', 'user', 'content']
+        fields = ['url', 'post', 'user', 'content', 'likes_count']
+        read_only_fields = ['likes_count']
         extra_kwargs = {
             "url": {"view_name": "comments-detail"},
             "post": {"view_name": "posts-detail", "lookup_field": "link"},
             "user": {"view_name": "user-detail", "lookup_field": "username", "read_only": True},
         }
+    
+    def get_viewer_state(self, comment):
+        reactions = viewer_rows(comment, 'reactions', 'viewer_reactions', self.context.get('request'))
+        return {'reaction': reactions[0].reaction if reactions else None}
         
 
-class PostReactionsSerializer(serializers.HyperlinkedModelSerializer):
+class PostReactionsSerializer(SparseFieldsMixin, HyperlinkedModelSerializer):
     reaction = serializers.ChoiceField(choices=PostReactions.Reactions.choices)
     class Meta:
         model = PostReactions
@@ -74,7 +167,7 @@ class PostReactionsSerializer(serializers.HyperlinkedModelSerializer):
         }        
 
 
-class CommentReactionsSerializer(serializers.HyperlinkedModelSerializer):
+class CommentReactionsSerializer(HyperlinkedModelSerializer):
     reaction = serializers.ChoiceField(choices=CommentReactions.Reactions.choices)
     class Meta:
         model = CommentReactions
@@ -86,7 +179,7 @@ class CommentReactionsSerializer(serializers.HyperlinkedModelSerializer):
         }
         
         
-class SavedPostSerializer(serializers.HyperlinkedModelSerializer):
+class SavedPostSerializer(SparseFieldsMixin, HyperlinkedModelSerializer):
     class Meta:
         model = SavedPost
         fields = ['url', 'user', 'post']
@@ -95,4 +188,38 @@ class SavedPostSerializer(serializers.HyperlinkedModelSerializer):
             "user": {"view_name": "user-detail", "lookup_field": "username", "read_only": True},
             "post": {"view_name": "posts-detail", "lookup_field": "link"},   
         }
-        
+
+
+def embedded_post():
+    return Include(PostsSerializer, source='post', select=['post', 'post__author'], prefetch=['post__tags'])
+
+
+# declared once all serializers exist, posts embed their comments and comments their post
+PostsSerializer.includes = {
+    'author': Include(UserSerializer, source='author', select=['author']),
+    'tags': Include(TagSerializer, source='tags', many=True, prefetch=['tags']),
+    'comments': Include(
+        CommentsSerializer, source='comments', many=True,
+        prefetch=[Prefetch('comments', queryset=Comments.objects.select_related('user').order_by('date', 'id'))],
+    ),
+    'viewer_state': Include(method='get_viewer_state', prefetch=viewer_prefetch(
+        ('reactions', PostReactions, 'viewer_reactions'), ('savers', SavedPost, 'viewer_saves'),
+    )),
+}
+
+CommentsSerializer.includes = {
+    'author': Include(UserSerializer, source='user', select=['user']),
+    'post': embedded_post(),
+    'viewer_state': Include(method='get_viewer_state', prefetch=viewer_prefetch(
+        ('reactions', CommentReactions, 'viewer_reactions'),
+    )),
+}
+
+PostReactionsSerializer.includes = {
+    'author': Include(UserSerializer, source='user', select=['user']),
+    'post': embedded_post(),
+}
+
+SavedPostSerializer.includes = {
+    'post': embedded_post(),
+}
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path('post/', views.PostsListView.as_view(), name='posts-list'),
     path('post/<slug:link>/', views.PostsDetailView.as_view(), name='posts-detail'),
+    path('feed/', views.FeedView.as_view(), name='feed'),
+    path('for-you/', views.ForYouView.as_view(), name='for-you'),
     path("comment/", views.CommentsListView.as_view(), name='comments-list'),
     path("comment/<int:pk>/", views.CommentsDetailView.as_view(), name='comments-detail'),
     path("post-reaction/", views.PostReactionsListView.as_view(), name="postreactions-list"),
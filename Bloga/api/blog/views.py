@@ -1,62 +1,139 @@
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, RetrieveDestroyAPIView
+from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, RetrieveDestroyAPIView, GenericAPIView
 from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from blog.models import (
     Posts, Comments, PostReactions, CommentReactions,
     SavedPost
 )
 from .serializers import (
-    PostsSerializer, CommentsSerializer, PostReactionsSerializer,
+    PostsSerializer, PostsDetailSerializer, CommentsSerializer, PostReactionsSerializer,
     CommentReactionsSerializer, SavedPostSerializer
 )
-from django.db.models import Q
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+from blog import page_cache, recommendations
+from blog.timeline import timeline_page
+from blog.view_counts import count_view
+from blog.conditional import union_validators, post_resource_etag, post_resource_last_modified
+from .mixins import IncludeViewMixin
+from .pagination import KeysetPagination
 from .permissions import(
     IsPostOwernerOrReadOnly, IsCommentOwernerOrReadOnly, IsPostReactionOwernerOrReadOnly,
     IsCommentReactionOwernerOrReadOnly, IsSavedPostOwerner
 )
 
 
-class PostsListView(ListCreateAPIView):
+class PostsListView(IncludeViewMixin, ListCreateAPIView):
     """
     API v1 endpoint for Posts
+    Paginated with the opaque `after` cursor of the `next` link
     """
     queryset = Posts.objects.all().order_by('-publish')
     serializer_class = PostsSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'link'
     
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        post = serializer.instance
+        page_cache.purge_post(post.pk, post.author_id, page_cache.UNLISTED, page_cache.post_state(post))
         
-    # list should contain published post and owner's draftpost
+    # list should contain published post and owner's draftpost, read as two index scans
+    # instead of one OR that no index serves
     def get_queryset(self):
+        published = Posts.published.for_feed()
         user = self.request.user
         if not user.is_authenticated:
-            self.queryset = Posts.published.all().order_by('-publish')
-        else:
-             self.queryset = Posts.objects.filter(Q(status="PB") | Q(status='DF', author=user)).all().order_by('-publish')
-        return self.queryset
+            return self.include_related(published)
+        drafts = Posts.objects.filter(status=Posts.Status.DRAFT, author=user).for_feed()
+        return self.include_related((published, drafts))
+    
+    def get(self, request, *args, **kwargs):
+        # answer polling clients from one aggregate per branch instead of serialising the page
+        validators = self.page_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        
+        etag, last_modified = quote_etag(validators[0]), validators[1].timestamp()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            response.headers.setdefault("ETag", etag)
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+        return response
+    
+    def page_validators(self):
+        # the included resources are not covered by the validators
+        if self.get_includes():
+            return None
+        paginator = self.paginator
+        return union_validators(paginator.branches(self.get_queryset(), self.request), paginator.page_size)
        
     
-class PostsDetailView(RetrieveUpdateDestroyAPIView):
+@method_decorator(count_view, name="get")
+@method_decorator(condition(etag_func=post_resource_etag, last_modified_func=post_resource_last_modified), name="get")
+class PostsDetailView(IncludeViewMixin, RetrieveUpdateDestroyAPIView):
     """
     API v1 endpoint for Posts instances
     """
     queryset = Posts.objects.all()
-    serializer_class = PostsSerializer
+    serializer_class = PostsDetailSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsPostOwernerOrReadOnly]
     lookup_field = 'link'
     
     def perform_update(self, serializer):
+        before = page_cache.post_state(serializer.instance)
         serializer.save(instance=self.get_object(), update=True)
+        post = serializer.instance
+        page_cache.purge_post(post.pk, post.author_id, before, page_cache.post_state(post))
+    
+    def perform_destroy(self, instance):
+        post_id, before = instance.pk, page_cache.post_state(instance)
+        instance.delete()
+        page_cache.purge_post(post_id, instance.author_id, before, page_cache.UNLISTED)
+        
         
+class FeedView(IncludeViewMixin, GenericAPIView):
+    """
+    API v1 endpoint for the posts of the authors the user follows
+    Paginated with the opaque `after` cursor of the `next` link
+    """
+    serializer_class = PostsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        page = timeline_page(request, request.user, posts=self.include_related(Posts.objects.for_feed()))
+        serializer = self.get_serializer(page, many=True)
+        next_url = None
+        if page.has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'after', page.next_cursor)
+        return Response({"next": next_url, "results": serializer.data})
+
+
+class ForYouView(IncludeViewMixin, GenericAPIView):
+    """
+    API v1 endpoint for the posts recommended to the user from their likes and bookmarks
+    """
+    serializer_class = PostsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        posts = recommendations.for_you(request.user, posts=self.include_related(Posts.published.for_feed()))
+        serializer = self.get_serializer(posts, many=True)
+        return Response({"results": serializer.data})
         
-class CommentsListView(ListCreateAPIView):
+
+class CommentsListView(IncludeViewMixin, ListCreateAPIView):
     """
     API v1 endpoint for Comments
     Note that can on create if post is published
     """
-    queryset = Comments.objects.all()
+    queryset = Comments.objects.select_related('post', 'user')
     serializer_class = CommentsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,]
 
@@ -64,10 +141,11 @@ class CommentsListView(ListCreateAPIView):
     def perform_create(self, serializer):
         comment = Comments(user=self.request.user)
         serializer.instance = comment
-        return super().perform_create(serializer)
+        super().perform_create(serializer)
+        page_cache.purge(f"post:{serializer.instance.post_id}")
     
     
-class CommentsDetailView(RetrieveUpdateDestroyAPIView):
+class CommentsDetailView(IncludeViewMixin, RetrieveUpdateDestroyAPIView):
     """
     API v1 endpoint for Comments instances
     Note that can on update and destroy if post is published
@@ -75,14 +153,23 @@ class CommentsDetailView(RetrieveUpdateDestroyAPIView):
     queryset = Comments.objects.all()
     serializer_class = CommentsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsCommentOwernerOrReadOnly]
+    
+    def perform_update(self, serializer):
+        post_id = serializer.instance.post_id
+        comment = serializer.save()
+        page_cache.purge(f"post:{post_id}", f"post:{comment.post_id}")
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        page_cache.purge(f"post:{instance.post_id}")
 
 
-class PostReactionsListView(ListCreateAPIView):
+class PostReactionsListView(IncludeViewMixin, ListCreateAPIView):
     """
     API v1 endpoint for post reactions
     Note: It only creates if the post is published
     """
-    queryset = PostReactions.objects.all()
+    queryset = PostReactions.objects.select_related('post', 'user')
     serializer_class = PostReactionsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,]
     
@@ -91,10 +178,11 @@ class PostReactionsListView(ListCreateAPIView):
         user = self.request.user
         reaction = PostReactions(user=user)
         serializer.instance = reaction
-        return super().perform_create(serializer)    
+        super().perform_create(serializer)
+        page_cache.purge(f"post:{serializer.instance.post_id}")
 
 
-class PostReactionsDetailView(RetrieveDestroyAPIView):
+class PostReactionsDetailView(IncludeViewMixin, RetrieveDestroyAPIView):
     """
     API v1 endpoint for post reactions instances
     Note: It only creates if the post is published
@@ -102,6 +190,10 @@ class PostReactionsDetailView(RetrieveDestroyAPIView):
     queryset = PostReactions.objects.all()
     serializer_class = PostReactionsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsPostReactionOwernerOrReadOnly]
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        page_cache.purge(f"post:{instance.post_id}")
 
 
 class CommentReactionsListView(ListCreateAPIView):
@@ -109,7 +201,7 @@ class CommentReactionsListView(ListCreateAPIView):
     API v1 endpoint for comment reactions
     Note: It only creates if the comment for a published post
     """
-    queryset = CommentReactions.objects.all()
+    queryset = CommentReactions.objects.select_related('user')
     serializer_class = CommentReactionsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,]
     
@@ -118,7 +210,8 @@ class CommentReactionsListView(ListCreateAPIView):
         user = self.request.user
         reaction = CommentReactions(user=user)
         serializer.instance = reaction
-        return super().perform_create(serializer)    
+        super().perform_create(serializer)
+        page_cache.purge(f"post:{serializer.instance.comment.post_id}")
 
 
 class CommentReactionsDetailView(RetrieveDestroyAPIView):
@@ -129,9 +222,13 @@ class CommentReactionsDetailView(RetrieveDestroyAPIView):
     queryset = CommentReactions.objects.all()
     serializer_class = CommentReactionsSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsCommentReactionOwernerOrReadOnly]
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        page_cache.purge(f"post:{instance.comment.post_id}")
 
 
-class SavedPostListView(ListCreateAPIView):
+class SavedPostListView(IncludeViewMixin, ListCreateAPIView):
     """
     API v1 endpoint for saved posts
     """
@@ -142,21 +239,26 @@ class SavedPostListView(ListCreateAPIView):
     # only how saved post that belong to the user
     def get_queryset(self):
         user=self.request.user
-        self.queryset = SavedPost.objects.filter(user=user).all()
+        self.queryset = SavedPost.objects.filter(user=user).select_related('post', 'user')
         return super().get_queryset()
     
     # default owner of a saved post is the authenticated user
     def perform_create(self, serializer):
         saved = SavedPost(user=self.request.user)
         serializer.instance = saved
-        return super().perform_create(serializer)
+        super().perform_create(serializer)
+        page_cache.purge(f"post:{serializer.instance.post_id}")
     
     
 
-class SavedPostDetailView(RetrieveDestroyAPIView):
+class SavedPostDetailView(IncludeViewMixin, RetrieveDestroyAPIView):
     """
     API v1 endpoint for the saved post instances
     """
     queryset = SavedPost.objects.all()
     serializer_class = SavedPostSerializer
-    permission_classes = [permissions.IsAuthenticated, IsSavedPostOwerner]
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated, IsSavedPostOwerner]
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        page_cache.purge(f"post:{instance.post_id}")
\ No newline at end of file
@@ -0,0 +1,53 @@
+from urllib.parse import quote
+
+from django.urls import NoReverseMatch
+from django.utils.http import RFC3986_SUBDELIMS
+from rest_framework import serializers
+
+# a lookup value every path converter accepts, replaced by the real one in the reversed URL
+PLACEHOLDER = "9876543210"
+
+
+class FastHyperlinkMixin:
+    """
+    Build hyperlinks from a URL template reversed once per request and view
+    instead of calling `reverse` for every object: the lookup value is quoted
+    like `reverse` does and put in place of a placeholder, so the URLs are the
+    same as the stock fields'. Values `reverse` could reject go through it.
+    """
+    def url_template(self, view_name, request, format):
+        templates = getattr(request, "_hyperlink_templates", None)
+        if templates is None:
+            templates = request._hyperlink_templates = {}
+        key = (view_name, self.lookup_url_kwarg, format)
+        if key not in templates:
+            try:
+                url = self.reverse(view_name, kwargs={self.lookup_url_kwarg: PLACEHOLDER}, request=request, format=format)
+            except NoReverseMatch:
+                url = None
+            templates[key] = url.split(PLACEHOLDER) if url and url.count(PLACEHOLDER) == 1 else None
+        return templates[key]
+
+    def get_url(self, obj, view_name, request, format):
+        if hasattr(obj, "pk") and obj.pk in (None, ""):
+            return None
+        value = str(getattr(obj, self.lookup_field))
+        template = self.url_template(view_name, request, format) if request is not None else None
+        if template is None or not value or "/" in value:
+            return super().get_url(obj, view_name, request, format)
+        prefix, suffix = template
+        return prefix + quote(value, safe=RFC3986_SUBDELIMS + "/~:@") + suffix
+
+
+class FastHyperlinkedRelatedField(FastHyperlinkMixin, serializers.HyperlinkedRelatedField):
+    pass
+
+
+class FastHyperlinkedIdentityField(FastHyperlinkMixin, serializers.HyperlinkedIdentityField):
+    pass
+
+
+class HyperlinkedModelSerializer(serializers.HyperlinkedModelSerializer):
+    """A `HyperlinkedModelSerializer` whose generated hyperlinks are built from URL templates"""
+    serializer_related_field = FastHyperlinkedRelatedField
+    serializer_url_field = FastHyperlinkedIdentityField
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import fields
+from blog.models import Comments, Posts
+
+
+def comment_serializer(base):
+    """A serializer of comments with the hyperlinks of `CommentsSerializer`, built on `base`"""
+    class Serializer(base):
+        class Meta:
+            model = Comments
+            fields = ['url', 'post', 'user', 'content']
+            extra_kwargs = {
+                "url": {"view_name": "comments-detail"},
+                "post": {"view_name": "posts-detail", "lookup_field": "link"},
+                "user": {"view_name": "user-detail", "lookup_field": "username", "read_only": True},
+            }
+    return Serializer
+
+
+class Command(BaseCommand):
+    help = "Time the serialisation of pages of comments with the stock and the fast hyperlink fields"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--pages', type=int, default=200)
+
+    def page(self, size):
+        """Comments with their post and user loaded, like a page of the comments endpoint"""
+        comments = []
+        for item in range(size):
+            user = User(pk=item % 20 + 1, username=f"reader.{item % 20}")
+            post = Posts(pk=item % 7 + 1, link=f"post-number-{item % 7}")
+            comments.append(Comments(pk=item + 1, post=post, user=user, content="Nice post"))
+        return comments
+
+    def time(self, serializer_class, comments, pages):
+        host = (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.').replace('*', 'localhost')
+        start = time.perf_counter()
+        for _ in range(pages):
+            # a request per page, the fast fields reverse their templates once per request
+            request = Request(APIRequestFactory().get('/api/comment/', SERVER_NAME=host))
+            data = serializer_class(comments, many=True, context={'request': request}).data
+        return (time.perf_counter() - start) / pages, data
+
+    def handle(self, *args, **options):
+        comments = self.page(options['page_size'])
+        stock, stock_data = self.time(comment_serializer(serializers.HyperlinkedModelSerializer), comments, options['pages'])
+        fast, fast_data = self.time(comment_serializer(fields.HyperlinkedModelSerializer), comments, options['pages'])
+
+        self.stdout.write(f"page size: {options['page_size']}, pages: {options['pages']}")
+        self.stdout.write(f"stock fields: {stock * 1000:.2f}ms per page")
+        self.stdout.write(f"fast fields: {fast * 1000:.2f}ms per page")
+        self.stdout.write(f"speedup: {stock / fast:.1f}x")
+        self.stdout.write(f"same output: {stock_data == fast_data}")
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+from blog.models import Posts
+from taggit.serializers import TagListSerializerField, TaggitSerializer
+from api.fields import HyperlinkedModelSerializer
+
+
+class SearchResultSerializer(TaggitSerializer, HyperlinkedModelSerializer):
+    tags = TagListSerializerField(read_only=True)
+    score = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    
+    class Meta:
+        model = Posts
+        fields = ['url', 'title', 'link', 'author', 'publish', 'tags', 'score', 'snippet']
+        extra_kwargs = {
+            "url": {"view_name": "posts-detail", "lookup_field": "link"},
+            "author": {"view_name": "user-detail", "lookup_field": "username", "read_only": True},
+        }
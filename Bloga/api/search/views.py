@@ -0,0 +1,36 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+from rest_framework import permissions
+
+from search.ranking import search
+from .serializers import SearchResultSerializer
+
+
+class SearchView(APIView):
+    """
+    API v1 endpoint for BM25 ranked full-text search over published posts
+    Query parameters: q, tag, author and page
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        params = request.query_params
+        try:
+            page = int(params.get('page', 1))
+        except ValueError:
+            raise NotFound("Invalid page")
+        if page < 1:
+            raise NotFound("Invalid page")
+        
+        query = params.get('q', '').strip()
+        results = search(query, tag=params.get('tag'), author=params.get('author'), page=page)
+        serializer = SearchResultSerializer(results, many=True, context={'request': request})
+        
+        url = request.build_absolute_uri()
+        return Response({
+            "next": replace_query_param(url, 'page', page + 1) if results.has_next else None,
+            "previous": replace_query_param(url, 'page', page - 1) if page > 1 else None,
+            "results": serializer.data,
+        })
@@ -0,0 +1,145 @@
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.urls import reverse, resolve
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from authentication.models import Follow
+from blog.models import Posts, Comments, PostReactions, CommentReactions, SavedPost
+
+
+class BatchTest(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('batch')
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.posts = [
+            Posts.objects.create(author=self.author, title=f"Post {item}", content="content", status="PB")
+            for item in range(3)
+        ]
+        self.draft = Posts.objects.create(author=self.author, title="Draft", content="content", status="DF")
+        self.comment = Comments.objects.create(user=self.author, post=self.posts[0], content="First")
+        self.client.login(username='reader', password='password123')
+
+    def batch(self, *operations):
+        return self.client.post(self.url, {"operations": list(operations)}, format='json')
+
+    def test_mixed_operations(self):
+        """
+        Test that every operation is applied in order and answered in its place.
+        """
+        post = self.posts[0]
+        response = self.batch(
+            {"op": "like", "post": post.link},
+            {"op": "save", "post": post.link},
+            {"op": "comment", "post": post.link, "content": "Nice post"},
+            {"op": "like", "comment": self.comment.pk},
+            {"op": "follow", "user": "author"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [200, 200, 201, 200, 200])
+        self.assertTrue(all(result.get('changed', True) for result in results))
+
+        comment = Comments.objects.get(content="Nice post")
+        self.assertEqual(results[2]['url'], 'http://testserver' + reverse('comments-detail', kwargs={'pk': comment.pk}))
+        post.refresh_from_db()
+        self.assertEqual((post.likes_count, post.saves_count, post.comments_count), (1, 1, 2))
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.likes_count, 1)
+        self.assertTrue(CommentReactions.objects.filter(user=self.reader, comment=self.comment).exists())
+        self.assertTrue(Follow.objects.filter(follower=self.reader, followee=self.author).exists())
+
+    def test_run_of_comments(self):
+        """
+        Test that every comment of a run is saved and answered with its own url.
+        """
+        response = self.batch(
+            {"op": "comment", "post": self.posts[0].link, "content": "One"},
+            {"op": "comment", "post": self.posts[1].link, "content": "Two"},
+            {"op": "comment", "post": self.posts[0].link, "content": "Three"},
+        )
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [201, 201, 201])
+        for result, content in zip(results, ["One", "Two", "Three"]):
+            match = resolve(urlparse(result['url']).path)
+            self.assertEqual(match.url_name, 'comments-detail')
+            self.assertEqual(Comments.objects.get(pk=match.kwargs['pk']).content, content)
+        self.assertEqual(
+            [post.comments_count for post in Posts.objects.filter(pk__in=[p.pk for p in self.posts]).order_by('pk')],
+            [3, 1, 0],
+        )
+
+    def test_run_of_likes(self):
+        """
+        Test that a run of likes is applied together and a repeated or existing like changes nothing.
+        """
+        PostReactions.objects.create(user=self.reader, post=self.posts[2])
+        operations = [{"op": "like", "post": post.link} for post in self.posts]
+        operations.append({"op": "like", "post": self.posts[0].link})
+        response = self.batch(*operations)
+        self.assertEqual([result['changed'] for result in response.data['results']], [True, True, False, False])
+        self.assertEqual(PostReactions.objects.filter(user=self.reader).count(), 3)
+        self.assertEqual([post.likes_count for post in Posts.objects.filter(pk__in=[p.pk for p in self.posts]).order_by('pk')], [1, 1, 1])
+
+        response = self.batch(*({"op": "unlike", "post": post.link} for post in self.posts[:2]))
+        self.assertEqual([result['changed'] for result in response.data['results']], [True, True])
+        self.assertEqual(PostReactions.objects.filter(user=self.reader).count(), 1)
+        self.assertEqual(Posts.objects.get(pk=self.posts[0].pk).likes_count, 0)
+
+    def test_queries_do_not_grow_with_operations(self):
+        """
+        Test that a run of likes takes the same queries whatever its length.
+        """
+        self.batch({"op": "like", "post": self.posts[0].link})
+        PostReactions.objects.all().delete()
+        with self.assertNumQueries(17) as one:
+            self.batch({"op": "like", "post": self.posts[0].link})
+        PostReactions.objects.all().delete()
+        with self.assertNumQueries(len(one.captured_queries)):
+            self.batch(*({"op": "like", "post": post.link} for post in self.posts))
+
+    def test_failing_operations_fail_alone(self):
+        """
+        Test that invalid operations and missing targets do not stop the others.
+        """
+        response = self.batch(
+            {"op": "dance", "post": self.posts[0].link},
+            {"op": "like", "post": "no-such-post"},
+            {"op": "like", "post": self.draft.link},
+            {"op": "comment", "post": self.posts[0].link},
+            {"op": "follow", "user": "reader"},
+            {"op": "save", "post": self.posts[1].link},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], [400, 404, 404, 400, 400, 200])
+        self.assertTrue(SavedPost.objects.filter(user=self.reader, post=self.posts[1]).exists())
+        self.assertFalse(PostReactions.objects.exists())
+
+    def test_follow_and_unfollow(self):
+        other = User.objects.create_user(username='other', password='password123')
+        self.batch({"op": "follow", "user": "author"}, {"op": "follow", "user": "other"})
+        self.assertEqual(self.reader.profile.following_count, 2)
+        self.assertEqual(other.profile.followers_count, 1)
+
+        response = self.batch({"op": "unfollow", "user": "other"}, {"op": "unfollow", "user": "other"})
+        self.assertEqual([result['changed'] for result in response.data['results']], [True, False])
+        self.reader.profile.refresh_from_db()
+        self.assertEqual(self.reader.profile.following_count, 1)
+
+    def test_unauthenticated(self):
+        self.client.logout()
+        response = self.batch({"op": "like", "post": self.posts[0].link})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(PostReactions.objects.exists())
+
+    def test_too_many_operations(self):
+        operations = [{"op": "like", "post": self.posts[0].link}] * (settings.BATCH_MAX_OPERATIONS + 1)
+        response = self.batch(*operations)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PostReactions.objects.exists())
+        response = self.batch()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
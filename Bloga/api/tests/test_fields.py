@@ -0,0 +1,73 @@
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.fields import FastHyperlinkedIdentityField, FastHyperlinkedRelatedField
+from blog.models import Posts, Comments
+
+
+class FastHyperlinkTest(APITestCase):
+    def request(self, path="/api/post/", **params):
+        return Request(APIRequestFactory().get(path, params))
+
+    def assertSameUrls(self, view_name, lookup_field, objects, request):
+        """The fast fields give the URLs of the stock ones"""
+        for fast_class, stock_class in (
+            (FastHyperlinkedRelatedField, serializers.HyperlinkedRelatedField),
+            (FastHyperlinkedIdentityField, serializers.HyperlinkedIdentityField),
+        ):
+            kwargs = {"view_name": view_name, "lookup_field": lookup_field, "read_only": True}
+            fast, stock = fast_class(**kwargs), stock_class(**kwargs)
+            for field in (fast, stock):
+                field.bind("url", serializers.Serializer(context={"request": request}))
+            for obj in objects:
+                try:
+                    expected = stock.to_representation(obj)
+                except ImproperlyConfigured:
+                    self.assertRaises(ImproperlyConfigured, fast.to_representation, obj)
+                else:
+                    self.assertEqual(fast.to_representation(obj), expected)
+
+    def test_same_urls(self):
+        users = [
+            User(pk=1, username="plain"), User(pk=2, username="dotted.name+tag@example"),
+            User(pk=3, username="ünïcode"),
+        ]
+        groups = [Group(pk=1, name="with space"), Group(pk=3, name="a?b#c%d"), Group(pk=4, name="no/match")]
+        posts = [Posts(pk=1, link="first-post"), Posts(pk=2, link="second_post-2")]
+        for request in (self.request(), self.request(format="json")):
+            self.assertSameUrls("user-detail", "username", users, request)
+            self.assertSameUrls("group-detail", "name", groups, request)
+            self.assertSameUrls("posts-detail", "link", posts, request)
+            self.assertSameUrls("comments-detail", "pk", [Comments(pk=12)], request)
+
+    def test_template_is_reversed_once_per_request(self):
+        request = self.request()
+        field = FastHyperlinkedRelatedField(view_name="user-detail", lookup_field="username", read_only=True)
+        field.bind("author", serializers.Serializer(context={"request": request}))
+        field.to_representation(User(pk=1, username="one"))
+        self.assertEqual(len(request._hyperlink_templates), 1)
+        self.assertEqual(
+            field.to_representation(User(pk=2, username="two")),
+            reverse("user-detail", kwargs={"username": "two"}, request=request),
+        )
+
+    def test_unsaved_objects_have_no_url(self):
+        field = FastHyperlinkedRelatedField(view_name="user-detail", lookup_field="username", read_only=True)
+        field.bind("author", serializers.Serializer(context={"request": self.request()}))
+        self.assertIsNone(field.get_url(User(username="new"), "user-detail", self.request(), None))
+
+    def test_list_loads_no_related_objects(self):
+        author = User.objects.create_user(username="author", password="password123")
+        post = Posts.objects.create(author=author, title="Post", content="content", status="PB")
+        for item in range(5):
+            Comments.objects.create(user=author, post=post, content=f"Comment {item}")
+        self.client.force_authenticate(author)
+        # page and count
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("comments-list"))
+        url = reverse("posts-detail", kwargs={"link": post.link}, request=response.wsgi_request)
+        self.assertEqual(response.data["results"][0]["post"], url)
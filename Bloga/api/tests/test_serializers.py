@@ -5,7 +5,7 @@ from rest_framework import serializers
 from rest_framework import status
 from authentication.models import Profile
 from blog.models import Posts
-from api.blog.serializers import PostsSerializer
+from api.blog.serializers import PostsSerializer, PostsDetailSerializer
 from rest_framework.reverse import reverse
 
 class UserSerializerTest(APITestCase):
@@ -206,8 +206,7 @@ class ProfileSerializerTestCase(APITestCase):
         self.client.login(username='user1', password='password1')
         
         # Initially user1 follows user2
-        self.profile1.follows.add(self.user2)
-        self.profile2.followers.add(self.user1)
+        self.profile1.follow(self.profile2)
 
         # Now user1 will unfollow user2
         data = {
@@ -339,6 +338,9 @@ class PostSerializerTest(APITestCase):
         response = self.client.get(reverse('posts-list'))
         serializer = PostsSerializer(post, context = {'request': response.wsgi_request})
         self.assertEqual(serializer.data['title'], post.title)
+        self.assertEqual(serializer.data['excerpt'], post.content)
+        self.assertNotIn('content', serializer.data)
+        serializer = PostsDetailSerializer(post, context = {'request': response.wsgi_request})
         self.assertEqual(serializer.data['content'], post.content)
         self.assertEqual(serializer.data['status'], post.status)
         
\ No newline at end of file
@@ -1,3 +1,5 @@
+from unittest import mock
+
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
 from rest_framework.reverse import reverse
@@ -8,6 +10,10 @@ from rest_framework.request import Request
 from rest_framework.test import APIRequestFactory
 from authentication.models import Profile
 from blog.models import Posts, PostReactions, CommentReactions, Comments, SavedPost
+from blog import related
+from blog.conditional import VIEWS_BUCKET
+from api.blog.pagination import KeysetPagination
+from blog.tests.test_pagination import CRAFTED, craft
 from api.blog.serializers import PostReactionsSerializer, CommentReactionsSerializer
 
 
@@ -22,9 +28,9 @@ class RootViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         expected_keys = [
-            "login", "logout", "logoutall", "user", "profile",
-            "group", "post", "comment", "post-reaction",
-            "comment-reaction", "saved-post"
+            "login", "logout", "logoutall", "user", "suggested-user", "profile",
+            "group", "post", "feed", "for-you", "comment", "post-reaction",
+            "comment-reaction", "saved-post", "search", "analytics", "batch",
         ]
         
         # Assert that all expected keys are present in the response data
@@ -304,6 +310,34 @@ class ProfileDetailViewTest(APITestCase):
         
         # Check if the request was denied for unauthenticated user
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+
+class SuggestedUsersViewTest(APITestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.friend = User.objects.create_user(username='friend', password='password123')
+        self.author = User.objects.create_user(username='author', password='password123')
+        for user in (self.reader, self.friend, self.author):
+            Profile.objects.create(user=user, bio=f"{user.username}'s bio")
+        self.reader.profile.follow(self.friend.profile)
+        self.friend.profile.follow(self.author.profile)
+
+    def test_suggested_users(self):
+        self.client.login(username='reader', password='password123')
+        response = self.client.get(reverse('user-suggested'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [suggestion] = response.data['results']
+        self.assertEqual(suggestion['username'], 'author')
+        self.assertEqual(suggestion['mutuals'], 1)
+        self.assertEqual(suggestion['bio'], "author's bio")
+        self.assertTrue(suggestion['url'].endswith(reverse('user-detail', kwargs={'username': 'author'})))
+
+    def test_suggested_users_unauthenticated(self):
+        response = self.client.get(reverse('user-suggested'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
    
    
 class PostsListViewTest(APITestCase):
@@ -346,6 +380,82 @@ class PostsListViewTest(APITestCase):
         for post in response.data['results']:
             self.assertTrue((post['status'] == "PB") or (post['status'] == "DF" and post['author'].endswith(reverse('user-detail', kwargs={"username": "user1"}))))
         
+    def test_list_posts_query_count_is_constant(self):
+        """
+        Test that authors and tags are loaded in bulk for the whole page.
+        """
+        for item in range(5):
+            post = Posts.objects.create(author=self.user2, title=f"Post {item}", status="PB")
+            post.tags.add(f"tag{item}")
+        
+        # validator, page, tags
+        with self.assertNumQueries(3):
+            response = self.client.get(self.list_url)
+        self.assertEqual(len(response.data['results']), 7)
+    
+    def test_list_posts_cursor(self):
+        """
+        Test that the pages follow each other through the `next` link, drafts last.
+        """
+        for item in range(3):
+            Posts.objects.create(author=self.user2, title=f"Post {item}", status="PB")
+        self.client.login(username='user1', password='password123')
+        
+        titles = []
+        url = self.list_url
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            while url:
+                # session, user, validator of each branch, page, tags
+                with self.assertNumQueries(6):
+                    response = self.client.get(url)
+                self.assertNotIn('count', response.data)
+                titles += [post['title'] for post in response.data['results']]
+                url = response.data['next']
+        self.assertEqual(titles, [
+            "Post 2", "Post 1", "Post 0", "Other Published Post", "Published Post", "Draft Post",
+        ])
+        
+        response = self.client.get(self.list_url, {'after': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        for values in CRAFTED:
+            with self.subTest(values=values):
+                response = self.client.get(self.list_url, {'after': craft(values)})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_list_posts_excerpt(self):
+        """
+        Test that lists carry an excerpt of the content and the detail the whole of it.
+        """
+        Posts.objects.filter(pk=self.published_post.pk).update(content="word " * 100)
+        [post] = [post for post in self.client.get(self.list_url).data['results'] if post['title'] == "Published Post"]
+        self.assertNotIn('content', post)
+        self.assertEqual(len(post['excerpt']), 100)
+        self.assertTrue(post['excerpt'].endswith("…"))
+        
+        response = self.client.get(reverse('posts-detail', kwargs={'link': self.published_post.link}))
+        self.assertEqual(response.data['content'], "word " * 100)
+    
+    def test_list_posts_conditional_get(self):
+        """
+        Test that an unchanged page is answered with 304 from a single query.
+        """
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        PostReactions.objects.create(user=self.user2, post=self.published_post)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        
+        etag = response['ETag']
+        Posts.objects.filter(pk=self.published_post.pk).update(views_count=VIEWS_BUCKET)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_create_post_authenticated(self):
         """
         Test that authenticated users can create new posts.
@@ -383,6 +493,154 @@ class PostsListViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)     
 
 
+class PostsDetailViewTest(APITestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', password='password123')
+        self.post = Posts.objects.create(author=self.user, title="Published Post", status="PB")
+        self.url = reverse('posts-detail', kwargs={"link": self.post.link})
+    
+    def test_conditional_get(self):
+        """
+        Test that an unchanged post is answered with 304 from a single query.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_changed_post_is_sent_again(self):
+        """
+        Test that edits and counter changes invalidate the ETag.
+        """
+        etag = self.client.get(self.url)['ETag']
+        SavedPost.objects.create(user=self.user, post=self.post)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        etag = response['ETag']
+        self.post.title = "Edited"
+        self.post.save(update=True)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], "Edited")
+    
+    def test_views_change_the_etag_by_bucket(self):
+        """
+        Test that a few views keep the ETag and a bucket of them invalidates it.
+        """
+        etag = self.client.get(self.url)['ETag']
+        Posts.objects.filter(pk=self.post.pk).update(views_count=VIEWS_BUCKET - 1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        Posts.objects.filter(pk=self.post.pk).update(views_count=VIEWS_BUCKET)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['views_count'], VIEWS_BUCKET)
+    
+    def test_related_posts(self):
+        """
+        Test that the related posts are listed and that a change to them invalidates the ETag.
+        """
+        self.post.tags.add("django")
+        related.refresh(self.post)
+        etag = self.client.get(self.url)['ETag']
+        
+        other = Posts.objects.create(author=self.user, title="Other Post", status="PB")
+        other.tags.add("django")
+        related.refresh(other)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['related'], [{
+            'title': "Other Post",
+            'url': 'http://testserver' + reverse('posts-detail', kwargs={"link": other.link}),
+        }])
+    
+    def test_missing_post(self):
+        response = self.client.get(reverse('posts-detail', kwargs={"link": "missing"}), HTTP_IF_NONE_MATCH='"abc"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class IncludeTest(APITestCase):
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.posts = [self.create_post(item) for item in range(2)]
+        PostReactions.objects.create(user=self.reader, post=self.posts[0])
+        SavedPost.objects.create(user=self.reader, post=self.posts[0])
+        self.client.login(username='reader', password='password123')
+        
+    def create_post(self, item):
+        post = Posts.objects.create(author=self.author, title=f"Post {item}", content="content", status="PB")
+        post.tags.add(f"tag{item}")
+        Comments.objects.create(user=self.reader, post=post, content=f"Comment on {item}")
+        return post
+    
+    def test_include_in_constant_queries(self):
+        """
+        Test that the included resources are loaded with a query each for the whole page.
+        """
+        url = reverse('posts-list') + '?include=author,tags,comments,viewer_state'
+        # session, user, page, tags, comments, reactions and saves of the viewer
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+        
+        for item in range(2, 6):
+            self.create_post(item)
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 6)
+        
+        post = response.data['results'][-1]
+        self.assertEqual(post['author']['username'], 'author')
+        self.assertEqual(post['tags'], [{'name': 'tag0', 'slug': 'tag0'}])
+        self.assertEqual([comment['content'] for comment in post['comments']], ["Comment on 0"])
+        self.assertEqual(post['viewer_state'], {'reaction': 'LK', 'saved': True})
+        self.assertEqual(response.data['results'][0]['viewer_state'], {'reaction': None, 'saved': False})
+    
+    def test_sparse_fields(self):
+        response = self.client.get(reverse('posts-list'), {'fields': 'url,title', 'include': 'author'})
+        post = response.data['results'][0]
+        self.assertEqual(set(post), {'url', 'title', 'author'})
+        self.assertEqual(post['author']['username'], 'author')
+        self.assertNotIn('ETag', response)
+        
+        response = self.client.get(reverse('posts-detail', kwargs={'link': self.posts[0].link}), {'fields': 'title'})
+        self.assertEqual(response.data, {'title': "Post 0"})
+    
+    def test_fields_do_not_restrict_writes(self):
+        data = {'title': "New", 'content': "New content", 'status': 'PB'}
+        response = self.client.post(reverse('posts-list') + '?fields=url', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Posts.objects.get(title="New").content, "New content")
+    
+    def test_unknown_include(self):
+        response = self.client.get(reverse('posts-list'), {'include': 'author,secrets'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_include_on_other_resources(self):
+        response = self.client.get(reverse('comments-list'), {'include': 'author,post,viewer_state'})
+        comment = response.data['results'][0]
+        self.assertEqual(comment['author']['username'], 'reader')
+        self.assertEqual(comment['post']['title'], "Post 0")
+        self.assertEqual(comment['viewer_state'], {'reaction': None})
+        
+        response = self.client.get(reverse('postreactions-list'), {'include': 'post'})
+        self.assertEqual(response.data['results'][0]['post']['tags'], ['tag0'])
+        
+        response = self.client.get(reverse('savedpost-list'), {'include': 'post', 'fields': 'post'})
+        self.assertEqual(response.data['results'], [{'post': response.data['results'][0]['post']}])
+        self.assertEqual(response.data['results'][0]['post']['title'], "Post 0")
+        
+        
 class PostReactionsListViewTest(APITestCase):
 
     def setUp(self):
@@ -674,4 +932,52 @@ class SavedPostListViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-        
\ No newline at end of file
+        
+
+class SearchViewTest(APITestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', password='password123')
+        for item in range(3):
+            Posts.objects.create(author=self.user, title=f"Django {item}", content="django orm", status="PB")
+        Posts.objects.create(author=self.user, title="Draft", content="django", status="DF")
+        self.url = reverse('search')
+    
+    def test_search_results(self):
+        response = self.client.get(self.url, {'q': 'django', 'author': 'user1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['next'])
+        self.assertIn('<mark>django</mark>', response.data['results'][0]['snippet'])
+        self.assertGreater(response.data['results'][0]['score'], 0)
+    
+    def test_invalid_page(self):
+        response = self.client.get(self.url, {'q': 'django', 'page': 0})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FeedViewTest(APITestCase):
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        Profile.objects.create(user=self.author)
+        Profile.objects.create(user=self.reader).follow(self.author.profile)
+        with self.captureOnCommitCallbacks(execute=True):
+            for item in range(3):
+                Posts.objects.create(author=self.author, title=f"Post {item}", status="PB")
+        self.url = reverse('feed')
+    
+    def test_feed_requires_authentication(self):
+        response = self.client.get(self.url)
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+    
+    def test_feed_is_paginated_with_a_cursor(self):
+        self.client.force_authenticate(user=self.reader)
+        with self.settings(BLOG_PAGE_SIZE=2):
+            response = self.client.get(self.url)
+            self.assertEqual([post['title'] for post in response.data['results']], ["Post 2", "Post 1"])
+            
+            response = self.client.get(response.data['next'])
+        self.assertEqual([post['title'] for post in response.data['results']], ["Post 0"])
+        self.assertIsNone(response.data['next'])
@@ -9,6 +9,9 @@ urlpatterns = [
     path("",views.root, name="root"),
     path("", include("api.authentication.urls")),
     path("", include("api.blog.urls")),
+    path("", include("api.search.urls")),
+    path("", include("api.analytics.urls")),
+    path("", include("api.batch.urls")),
     path('auth/', include('rest_framework.urls', namespace='rest_framework')),    
     path("login/", auth_views.LoginAPI.as_view(), name='login'),
     path('logout/', knox_views.LogoutView.as_view(), name='logout'),
@@ -12,11 +12,17 @@ def root(request):
         "logout": reverse("logout", request=request),
         "logoutall": reverse("logoutall", request=request),
         "user": reverse('user-list', request=request),
+        "suggested-user": reverse("user-suggested", request=request),
         "profile": reverse("profile-list", request=request),
         "group": reverse('group-list', request=request),
         "post": reverse("posts-list", request=request),
+        "feed": reverse("feed", request=request),
+        "for-you": reverse("for-you", request=request),
         "comment": reverse("comments-list", request=request),
         "post-reaction": reverse("postreactions-list", request=request),
         "comment-reaction": reverse("commentreactions-list", request=request),
         "saved-post": reverse("savedpost-list", request=request),
+        "search": reverse("search", request=request),
+        "analytics": reverse("analytics", request=request),
+        "batch": reverse("batch", request=request),
     })
\ No newline at end of file
@@ -0,0 +1,76 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def merge_follows(apps, schema_editor):
+    """Turn the rows of both mirrored M2M tables into one edge each"""
+    Profile = apps.get_model('authentication', 'Profile')
+    Follow = apps.get_model('authentication', 'Follow')
+
+    edges = set()
+    for follower_id, followee_id in Profile.follows.through.objects.values_list('profile__user_id', 'user_id'):
+        edges.add((follower_id, followee_id))
+    for followee_id, follower_id in Profile.followers.through.objects.values_list('profile__user_id', 'user_id'):
+        edges.add((follower_id, followee_id))
+    Follow.objects.bulk_create(
+        [Follow(follower_id=follower, followee_id=followee) for follower, followee in edges if follower != followee],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    def count_of(field):
+        counts = (
+            Follow.objects.filter(**{field: OuterRef('user_id')})
+            .order_by().values(field).annotate(total=Count('pk')).values('total')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    Profile.objects.update(following_count=count_of('follower'), followers_count=count_of('followee'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_alter_profile_follows'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('followee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL)),
+                ('follower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['follower', '-created', '-id'], name='authenticat_followe_a34a66_idx'), models.Index(fields=['followee', '-created', '-id'], name='authenticat_followe_d18561_idx')],
+                'constraints': [models.UniqueConstraint(fields=('follower', 'followee'), name='unique_follow')],
+            },
+        ),
+        migrations.RunPython(merge_follows, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='profile',
+            name='followers',
+        ),
+        migrations.RemoveField(
+            model_name='profile',
+            name='follows',
+        ),
+    ]
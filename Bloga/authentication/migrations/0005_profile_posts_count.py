@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:48
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_posts(apps, schema_editor):
+    """Count the published posts of every author, creating the missing profiles"""
+    Profile = apps.get_model('authentication', 'Profile')
+    Posts = apps.get_model('blog', 'Posts')
+
+    authors = Posts.objects.filter(status='PB').values_list('author_id', flat=True).distinct()
+    Profile.objects.bulk_create([Profile(user_id=pk) for pk in authors], batch_size=1000, ignore_conflicts=True)
+
+    counts = (
+        Posts.objects.filter(author=OuterRef('user_id'), status='PB')
+        .order_by().values('author').annotate(total=Count('pk')).values('total')
+    )
+    Profile.objects.update(posts_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_follow'),
+        ('blog', '0017_reaction_dates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
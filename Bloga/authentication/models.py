@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 import uuid, os
 
@@ -8,6 +10,114 @@ def secure_filestore(instance, filename):
     new_name = f"{uuid.uuid4()}.{ext}"
     return os.path.join("uploads/dp/", new_name)
 
+# kept up to date with F() updates, never written back from an instance
+PROFILE_COUNTER_FIELDS = ('following_count', 'followers_count', 'posts_count')
+
+
+class FollowQuerySet(models.QuerySet):
+    def _lock(self, follower):
+        # every change to the edges of a follower locks their profile first, so the
+        # edges read below can not change before the counters are adjusted. The
+        # profile is created first, there would be no row to lock otherwise
+        Profile.objects.bulk_create([Profile(user=follower)], ignore_conflicts=True)
+        list(Profile.objects.select_for_update().filter(user=follower).values_list('pk'))
+
+    def _adjust_counts(self, follower, followees, delta):
+        if followees:
+            Profile.objects.filter(user=follower).update(
+                following_count=Greatest(F('following_count') + delta * len(followees), 0)
+            )
+            Profile.objects.filter(user__in=followees).update(
+                followers_count=Greatest(F('followers_count') + delta, 0)
+            )
+
+    def _add(self, follower, ids):
+        if ids:
+            # the counts live on the profiles, so every followed user gets one
+            Profile.objects.bulk_create([Profile(user_id=pk) for pk in ids], ignore_conflicts=True)
+        self.bulk_create([Follow(follower=follower, followee_id=pk) for pk in ids], ignore_conflicts=True)
+        self._adjust_counts(follower, ids, 1)
+
+    def _remove(self, follower, ids):
+        if ids:
+            self.filter(follower=follower, followee__in=ids).delete()
+            self._adjust_counts(follower, ids, -1)
+
+    def follow(self, follower, followees):
+        """
+        Make `follower` follow every user in `followees`, ids or users, with one
+        INSERT for the new edges. Returns the ids of the newly followed users.
+        """
+        ids = {getattr(user, 'pk', user) for user in followees} - {follower.pk}
+        if not ids:
+            return set()
+        with transaction.atomic():
+            self._lock(follower)
+            new = ids - set(self.filter(follower=follower, followee__in=ids).values_list('followee_id', flat=True))
+            self._add(follower, new)
+        return new
+
+    def unfollow(self, follower, followees):
+        """Make `follower` stop following `followees` with one DELETE, returns the ids of the unfollowed users"""
+        ids = {getattr(user, 'pk', user) for user in followees}
+        if not ids:
+            return set()
+        with transaction.atomic():
+            self._lock(follower)
+            removed = set(self.filter(follower=follower, followee__in=ids).values_list('followee_id', flat=True))
+            self._remove(follower, removed)
+        return removed
+
+    def detach(self, user):
+        """
+        Take the edges of `user`, about to be deleted with them, out of the counts
+        of the users on their other side, with one UPDATE per side.
+        """
+        Profile.objects.filter(user__in=self.filter(follower=user).values('followee_id')).update(
+            followers_count=Greatest(F('followers_count') - 1, 0)
+        )
+        Profile.objects.filter(user__in=self.filter(followee=user).values('follower_id')).update(
+            following_count=Greatest(F('following_count') - 1, 0)
+        )
+
+    def set_following(self, follower, followees):
+        """
+        Make `followees` exactly the users `follower` follows, applying the
+        difference with a constant number of queries. Returns the ids of the
+        (followed, unfollowed) users.
+        """
+        ids = {getattr(user, 'pk', user) for user in followees} - {follower.pk}
+        with transaction.atomic():
+            self._lock(follower)
+            current = set(self.filter(follower=follower).values_list('followee_id', flat=True))
+            added, removed = ids - current, current - ids
+            self._add(follower, added)
+            self._remove(follower, removed)
+        return added, removed
+
+
+class Follow(models.Model):
+    """
+    `follower` follows `followee`.
+
+    One row per edge, read from the follower's side to list who they follow and
+    from the followee's side to list their followers, newest first.
+    """
+    follower = models.ForeignKey(User, related_name='following_edges', on_delete=models.CASCADE)
+    followee = models.ForeignKey(User, related_name='follower_edges', on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+    
+    objects = FollowQuerySet.as_manager()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'followee'], name='unique_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['follower', '-created', '-id']),
+            models.Index(fields=['followee', '-created', '-id']),
+        ]
+
 
 class Profile(models.Model):
     """A model to store the profile information of users
@@ -15,30 +125,42 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True) 
     dp = models.ImageField(upload_to=secure_filestore, blank=True, null=True)
-    follows = models.ManyToManyField(User, related_name='following', blank=True)
-    followers = models.ManyToManyField(User, related_name='followers', blank=True)
+    # denormalized counts of the `Follow` edges of the user, maintained by `FollowQuerySet`
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    # published posts of the user, maintained by `Posts.save` and `Posts.delete`
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    @classmethod
+    def adjust_counters(cls, user_id, posts=0):
+        """Apply counter deltas to the profile of a user, created if missing, with a single UPDATE"""
+        if posts:
+            cls.objects.bulk_create([cls(user_id=user_id)], ignore_conflicts=True)
+            cls.objects.filter(user_id=user_id).update(posts_count=Greatest(F('posts_count') + posts, 0))
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # an edited profile must not write back counts followed since it was loaded
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in PROFILE_COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
+    @property
+    def follows(self):
+        """The users this user follows"""
+        return User.objects.filter(follower_edges__follower=self.user_id)
+    
+    @property
+    def followers(self):
+        """The users following this user"""
+        return User.objects.filter(following_edges__followee=self.user_id)
     
     def follow(self, profile):
-        """Follow another user profile."""
-        if profile.user != self.user:
-            self.follows.add(profile.user)
-            profile.followers.add(self.user)
-            self.save()
-            profile.save()
+        """Follow another user profile, returns the ids of the newly followed users"""
+        return Follow.objects.follow(self.user, [profile.user_id])
 
     def unfollow(self, profile):
-        """Unfollow another user profile."""
-        if profile.user != self.user:
-            self.follows.remove(profile.user)
-            profile.followers.remove(self.user)
-            self.save()
-            profile.save()
-    
-
-        
-            
-            
-        
-            
-            
-        
+        """Unfollow another user profile, returns the ids of the unfollowed users"""
+        return Follow.objects.unfollow(self.user, [profile.user_id])
@@ -1,6 +1,8 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
-from ..models import Profile
+from ..models import Follow, Profile
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 class ProfileModelTest(TestCase):
@@ -87,4 +89,94 @@ class ProfileModelTest(TestCase):
         
         self.assertNotIn(user2.user, user1.follows.all())
         self.assertNotIn(user1.user, user2.followers.all())
-        
\ No newline at end of file
+        
+
+class FollowTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f"user{item}", password='iamgroot') for item in range(5)]
+        for user in cls.users:
+            Profile.objects.create(user=user)
+    
+    def counts(self, user):
+        profile = Profile.objects.get(user=user)
+        return profile.following_count, profile.followers_count
+    
+    def test_follow_is_one_edge_with_counts(self):
+        follower, followee = self.users[:2]
+        follower.profile.follow(followee.profile)
+        follower.profile.follow(followee.profile)
+        
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.counts(follower), (1, 0))
+        self.assertEqual(self.counts(followee), (0, 1))
+        
+        follower.profile.unfollow(followee.profile)
+        follower.profile.unfollow(followee.profile)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.counts(follower), (0, 0))
+        self.assertEqual(self.counts(followee), (0, 0))
+    
+    def test_bulk_follow_and_unfollow(self):
+        follower, *others = self.users
+        self.assertEqual(Follow.objects.follow(follower, others + [follower]), {user.pk for user in others})
+        self.assertEqual(self.counts(follower), (4, 0))
+        self.assertEqual([self.counts(user) for user in others], [(0, 1)] * 4)
+        
+        self.assertEqual(Follow.objects.unfollow(follower, others[:2]), {user.pk for user in others[:2]})
+        self.assertEqual(self.counts(follower), (2, 0))
+        self.assertEqual(self.counts(others[0]), (0, 0))
+        self.assertEqual(self.counts(others[2]), (0, 1))
+    
+    def test_set_following_applies_the_difference(self):
+        follower, *others = self.users
+        Follow.objects.follow(follower, others[:2])
+        
+        added, removed = Follow.objects.set_following(follower, others[1:])
+        self.assertEqual(added, {user.pk for user in others[2:]})
+        self.assertEqual(removed, {others[0].pk})
+        self.assertEqual(set(follower.profile.follows), set(others[1:]))
+        self.assertEqual(self.counts(follower), (3, 0))
+    
+    def test_set_following_queries_do_not_grow(self):
+        follower, *others = self.users
+        many = [User.objects.create_user(username=f"many{item}") for item in range(20)]
+        Follow.objects.follow(follower, others[:2])
+        
+        # profile, lock, current edges, profiles, insert, 2 count updates, delete, 2 count updates (+ savepoints)
+        with self.assertNumQueries(12):
+            Follow.objects.set_following(follower, others[1:] + many)
+    
+    def test_following_a_user_without_profile_counts(self):
+        follower = self.users[0]
+        newcomer = User.objects.create_user(username="newcomer", password='iamgroot')
+        Follow.objects.follow(follower, [newcomer])
+        self.assertEqual(self.counts(newcomer), (0, 1))
+        self.assertEqual(self.counts(follower), (1, 0))
+    
+    def test_a_follower_without_profile_gets_one_before_the_lock(self):
+        newcomer = User.objects.create_user(username="newcomer", password='iamgroot')
+        with CaptureQueriesContext(connection) as queries:
+            Follow.objects.follow(newcomer, self.users[:2])
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertTrue(statements[0].startswith('INSERT OR IGNORE INTO "authentication_profile"'))
+        self.assertTrue(statements[1].startswith('SELECT "authentication_profile"'))
+        self.assertEqual(self.counts(newcomer), (2, 0))
+    
+    def test_deleting_a_user_takes_their_edges_out_of_the_counts(self):
+        leaving, *others = self.users
+        Follow.objects.follow(leaving, others[:2])
+        Follow.objects.follow(others[2], [leaving])
+        
+        leaving.delete()
+        self.assertEqual([self.counts(user) for user in others], [(0, 0), (0, 0), (0, 0), (0, 0)])
+    
+    def test_editing_a_stale_profile_keeps_its_counts(self):
+        follower, followee = self.users[:2]
+        profile = Profile.objects.get(user=followee)
+        Follow.objects.follow(follower, [followee])
+        
+        profile.bio = "edited"
+        profile.save()
+        self.assertEqual(self.counts(followee), (0, 1))
+        self.assertEqual(Profile.objects.get(user=followee).bio, "edited")
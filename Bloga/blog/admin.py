@@ -7,7 +7,7 @@ import random
 class PostsModel(admin.ModelAdmin):
     list_display = ['title', 'link', 'author', 'publish', 'status']
     list_filter = ['status', 'created', 'publish', 'author']
-    search_fields = ['title', 'body']
+    search_fields = ['title', 'content']
     prepopulated_fields = {'link': ('title', )}
     raw_id_fields = ['author']
     date_hierarchy = 'publish'
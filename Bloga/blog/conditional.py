@@ -0,0 +1,139 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max, Sum
+
+from .models import Posts
+from . import fragments
+
+COUNTERS = ("likes_count", "comments_count", "saves_count")
+# views change the validators once per this many, a cached copy shows a view
+# count at most this far behind without every view invalidating it
+VIEWS_BUCKET = 100
+
+
+def make_etag(*parts):
+    return hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _post_row(link):
+    return Posts.objects.filter(link=link).order_by().values(
+        "id", "author_id", "status", "updated", "views_count", *COUNTERS,
+    ).first()
+
+
+def _cached(request, name, compute):
+    """Compute the validators once per request, `condition` asks for the ETag and Last-Modified separately"""
+    validators = getattr(request, "_validators", None)
+    if validators is None:
+        validators = request._validators = {}
+    if name not in validators:
+        validators[name] = compute()
+    return validators[name]
+
+
+def post_page_validators(request, link):
+    """
+    The (ETag, Last-Modified) of the post detail page, or None when the page
+    has to be rendered anyway.
+
+    The ETag covers the post, its counters and a bucket of its views, the viewer and their CSRF cookie,
+    and the surrogate keys of the post and its author, which are purged by every
+    write to the comments and reactions shown on the page.
+    """
+    def compute():
+        user = request.user
+        if len(get_messages(request)):
+            return None
+        row = _post_row(link)
+        if row is None or (row["status"] != "PB" and row["author_id"] != user.pk):
+            return None
+
+        keys = fragments.versions("surrogate", [f"post:{row['id']}", f"user:{row['author_id']}"])
+        etag = make_etag(
+            row["id"], row["updated"].timestamp(), *(row[name] for name in COUNTERS),
+            row["views_count"] // VIEWS_BUCKET, user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+            *(keys[key] for key in sorted(keys)),
+        )
+        return etag, row["updated"]
+
+    return _cached(request, f"post_page:{link}", compute)
+
+
+def post_page_etag(request, link):
+    validators = post_page_validators(request, link)
+    return validators and validators[0]
+
+
+def post_page_last_modified(request, link):
+    validators = post_page_validators(request, link)
+    return validators and validators[1]
+
+
+def post_resource_validators(request, link):
+    """
+    The (ETag, Last-Modified) of the serialised post, or None when it does not
+    exist or embeds related resources the validators do not cover.
+    The surrogate key of the post is purged when its related posts change.
+    """
+    def compute():
+        if request.GET.get("include"):
+            return None
+        row = _post_row(link)
+        if row is None:
+            return None
+        key = f"post:{row['id']}"
+        etag = make_etag(
+            row["id"], row["updated"].timestamp(), *(row[name] for name in COUNTERS),
+            row["views_count"] // VIEWS_BUCKET, request.user.pk,
+            fragments.versions("surrogate", [key])[key],
+        )
+        return etag, row["updated"]
+
+    return _cached(request, f"post_resource:{link}", compute)
+
+
+def post_resource_etag(request, link):
+    validators = post_resource_validators(request, link)
+    return validators and validators[0]
+
+
+def post_resource_last_modified(request, link):
+    validators = post_resource_validators(request, link)
+    return validators and validators[1]
+
+
+def collection_validators(queryset, offset, limit):
+    """
+    The (ETag, Last-Modified) of the `queryset[offset:offset + limit]` page, from a
+    single aggregate over the page: its newest `updated`, its row count, the
+    sums of its ids and counters and a bucket of its views. Returns None for an
+    empty page.
+    """
+    row = queryset[offset:offset + limit].aggregate(
+        last_modified=Max("updated"),
+        rows=Count("id"),
+        ids=Sum("id"),
+        views=Sum("views_count"),
+        **{name: Sum(name) for name in COUNTERS},
+    )
+    if not row["rows"]:
+        return None
+    etag = make_etag(
+        offset, row["last_modified"].timestamp(), row["rows"], row["ids"], *(row[name] for name in COUNTERS),
+        row["views"] // VIEWS_BUCKET,
+    )
+    return etag, row["last_modified"]
+
+
+def union_validators(querysets, limit):
+    """
+    The (ETag, Last-Modified) of the first `limit` rows of the UNION of the
+    ordered `querysets`, from one `collection_validators` aggregate per queryset:
+    the page is made of their first `limit` rows, whichever of them it takes.
+    """
+    validators = [row for row in (collection_validators(queryset, 0, limit) for queryset in querysets) if row]
+    if not validators:
+        return None
+    return make_etag(*(etag for etag, last_modified in validators)), max(last_modified for etag, last_modified in validators)
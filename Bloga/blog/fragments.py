@@ -0,0 +1,109 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import prefetch_related_objects
+
+from .rendering import renderer_version
+
+# bump whenever the markup of a cached fragment changes
+SCHEMA_VERSION = 2
+
+
+def _version_key(kind, pk):
+    return f"fragment:{kind}:{pk}"
+
+
+def versions(kind, pks):
+    """
+    The current fragment version of every object, fetched with one cache round trip.
+
+    Versions are random tokens, so an evicted version is replaced by a new one and
+    can never bring an old fragment back.
+    """
+    keys = {_version_key(kind, pk): pk for pk in set(pks)}
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex[:12] for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump(kind, *pks):
+    """Invalidate every fragment built from the given objects"""
+    cache.delete_many([_version_key(kind, pk) for pk in pks])
+
+
+def _prefix():
+    # fragments hold HTML rendered with the current MARKDOWNIFY settings too
+    return f"{SCHEMA_VERSION}.{renderer_version()}"
+
+
+def _page_key(keys):
+    return hashlib.md5("|".join(keys).encode()).hexdigest()
+
+
+def prepare_cards(posts):
+    """
+    Set the `fragment_key` of every post card and return the key of the page fragment.
+
+    A card depends on the post and on its author's profile, and the page fragment
+    on the newest post and on every card it contains. The tags are only prefetched
+    for the cards missing from the cache.
+    """
+    posts = list(posts)
+    if not posts:
+        return None
+    post_versions = versions("post", [post.pk for post in posts])
+    author_versions = versions("profile", [post.author_id for post in posts])
+
+    for post in posts:
+        post.fragment_key = (
+            f"{_prefix()}.{post.pk}.{post.updated.timestamp()}"
+            f".{post_versions[post.pk]}.{author_versions[post.author_id]}"
+        )
+    newest = max(post.updated for post in posts)
+    page_key = f"{newest.timestamp()}.{_page_key(post.fragment_key for post in posts)}"
+
+    page = make_template_fragment_key("post_list", [page_key])
+    cards = {make_template_fragment_key("post_card", [post.fragment_key]): post for post in posts}
+    cached = cache.get_many([page, *cards])
+    if page not in cached:
+        missing = [post for key, post in cards.items() if key not in cached]
+        prefetch_related_objects(missing, "tags")
+    return page_key
+
+
+def prepare_post(post, comments):
+    """
+    Set the `fragment_key` of a post page's body and of every comment on it.
+
+    The body depends on the post and its author's profile, a comment on the
+    comment and its author's. The versions of each kind are fetched with one
+    round trip for the whole page.
+    """
+    comments = list(comments)
+    post_versions = versions("post", [post.pk])
+    comment_versions = versions("comment", [comment.pk for comment in comments])
+    user_versions = versions("profile", [post.author_id, *(comment.user_id for comment in comments)])
+
+    post.fragment_key = (
+        f"{_prefix()}.{post.pk}.{post.updated.timestamp()}"
+        f".{post_versions[post.pk]}.{user_versions[post.author_id]}"
+    )
+    for comment in comments:
+        comment.fragment_key = (
+            f"{_prefix()}.{comment.pk}.{comment_versions[comment.pk]}"
+            f".{user_versions[comment.user_id]}"
+        )
+
+
+def feed_context(posts):
+    """The template context the cached post list of `blog/home.html` needs"""
+    return {
+        "page_fragment": prepare_cards(posts),
+        "fragment_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
+    }
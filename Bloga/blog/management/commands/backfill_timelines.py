@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from blog.timeline import backfill
+
+
+class Command(BaseCommand):
+    help = "Fill the following timelines with the latest posts of the followed authors"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only backfill the timeline of this username")
+        parser.add_argument(
+            '--limit', type=int, default=settings.TIMELINE_LENGTH,
+            help="Number of posts copied into each timeline",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(following_edges__isnull=False).distinct().order_by('id')
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        count = 0
+        for user in users.iterator():
+            backfill(user, limit=options['limit'])
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {count} timelines"))
@@ -0,0 +1,52 @@
+import random
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.recommendations import neighbors
+
+
+class Command(BaseCommand):
+    help = "Time the post neighbours build and measure its memory on synthetic likes and bookmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interactions', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--posts', type=int, default=20_000)
+        parser.add_argument('--neighbors', type=int, default=settings.POST_NEIGHBORS)
+        parser.add_argument('--history', type=int, default=settings.POST_NEIGHBORS_HISTORY)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def interactions(self, options):
+        """Readers and posts drawn from long tailed distributions, like real engagement"""
+        generator = random.Random(options['seed'])
+        users, posts = options['users'], options['posts']
+        return [
+            (
+                int(users * generator.random() ** 2),
+                int(posts * generator.random() ** 3),
+                1 if generator.random() < 0.8 else 3,
+            )
+            for _ in range(options['interactions'])
+        ]
+
+    def handle(self, *args, **options):
+        interactions = self.interactions(options)
+
+        start = time.perf_counter()
+        result = neighbors(interactions, size=options['neighbors'], history=options['history'])
+        elapsed = time.perf_counter() - start
+
+        # traced separately, tracing slows the build down several times
+        tracemalloc.start()
+        neighbors(interactions, size=options['neighbors'], history=options['history'])
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(f"interactions: {len(interactions)}")
+        self.stdout.write(f"posts with neighbours: {len(result)}")
+        self.stdout.write(f"neighbours: {sum(len(top) for top in result.values())}")
+        self.stdout.write(f"build time: {elapsed:.2f}s")
+        self.stdout.write(f"peak memory: {peak / 2 ** 20:.1f} MiB")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Posts
+from blog.related import refresh
+
+
+class Command(BaseCommand):
+    help = "Recompute the related posts of every published post"
+
+    def handle(self, *args, **options):
+        posts = Posts.published.order_by('id').only('id', 'status')
+        count = 0
+        for post in posts.iterator():
+            refresh(post)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed the related posts of {count} posts"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog.recommendations import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the neighbours of every post from the likes and bookmarks of its readers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="neighbours inserted per query")
+
+    def handle(self, *args, **options):
+        posts, rows = rebuild(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {rows} neighbours of {posts} posts"))
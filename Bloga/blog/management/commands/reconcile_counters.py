@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from authentication.models import Profile
+from blog.models import Posts, Comments, PostReactions, CommentReactions, SavedPost
+
+
+def count_of(model, field):
+    """A correlated COUNT(*) of `model` rows pointing at the outer row through `field`"""
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def reconcile(model, counters, batch_size):
+    """Recompute `counters` for every row of `model`, one UPDATE per id range"""
+    last_id = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    updated = 0
+    for start in range(0, last_id, batch_size):
+        with transaction.atomic():
+            updated += model.objects.filter(
+                pk__gt=start, pk__lte=start + batch_size
+            ).update(**counters)
+    return updated
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized like, comment, save and post counters from the source tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Number of ids covered by each UPDATE statement",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        posts = reconcile(Posts, {
+            'likes_count': count_of(PostReactions, 'post'),
+            'comments_count': count_of(Comments, 'post'),
+            'saves_count': count_of(SavedPost, 'post'),
+        }, batch_size)
+        comments = reconcile(Comments, {
+            'likes_count': count_of(CommentReactions, 'comment'),
+        }, batch_size)
+        published = (
+            Posts.published.filter(author=OuterRef('user_id'))
+            .order_by().values('author').annotate(total=Count('pk')).values('total')
+        )
+        profiles = reconcile(Profile, {
+            'posts_count': Coalesce(Subquery(published, output_field=IntegerField()), Value(0)),
+        }, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled counters for {posts} posts, {comments} comments and {profiles} profiles"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.trending import refresh
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached trending lists from the highest scored posts"
+
+    def handle(self, *args, **options):
+        lists = refresh()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {lists} trending lists"))
@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Posts
+from blog.rendering import render_post, renderer_version
+
+
+def render_rows(rows):
+    """Render a slice of (pk, updated, content) rows, runs in the worker processes"""
+    return [(pk, updated, render_post(content)) for pk, updated, content in rows]
+
+
+def store(rendered):
+    """
+    Write rendered HTML back, skipping posts that were edited while rendering
+    since their own save already stored fresh HTML
+    """
+    with transaction.atomic():
+        current = dict(
+            Posts.objects.select_for_update()
+            .filter(pk__in=[pk for pk, _, _ in rendered])
+            .values_list('pk', 'updated')
+        )
+        posts = []
+        for pk, updated, fields in rendered:
+            if current.get(pk) == updated:
+                posts.append(Posts(pk=pk, **fields))
+        Posts.objects.bulk_update(posts, ['content_html', 'excerpt_html', 'render_version'])
+    return len(posts)
+
+
+class Command(BaseCommand):
+    help = "Render the stored HTML of posts whose renderer version is stale"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help="Number of posts read, rendered and written per chunk",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Number of processes rendering in parallel, 1 renders in process",
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Render every post, not only the stale ones",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        workers = options['workers']
+
+        queryset = Posts.objects.all()
+        if not options['all']:
+            queryset = queryset.exclude(render_version=renderer_version())
+        queryset = queryset.order_by('pk').values_list('pk', 'updated', 'content')
+
+        pool = ProcessPoolExecutor(workers, initializer=django.setup) if workers > 1 else None
+        rendered = last_pk = 0
+        try:
+            while True:
+                rows = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+
+                if pool is None:
+                    results = render_rows(rows)
+                else:
+                    slices = [rows[index::workers] for index in range(workers)]
+                    results = [row for part in pool.map(render_rows, slices) for row in part]
+                rendered += store(results)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} posts"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog.suggestions import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the authors suggested to every active user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="users whose suggestions are replaced per transaction")
+
+    def handle(self, *args, **options):
+        count = rebuild(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"Suggested authors to {count} users"))
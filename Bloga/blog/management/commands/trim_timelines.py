@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from blog.models import TimelineEntry
+from blog.timeline import trim
+
+
+class Command(BaseCommand):
+    help = "Delete the oldest timeline entries so that every timeline stays bounded"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep', type=int, default=settings.TIMELINE_LENGTH,
+            help="Number of entries kept in each timeline",
+        )
+
+    def handle(self, *args, **options):
+        keep = options['keep']
+        users = (
+            TimelineEntry.objects.values('user_id').annotate(entries=Count('id'))
+            .filter(entries__gt=keep).values_list('user_id', flat=True)
+        )
+
+        deleted = 0
+        for user_id in list(users):
+            deleted += trim(user_id, keep=keep)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} timeline entries"))
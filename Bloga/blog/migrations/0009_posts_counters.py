@@ -0,0 +1,59 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:17
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def populate_counters(apps, schema_editor):
+    Posts = apps.get_model('blog', 'Posts')
+    Comments = apps.get_model('blog', 'Comments')
+    PostReactions = apps.get_model('blog', 'PostReactions')
+    CommentReactions = apps.get_model('blog', 'CommentReactions')
+    SavedPost = apps.get_model('blog', 'SavedPost')
+
+    Posts.objects.update(
+        likes_count=count_of(PostReactions, 'post'),
+        comments_count=count_of(Comments, 'post'),
+        saves_count=count_of(SavedPost, 'post'),
+    )
+    Comments.objects.update(likes_count=count_of(CommentReactions, 'comment'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_alter_posts_publish'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comments',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='posts',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='posts',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='posts',
+            name='saves_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_posts_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posts',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='posts',
+            name='excerpt_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='posts',
+            name='render_version',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+    ]
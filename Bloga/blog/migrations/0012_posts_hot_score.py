@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+from blog.trending import hot_score
+
+
+def populate_hot_score(apps, schema_editor):
+    Posts = apps.get_model('blog', 'Posts')
+    posts = list(Posts.objects.filter(status='PB').only('likes_count', 'comments_count', 'saves_count', 'publish'))
+    for post in posts:
+        post.hot_score = hot_score(post.likes_count, post.comments_count, post.saves_count, post.publish)
+    Posts.objects.bulk_update(posts, ['hot_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_timelineentry'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posts',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='posts',
+            index=models.Index(fields=['-hot_score'], name='blog_posts_hot_sco_f81c0a_idx'),
+        ),
+        migrations.RunPython(populate_hot_score, migrations.RunPython.noop),
+    ]
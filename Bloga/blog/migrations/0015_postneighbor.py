@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbor_of', to='blog.posts')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.posts')),
+            ],
+            options={
+                'verbose_name': 'Post Neighbor',
+                'verbose_name_plural': 'Post Neighbors',
+                'indexes': [models.Index(fields=['post', '-score'], name='blog_postne_post_id_93de08_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'neighbor'), name='unique_post_neighbor')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_postneighbor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posts',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
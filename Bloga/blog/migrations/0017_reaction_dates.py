@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-18 11:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def date_existing_reactions(apps, schema_editor):
+    """
+    Date the reactions made before they had a date from their post or comment,
+    a single default would credit every historical like to the day of the migration.
+    """
+    Posts = apps.get_model('blog', 'Posts')
+    Comments = apps.get_model('blog', 'Comments')
+    sources = {
+        'PostReactions': Posts.objects.filter(pk=OuterRef('post_id')).values(date=Coalesce('publish', 'created')),
+        'CommentReactions': Comments.objects.filter(pk=OuterRef('comment_id')).values('date'),
+    }
+    for name, source in sources.items():
+        model = apps.get_model('blog', name)
+        model.objects.filter(date__isnull=True).update(date=Subquery(source[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_posts_views_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postreactions',
+            name='date',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='commentreactions',
+            name='date',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(date_existing_reactions, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='postreactions',
+            name='date',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='commentreactions',
+            name='date',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_computed_suggestions(apps, schema_editor):
+    """The users with stored suggestions had them computed, they are not recomputed on their next read"""
+    FollowSuggestion = apps.get_model('blog', 'FollowSuggestion')
+    FollowSuggestionMark = apps.get_model('blog', 'FollowSuggestionMark')
+    users = FollowSuggestion.objects.values_list('user_id', flat=True).distinct()
+    FollowSuggestionMark.objects.bulk_create(
+        [FollowSuggestionMark(user_id=pk) for pk in users.iterator()], batch_size=1000, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0017_reaction_dates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestionMark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('computed', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(mark_computed_suggestions, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,39 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.functions import Greatest, Substr
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.utils.text import slugify
 import string, random
+from django.utils.safestring import mark_safe
 from taggit.managers import TaggableManager
 
+from authentication.models import Profile
+from .rendering import EXCERPT_LENGTH, render_post, render_markdown, render_excerpt, renderer_version
+
 # Create your models here.
-class PublishedManager(models.Manager):
+class PostsQuerySet(models.QuerySet):
+    def for_feed(self, content=False, tags=True):
+        """
+        Load everything a post card renders with a constant number of queries:
+        the author and their profile are joined and the tags are prefetched.
+        
+        Unless `content` is requested the body and its rendered HTML are deferred
+        and only an `excerpt` long enough for the cards is fetched. Views serving
+        cached cards pass `tags=False` and let `fragments.prepare_cards` prefetch
+        the tags of the cards that have to be rendered.
+        """
+        queryset = self.select_related('author', 'author__profile')
+        if tags:
+            queryset = queryset.prefetch_related('tags')
+        if not content:
+            queryset = queryset.defer('content', 'content_html').annotate(
+                excerpt=Substr('content', 1, EXCERPT_LENGTH + 1)
+            )
+        return queryset
+
+
+class PublishedManager(models.Manager.from_queryset(PostsQuerySet)):
     """
     A manager that filters out draft posts and returns only published posts
     """
@@ -19,6 +46,74 @@ def random_string_generator(size=6, chars=string.ascii_lowercase + string.digits
     """Generate a random string of a given size"""
     return "".join(random.choice(chars) for _ in range(size))
 
+
+LINK_MAX_LENGTH = 250
+LINK_CANDIDATES = 4
+LINK_SAVE_ATTEMPTS = 3
+
+# kept up to date with F() updates, an instance saving its copy would undo concurrent changes
+POST_COUNTER_FIELDS = ('likes_count', 'comments_count', 'saves_count', 'views_count')
+
+def link_candidates(base, count=LINK_CANDIDATES):
+    """
+    Return the base slug followed by `count` randomly suffixed alternatives,
+    all trimmed so that they fit in the link column
+    """
+    base = slugify(base)[:LINK_MAX_LENGTH].strip("-") or random_string_generator()
+    candidates = [base]
+    for counter in range(1, count + 1):
+        random_str = random_string_generator(size=4 + counter)
+        prefix = base[:LINK_MAX_LENGTH - len(random_str) - 1].strip("-")
+        candidates.append(f"{prefix}-{random_str}")
+    return candidates
+
+
+def allocate_links(titles, exclude=None):
+    """
+    Allocate one unique link per title with a single indexed lookup.
+    
+    Every title is expanded into a handful of candidate slugs and all candidates
+    are checked against the unique `link` index in one `IN (...)` query. Links are
+    also kept unique within the batch, so the result can be used for bulk inserts.
+    """
+    candidate_lists = [link_candidates(title) for title in titles]
+    queryset = Posts.objects.filter(
+        link__in=[link for candidates in candidate_lists for link in candidates]
+    )
+    if exclude is not None:
+        queryset = queryset.exclude(pk=exclude)
+    taken = set(queryset.values_list("link", flat=True))
+    
+    links = []
+    for candidates in candidate_lists:
+        link = next((link for link in candidates if link not in taken), None)
+        while link is None or link in taken:
+            # every candidate is taken, fall back to a longer random suffix
+            link = link_candidates(candidates[0], count=LINK_CANDIDATES + 1)[-1]
+        taken.add(link)
+        links.append(link)
+    return links
+
+
+def allocate_link(title, exclude=None):
+    """Allocate a single unique link, see `allocate_links`"""
+    return allocate_links([title], exclude=exclude)[0]
+
+
+def adjust_counters(model, pk, **deltas):
+    """
+    Atomically apply deltas to the counter columns of one row, or of every row
+    of a list of pks, never going below zero
+    """
+    changes = {
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items() if delta
+    }
+    if changes:
+        rows = model.objects.filter(pk__in=pk) if isinstance(pk, list) else model.objects.filter(pk=pk)
+        rows.update(**changes)
+
+
 class Posts(models.Model):
     """
     Posts Models
@@ -42,70 +137,170 @@ class Posts(models.Model):
     updated = models.DateTimeField(auto_now=True)
     tags = TaggableManager()
     
+    # denormalized counters, maintained by the reaction, comment and saved post models
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    saves_count = models.PositiveIntegerField(default=0, editable=False)
+    # written in batches by `view_counts.ViewBuffer.flush`
+    views_count = models.PositiveIntegerField(default=0, editable=False)
+    # rank on the trending lists, see `trending.hot_score`
+    hot_score = models.FloatField(default=0, editable=False)
+    
+    # sanitized HTML rendered from `content` when the post is saved
+    content_html = models.TextField(blank=True, default='', editable=False)
+    excerpt_html = models.TextField(blank=True, default='', editable=False)
+    render_version = models.CharField(max_length=12, blank=True, default='', editable=False)
+    
     class Meta:
         ordering = ['-publish']
         indexes = [
-            models.Index(fields=['-publish'])
+            models.Index(fields=['-publish']),
+            models.Index(fields=['-hot_score']),
         ]
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
     
     # Add Custom Managers
-    objects = models.Manager()
+    objects = PostsQuerySet.as_manager()
     published = PublishedManager()
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def adjust_counters(cls, pk, likes=0, comments=0, saves=0):
+        """Apply counter deltas to a post, or a list of posts, with a single UPDATE and rescore them for the trending lists"""
+        adjust_counters(cls, pk, likes_count=likes, comments_count=comments, saves_count=saves)
+        if likes or comments or saves:
+            from .trending import record
+            record(*(pk if isinstance(pk, list) else [pk]))
+    
+    @property
+    def rendered_content(self):
+        """The stored HTML of the post, rendered on the fly only if it is stale"""
+        if self.render_version != renderer_version():
+            return mark_safe(render_markdown(self.content))
+        return mark_safe(self.content_html)
+    
+    @property
+    def rendered_excerpt(self):
+        """The stored HTML of the card excerpt, rendered on the fly only if it is stale"""
+        if self.render_version != renderer_version():
+            return mark_safe(render_excerpt(getattr(self, 'excerpt', None) or self.content))
+        return mark_safe(self.excerpt_html)
+    
+    def render(self):
+        """Render the markdown content into the stored HTML fields"""
+        for field, value in render_post(self.content).items():
+            setattr(self, field, value)
+    
+    def rescore(self):
+        """Set the trending score from the counters and publish date of this instance"""
+        from .trending import hot_score
+        self.hot_score = hot_score(self.likes_count, self.comments_count, self.saves_count, self.publish)
+    
     def save(self, update=False, *args, **kwargs):
         """
         Extend the function used to save posts to make sure that links are always unique
         """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # score from the current counters and leave them out of the UPDATE
+            self.refresh_from_db(fields=POST_COUNTER_FIELDS)
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in POST_COUNTER_FIELDS
+            ]
+        self.render()
+        
+        # only published posts have a publish date, so it tells the previous status
+        published = self.status == Posts.Status.PUBLISHED
+        publishing = published and self.publish is None
+        unpublishing = not published and self.publish is not None
         
         if update:
+            if publishing:
+                self.publish = timezone.now()
+            elif unpublishing:
+                self.publish = None
+            self.rescore()
             super().save(*args, **kwargs)
-            return 
-        
-        if not self.link:
-            # generate initial slug based on title
-            self.link = slugify(self.title)
-            
-        # Check link uniqueness
-        original_link = self.link
-        queryset = Posts.objects.filter(link=self.link)
-        counter = 1
-        
-        while queryset.exists():
-            # Append random characters if link is not unique
-            random_str = random_string_generator(size= 4 + counter)
-            self.link = f"{original_link}-{random_str}"
-            queryset = Posts.objects.filter(link=self.link)
-            counter += 1
-        
-        # set publish to now when ever the status is changed from draft to published
-        if (not Posts.published.filter(link=self.link).exists() and self.status == "PB") or self.status == "PB":
+        else:
+            self._save_with_link(*args, **kwargs)
+        
+        if publishing or unpublishing:
+            Profile.adjust_counters(self.author_id, posts=1 if publishing else -1)
+        
+        if publishing:
+            from .timeline import fan_out
+            from .trending import offer
+            transaction.on_commit(lambda: fan_out(self))
+            transaction.on_commit(lambda: offer(self.pk, self.hot_score))
+        elif unpublishing:
+            TimelineEntry.objects.filter(post=self).delete()
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0] and self.publish is not None:
+                Profile.adjust_counters(self.author_id, posts=-1)
+        return deleted
+    
+    def _save_with_link(self, *args, **kwargs):
+        # generate initial slug based on title
+        original_link = self.link or self.title
+        
+        # set publish to now when ever the post is saved as published
+        if self.status == Posts.Status.PUBLISHED:
             self.publish = timezone.now()
         else:
             self.publish = None
-        # save the model    
-        super().save(*args, **kwargs)
+        self.rescore()
+        
+        # a concurrent writer can still take the link between the lookup and the
+        # insert, so retry with a fresh link when the unique index rejects it
+        for attempt in range(LINK_SAVE_ATTEMPTS):
+            self.link = allocate_link(original_link, exclude=self.pk)
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if attempt == LINK_SAVE_ATTEMPTS - 1:
+                    raise
         
 class Comments(models.Model):
     post = models.ForeignKey(Posts, related_name='comments', on_delete=models.CASCADE)
     user = models.ForeignKey(User, related_name='comments', on_delete=models.CASCADE)
     content = models.TextField(blank=False)
     date = models.DateTimeField(auto_now_add=True)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
+    
+    @classmethod
+    def adjust_counters(cls, pk, likes=0):
+        """Apply counter deltas to a comment, or a list of comments, with a single UPDATE"""
+        adjust_counters(cls, pk, likes_count=likes)
         
     def save(self, *args, **kwargs):
         # avoid commenting on draft posts
         if self.post.status == 'DF':
             return
         
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Posts.adjust_counters(self.post_id, comments=1)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0]:
+                Posts.adjust_counters(self.post_id, comments=-1)
+        return deleted
         
     def __str__(self):
         return f"comment: {self.content[:10]}... on {self.post.title[:10]}..."
@@ -122,6 +317,7 @@ class PostReactions(models.Model):
         choices=Reactions,
         default=Reactions.LIKE
     )  
+    date = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ['post', 'user']
@@ -134,7 +330,18 @@ class PostReactions(models.Model):
         if PostReactions.objects.filter(user=self.user, post=self.post).exists():
             return
         
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Posts.adjust_counters(self.post_id, likes=1)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0]:
+                Posts.adjust_counters(self.post_id, likes=-1)
+        return deleted
           
 class CommentReactions(models.Model):
     class Reactions(models.TextChoices):
@@ -147,6 +354,7 @@ class CommentReactions(models.Model):
         choices=Reactions,
         default=Reactions.LIKE
     )
+    date = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ['comment', 'user']
@@ -158,7 +366,19 @@ class CommentReactions(models.Model):
         
         if CommentReactions.objects.filter(user=self.user, comment=self.comment).exists():
             return
-        super().save(*args, **kwargs)
+        
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Comments.adjust_counters(self.comment_id, likes=1)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0]:
+                Comments.adjust_counters(self.comment_id, likes=-1)
+        return deleted
         
 class SavedPost(models.Model):
     user = models.ForeignKey(User, related_name='saved', on_delete=models.CASCADE)
@@ -175,4 +395,117 @@ class SavedPost(models.Model):
         if SavedPost.objects.filter(user=self.user, post=self.post).exists():
             return
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Posts.adjust_counters(self.post_id, saves=1)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if deleted[0]:
+                Posts.adjust_counters(self.post_id, saves=-1)
+        return deleted
+
+class TimelineEntry(models.Model):
+    """
+    A published post in the timeline of one of its author's followers.
+
+    Entries are written when a post is published, so reading a timeline never
+    has to look at who the reader follows. `publish` is copied from the post to
+    page through a timeline with its own index.
+    """
+    user = models.ForeignKey(User, related_name='timeline', on_delete=models.CASCADE)
+    post = models.ForeignKey(Posts, related_name='+', on_delete=models.CASCADE)
+    publish = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_timeline_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-publish', '-post']),
+        ]
+        verbose_name = 'Timeline Entry'
+        verbose_name_plural = 'Timeline Entries'
+
+
+class RelatedPost(models.Model):
+    """
+    A published post sharing tags with `post`, scored by the weighted Jaccard
+    similarity of their tags.
+
+    Rows are written in both directions whenever the tags of a post change, at
+    most `RELATED_POSTS` per post, so the related posts of a post are read from
+    one index ordered by score.
+    """
+    post = models.ForeignKey(Posts, related_name='+', on_delete=models.CASCADE)
+    related = models.ForeignKey(Posts, related_name='related_to', on_delete=models.CASCADE)
+    score = models.FloatField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'related'], name='unique_related_post'),
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score']),
+        ]
+        verbose_name = 'Related Post'
+        verbose_name_plural = 'Related Posts'
+
+
+class FollowSuggestion(models.Model):
+    """
+    An author suggested to `user`, ranked by how many of the people they follow
+    follow the author and by how close the author's tags are to their interests.
+    
+    Written per user by `suggestions.refresh`, updated as they follow people by
+    `suggestions.apply_follows` and rebuilt in bulk by `suggest_follows`.
+    """
+    user = models.ForeignKey(User, related_name='follow_suggestions', on_delete=models.CASCADE)
+    suggested = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    mutuals = models.PositiveIntegerField(default=0)
+    score = models.FloatField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'suggested'], name='unique_follow_suggestion'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+        verbose_name = 'Follow Suggestion'
+        verbose_name_plural = 'Follow Suggestions'
+
+
+class FollowSuggestionMark(models.Model):
+    """
+    When the suggestions of a user were last computed in full, so that a user
+    without any suggestion is not recomputed on every read.
+    """
+    user = models.OneToOneField(User, primary_key=True, related_name='+', on_delete=models.CASCADE)
+    computed = models.DateTimeField(auto_now=True)
+
+
+class PostNeighbor(models.Model):
+    """
+    A published post liked or saved by the readers of `post`, scored by the
+    cosine similarity of the two posts' reader vectors.
+
+    Written offline by the `recommend_posts` command, so "readers who liked
+    this also liked" and "for you" lists are read from one index ordered by score.
+    """
+    post = models.ForeignKey(Posts, related_name='+', on_delete=models.CASCADE)
+    neighbor = models.ForeignKey(Posts, related_name='neighbor_of', on_delete=models.CASCADE)
+    score = models.FloatField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'neighbor'], name='unique_post_neighbor'),
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score']),
+        ]
+        verbose_name = 'Post Neighbor'
+        verbose_name_plural = 'Post Neighbors'
@@ -0,0 +1,118 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from . import fragments
+
+SURROGATE_KEY_HEADER = "Surrogate-Key"
+
+# the listing state of a post that does not exist or is not published
+UNLISTED = (False, frozenset())
+
+
+def surrogate_keys(request, *keys):
+    """Tag the response of the current request with surrogate keys, e.g. `post:1`"""
+    if not hasattr(request, "surrogate_keys"):
+        request.surrogate_keys = set()
+    request.surrogate_keys.update(keys)
+
+
+def post_keys(posts):
+    """The keys of a page listing `posts`: every post and every author"""
+    keys = set()
+    for post in posts:
+        keys.add(f"post:{post.pk}")
+        keys.add(f"user:{post.author_id}")
+    return keys
+
+
+def purge(*keys):
+    """Invalidate every cached page tagged with one of `keys`"""
+    if keys:
+        fragments.bump("surrogate", *keys)
+
+
+def post_state(post):
+    """Whether a post is listed on the feeds, and under which tags"""
+    if post.pk is None or post.status != "PB":
+        return UNLISTED
+    return True, frozenset(post.tags.names())
+
+
+def purge_post(post_id, author_id, before, after):
+    """
+    Purge the pages affected by a write to a post.
+
+    `before` and `after` are the `post_state` around the write. The post's own key
+    covers every page it is shown on, so the feed, the author's profile and the tag
+    pages are only purged when the post joins or leaves them.
+    """
+    (was_listed, old_tags), (listed, tags) = before, after
+    keys = {f"post:{post_id}"}
+    if was_listed != listed:
+        keys.update(["feed", f"user:{author_id}"])
+        keys.update(f"tag:{name}" for name in old_tags | tags)
+    elif listed:
+        keys.update(f"tag:{name}" for name in old_tags ^ tags)
+    purge(*keys)
+
+
+def _cacheable(request):
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def _cache_key(request):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"page:{url}"
+
+
+def _tag(response, keys):
+    response[SURROGATE_KEY_HEADER] = " ".join(sorted(keys))
+    return response
+
+
+def cache_anonymous_page(view):
+    """
+    Cache the whole response of `view` for anonymous visitors without pending messages.
+
+    The view tags its response with `surrogate_keys`, and a cached page is served
+    until one of its keys is purged. The timeout only bounds how long a page
+    rendered while a write was committing can stay stale.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _cacheable(request):
+            return view(request, *args, **kwargs)
+
+        key = _cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            versions, content, content_type = entry
+            if fragments.versions("surrogate", versions) == versions:
+                return _tag(HttpResponse(content, content_type=content_type), versions)
+
+        response = view(request, *args, **kwargs)
+        keys = getattr(request, "surrogate_keys", None)
+        if (
+            keys
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            # pages holding a csrf token or a message are not the same for everyone
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            and not len(get_messages(request))
+        ):
+            versions = fragments.versions("surrogate", keys)
+            cache.set(key, (versions, response.content, response["Content-Type"]), settings.PAGE_CACHE_TIMEOUT)
+            _tag(response, keys)
+        return response
+
+    return wrapper
@@ -0,0 +1,165 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q, DateTimeField, IntegerField
+from django.http import Http404
+
+
+class KeysetPage(Sequence):
+    """
+    A page of results produced by keyset pagination.
+
+    It behaves like a list of the objects on the page and carries the opaque
+    cursor of the next page, if there is one. No total count is ever computed.
+    """
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = list(object_list)
+        self.next_cursor = next_cursor
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def map(self, func):
+        """Return a page of `func(obj)` for every object, keeping the cursor"""
+        return KeysetPage([func(obj) for obj in self.object_list], self.next_cursor)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    raise TypeError(f"Can not encode {type(value).__name__} in a cursor")
+
+
+def _decode_value(value):
+    if "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values):
+    """Encode the key values of the last row of a page into an opaque url safe cursor"""
+    data = json.dumps(list(values), default=_encode_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def _fits(field, value):
+    """Whether a decoded cursor value can be compared with the values of `field`"""
+    if value is None:
+        return field.null
+    if field.is_relation:
+        field = field.target_field
+    if isinstance(field, DateTimeField):
+        return isinstance(value, datetime) and (value.tzinfo is not None or not settings.USE_TZ)
+    if isinstance(field, IntegerField):
+        return type(value) is int and -2 ** 63 <= value < 2 ** 63
+    return isinstance(value, str)
+
+
+def decode_cursor(cursor, model, keys):
+    """
+    Decode a cursor made by `encode_cursor` for the ordering `keys` of `model`,
+    raising Http404 if it is malformed or one of its values does not fit its key
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data, object_hook=_decode_value)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise Http404("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise Http404("Invalid cursor")
+    for (name, _), value in zip(_parse_keys(keys), values):
+        if not _fits(model._meta.get_field(name), value):
+            raise Http404("Invalid cursor")
+    return values
+
+
+def _parse_keys(keys):
+    return [(key.lstrip("-"), key.startswith("-")) for key in keys]
+
+
+def keyset_ordering(keys, nullable=()):
+    """
+    The ORDER BY matching `keys`, e.g. ("-publish", "-id").
+
+    Fields listed in `nullable` always sort their NULLs last.
+    """
+    ordering = []
+    for name, descending in _parse_keys(keys):
+        if name in nullable:
+            field = F(name)
+            ordering.append(field.desc(nulls_last=True) if descending else field.asc(nulls_last=True))
+        else:
+            ordering.append(f"-{name}" if descending else name)
+    return ordering
+
+
+def keyset_filter(keys, values, nullable=()):
+    """
+    Build the filter selecting the rows that come strictly after `values` in the
+    order given by `keys`, i.e. the row value comparison (k1, k2) < (v1, v2)
+    """
+    matched = None
+    equal = Q()
+    for (name, descending), value in zip(_parse_keys(keys), values):
+        if value is None:
+            # NULLs sort last, so nothing non-null comes after a NULL
+            after = None
+            same = Q(**{f"{name}__isnull": True})
+        else:
+            lookup = "lt" if descending else "gt"
+            after = Q(**{f"{name}__{lookup}": value})
+            if name in nullable:
+                after |= Q(**{f"{name}__isnull": True})
+            same = Q(**{name: value})
+
+        if after is not None:
+            term = equal & after
+            matched = term if matched is None else matched | term
+        equal &= same
+
+    if matched is None:
+        # the cursor points at the very last possible row
+        return Q(pk__in=[])
+    return matched
+
+
+def paginate(request, queryset, keys=("-publish", "-id"), per_page=None, nullable=()):
+    """
+    Return one `KeysetPage` of `queryset` ordered by `keys`.
+
+    The page starts after the `?after=` cursor of the request and is fetched with a
+    single LIMIT query of `per_page + 1` rows, the extra row only telling whether
+    there is a next page.
+    """
+    per_page = per_page or settings.BLOG_PAGE_SIZE
+    cursor = request.GET.get("after")
+
+    queryset = queryset.order_by(*keyset_ordering(keys, nullable))
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, keys)
+        try:
+            queryset = queryset.filter(keyset_filter(keys, values, nullable))
+        except (ValidationError, TypeError, ValueError):
+            raise Http404("Invalid cursor")
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, name) for name, _ in _parse_keys(keys))
+
+    return KeysetPage(rows, next_cursor)
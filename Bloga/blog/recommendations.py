@@ -0,0 +1,149 @@
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import Posts, PostReactions, SavedPost, PostNeighbor
+from .trending import LIKE_WEIGHT, SAVE_WEIGHT
+from . import page_cache, trending
+
+
+def _dated(model, weight):
+    rows = (
+        model.objects.filter(post__status=Posts.Status.PUBLISHED)
+        .order_by("date", "id").values_list("date", "user_id", "post_id")
+    )
+    for date, user_id, post_id in rows.iterator(chunk_size=10000):
+        yield date, user_id, post_id, weight
+
+
+def interactions():
+    """
+    Every (user id, post id, weight) like and bookmark of a published post,
+    oldest first, the two tables merged by date as they are read
+    """
+    merged = heapq.merge(_dated(PostReactions, LIKE_WEIGHT), _dated(SavedPost, SAVE_WEIGHT), key=lambda row: row[0])
+    for date, user_id, post_id, weight in merged:
+        yield user_id, post_id, weight
+
+
+def neighbors(interactions, size=None, history=None):
+    """
+    The `size` nearest neighbours of every post as `{post id: [(score, neighbour id)]}`,
+    best first, scored by the cosine similarity of the posts' reader vectors.
+
+    The user x post matrix is kept sparse, as one dict per user and one per post.
+    The similarities of a post are the dot products of its column with every
+    other column, accumulated through the posts of its readers, so only pairs
+    of posts sharing a reader are ever touched. Posts are scored one at a time
+    and only their top `size` neighbours are kept, bounding memory to the
+    matrix itself whatever the number of pairs.
+
+    A reader costs the square of their number of posts, so only the last
+    `history` posts of each reader, in the order of `interactions`, are kept.
+    """
+    size = size or settings.POST_NEIGHBORS
+    history = history or settings.POST_NEIGHBORS_HISTORY
+    rows = defaultdict(dict)
+    for user_id, post_id, weight in interactions:
+        row = rows[user_id]
+        row[post_id] = row.pop(post_id, 0) + weight
+        if len(row) > history:
+            del row[next(iter(row))]
+
+    columns = defaultdict(dict)
+    for user_id, row in rows.items():
+        for post_id, weight in row.items():
+            columns[post_id][user_id] = weight
+    norms = {post_id: math.sqrt(sum(weight * weight for weight in column.values())) for post_id, column in columns.items()}
+
+    result = {}
+    for post_id, column in columns.items():
+        dots = defaultdict(float)
+        for user_id, weight in column.items():
+            for other_id, other_weight in rows[user_id].items():
+                dots[other_id] += weight * other_weight
+        dots.pop(post_id, None)
+        norm = norms[post_id]
+        top = heapq.nlargest(size, ((dot / (norm * norms[other_id]), other_id) for other_id, dot in dots.items()))
+        if top:
+            result[post_id] = top
+    return result
+
+
+def rebuild(batch_size=1000):
+    """
+    Replace the neighbours of every post with those of the current likes and
+    bookmarks, purging the pages of the posts whose neighbours changed.
+    Returns the number of posts with neighbours and of rows written.
+    """
+    result = neighbors(interactions())
+    rows = [
+        PostNeighbor(post_id=post_id, neighbor_id=neighbor_id, score=score)
+        for post_id, top in result.items() for score, neighbor_id in top
+    ]
+    current = defaultdict(list)
+    for post_id, neighbor_id in PostNeighbor.objects.order_by("post_id", "-score", "-neighbor_id").values_list("post_id", "neighbor_id"):
+        current[post_id].append(neighbor_id)
+    changed = {
+        post_id for post_id in current.keys() | result.keys()
+        if current.get(post_id, []) != [neighbor_id for score, neighbor_id in result.get(post_id, [])]
+    }
+    with transaction.atomic():
+        PostNeighbor.objects.all().delete()
+        PostNeighbor.objects.bulk_create(rows, batch_size=batch_size)
+
+    page_cache.purge(*(f"post:{post_id}" for post_id in changed))
+    return len(result), len(rows)
+
+
+def also_liked(post, limit=None):
+    """The published posts the readers of `post` also liked or saved, read from its neighbours"""
+    limit = limit or settings.ALSO_LIKED
+    return list(
+        Posts.published.filter(neighbor_of__post=post)
+        .select_related("author")
+        .order_by("-neighbor_of__score", "-publish")[:limit]
+    )
+
+
+def history(user, size=None):
+    """The ids of the `size` posts `user` liked or saved most recently, likes and saves merged by date"""
+    size = size or settings.FOR_YOU_HISTORY
+    liked = PostReactions.objects.filter(user=user).order_by("-date", "-id").values_list("date", "post_id")[:size]
+    saved = SavedPost.objects.filter(user=user).order_by("-date", "-id").values_list("date", "post_id")[:size]
+    recent = set()
+    for date, post_id in heapq.merge(liked, saved, key=lambda row: row[0], reverse=True):
+        recent.add(post_id)
+        if len(recent) == size:
+            break
+    return recent
+
+
+def for_you(user, limit=None, posts=None):
+    """
+    The published posts closest to what `user` recently liked or saved, best
+    first: the neighbours of their recent posts summed over those posts, with
+    one aggregate over the neighbours index. Posts they already liked, saved
+    or wrote are left out. Users without any history get the trending posts.
+    """
+    limit = limit or settings.FOR_YOU_SIZE
+    recent = history(user)
+    if not recent:
+        return trending.trending(limit=limit, posts=posts)
+
+    scores = (
+        PostNeighbor.objects.filter(post__in=recent, neighbor__status=Posts.Status.PUBLISHED)
+        .exclude(neighbor__in=PostReactions.objects.filter(user=user).values("post_id"))
+        .exclude(neighbor__in=SavedPost.objects.filter(user=user).values("post_id"))
+        .exclude(neighbor__author=user)
+        .values("neighbor_id").annotate(total=Sum("score"))
+        .order_by("-total", "-neighbor_id").values_list("neighbor_id", flat=True)[:limit]
+    )
+    ids = list(scores)
+    posts = Posts.published.for_feed() if posts is None else posts
+    found = posts.in_bulk(ids)
+    return [found[post_id] for post_id in ids if post_id in found]
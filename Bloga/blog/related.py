@@ -0,0 +1,107 @@
+import math
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, Q
+from taggit.models import TaggedItem
+
+from .models import Posts, RelatedPost
+from . import page_cache
+
+
+def _tagged_posts():
+    return TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Posts))
+
+
+def tag_weights(tag_ids):
+    """
+    The weight of every tag in `tag_ids`, rarer tags weigh more: the log of the
+    number of published posts over the number of published posts with the tag.
+    """
+    published = Posts.published.values("id")
+    documents = Posts.published.count()
+    counts = (
+        _tagged_posts().filter(tag_id__in=tag_ids, object_id__in=published)
+        .values("tag_id").annotate(posts=Count("id")).values_list("tag_id", "posts")
+    )
+    return {tag_id: math.log(1 + documents / posts) for tag_id, posts in counts}
+
+
+def similarity(tags, other_tags, weights):
+    """The weighted Jaccard similarity of two sets of tag ids"""
+    union = sum(weights.get(tag, 0) for tag in tags | other_tags)
+    if not union:
+        return 0.0
+    return sum(weights.get(tag, 0) for tag in tags & other_tags) / union
+
+
+def refresh(post):
+    """
+    Recompute the related posts of `post` after its tags or its status changed.
+
+    The published posts sharing a tag with it, at most `RELATED_POSTS_CANDIDATES`
+    of the newest, are scored. The `RELATED_POSTS` best become the related posts
+    of `post`, and `post` joins the related posts of a candidate only when it
+    ranks among its `RELATED_POSTS` best, pushing out the last one. Every post so
+    keeps at most `RELATED_POSTS` rows; one that loses `post` is topped up again
+    by `rebuild_related_posts`. The pages of every post whose related posts
+    changed are purged.
+    """
+    keep = settings.RELATED_POSTS
+    tags = set(post.tags.values_list("id", flat=True)) if post.status == Posts.Status.PUBLISHED else set()
+    with transaction.atomic():
+        affected = set(RelatedPost.objects.filter(related=post).values_list("post_id", flat=True))
+        RelatedPost.objects.filter(Q(post=post) | Q(related=post)).delete()
+
+        candidates = []
+        if tags:
+            candidates = list(
+                _tagged_posts().filter(tag_id__in=tags, object_id__in=Posts.published.values("id"))
+                .exclude(object_id=post.pk).values_list("object_id", flat=True)
+                .distinct().order_by("-object_id")[:settings.RELATED_POSTS_CANDIDATES]
+            )
+        candidate_tags = {}
+        for object_id, tag_id in _tagged_posts().filter(object_id__in=candidates).values_list("object_id", "tag_id"):
+            candidate_tags.setdefault(object_id, set()).add(tag_id)
+
+        weights = tag_weights(tags.union(*candidate_tags.values())) if candidate_tags else {}
+        scores = {}
+        for object_id, other_tags in candidate_tags.items():
+            score = similarity(tags, other_tags, weights)
+            if score > 0:
+                scores[object_id] = score
+        best = sorted(scores, key=lambda pk: (scores[pk], pk), reverse=True)[:keep]
+        rows = [RelatedPost(post=post, related_id=pk, score=scores[pk]) for pk in best]
+
+        # the rows the candidates keep, as (id, related id, score), to rank `post` among them
+        kept = {}
+        for row_id, post_id, related_id, score in (
+            RelatedPost.objects.filter(post_id__in=scores).values_list("id", "post_id", "related_id", "score")
+        ):
+            kept.setdefault(post_id, []).append((row_id, related_id, score))
+        evicted = []
+        for object_id, score in scores.items():
+            ranked = sorted(
+                kept.get(object_id, []) + [(None, post.pk, score)],
+                key=lambda row: (row[2], row[1]), reverse=True,
+            )
+            if any(row_id is None for row_id, related_id, score in ranked[:keep]):
+                rows.append(RelatedPost(post_id=object_id, related=post, score=score))
+                evicted.extend(row_id for row_id, related_id, score in ranked[keep:])
+        RelatedPost.objects.bulk_create(rows)
+        if evicted:
+            RelatedPost.objects.filter(pk__in=evicted).delete()
+
+    changed = affected | {row.post_id for row in rows if row.post_id != post.pk}
+    page_cache.purge(*(f"post:{pk}" for pk in changed))
+
+
+def related_posts(post, limit=None):
+    """The published posts most similar to `post`, read from its related posts index"""
+    limit = limit or settings.RELATED_POSTS
+    return list(
+        Posts.published.filter(related_to__post=post)
+        .select_related("author")
+        .order_by("-related_to__score", "-publish")[:limit]
+    )
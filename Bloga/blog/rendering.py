@@ -0,0 +1,48 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.text import Truncator
+from markdownify.templatetags.markdownify import markdownify
+
+EXCERPT_LENGTH = 100
+
+
+@lru_cache(maxsize=None)
+def renderer_version():
+    """
+    A short fingerprint of the MARKDOWNIFY settings.
+    
+    HTML stored with a different version was rendered with another whitelist or
+    set of extensions and has to be rendered again.
+    """
+    config = json.dumps(getattr(settings, 'MARKDOWNIFY', {}), sort_keys=True, default=str)
+    return hashlib.sha1(config.encode()).hexdigest()[:12]
+
+
+@receiver(setting_changed)
+def reset_renderer_version(setting, **kwargs):
+    if setting == 'MARKDOWNIFY':
+        renderer_version.cache_clear()
+
+
+def render_markdown(text):
+    """Render markdown to sanitized HTML exactly like the `markdownify` filter"""
+    return str(markdownify(text))
+
+
+def render_excerpt(text):
+    """Render the card excerpt, i.e. `text|truncatechars:100|markdownify`"""
+    return render_markdown(Truncator(text or "").chars(EXCERPT_LENGTH))
+
+
+def render_post(content):
+    """The rendered fields stored alongside the markdown content of a post"""
+    return {
+        'content_html': render_markdown(content),
+        'excerpt_html': render_excerpt(content),
+        'render_version': renderer_version(),
+    }
@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.signals import request_finished
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from taggit.models import TaggedItem
+
+from authentication.models import Follow, Profile
+from .models import Posts, Comments
+from . import fragments, view_counts
+
+
+@receiver([post_save, post_delete], sender=Posts)
+def post_changed(sender, instance, **kwargs):
+    fragments.bump("post", instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Comments)
+def comment_changed(sender, instance, **kwargs):
+    fragments.bump("comment", instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    fragments.bump("profile", instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, **kwargs):
+    fragments.bump("profile", instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # the follow edges of the user are cascaded without touching the counts
+    Follow.objects.detach(instance)
+
+
+@receiver([post_save, post_delete], sender=TaggedItem)
+def post_tagged(sender, instance, **kwargs):
+    # the content type comes from the cache, not a query per tagged item
+    if ContentType.objects.get_for_id(instance.content_type_id).model_class() is Posts:
+        fragments.bump("post", instance.object_id)
+
+
+# buffered views are written once the response has been sent, never on the request path
+request_finished.connect(view_counts.flush_if_due, dispatch_uid="flush_view_counts")
@@ -0,0 +1,235 @@
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from authentication.models import Follow, Profile
+from .models import Posts, PostReactions, SavedPost, FollowSuggestion, FollowSuggestionMark
+
+# authors with the most followers, suggested to users whose follows suggest nobody
+POPULAR_AUTHORS = 50
+
+
+def cosine(vector, other):
+    """The cosine similarity of two sparse vectors stored as Counters"""
+    if not vector or not other:
+        return 0.0
+    dot = sum(weight * other[key] for key, weight in vector.items() if key in other)
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    other_norm = math.sqrt(sum(weight * weight for weight in other.values()))
+    return dot / (norm * other_norm)
+
+
+def _vectors(rows):
+    vectors = defaultdict(Counter)
+    for key, tag_id in rows:
+        if tag_id is not None:
+            vectors[key][tag_id] += 1
+    return vectors
+
+
+def author_tags(authors=None):
+    """The tags of the published posts of every author, or of `authors`, as Counters"""
+    posts = Posts.published.all()
+    if authors is not None:
+        posts = posts.filter(author__in=authors)
+    return _vectors(posts.values_list("author_id", "tags__id"))
+
+
+def interests(users=None):
+    """The tags of the posts every user, or every user of `users`, wrote, liked or saved"""
+    written = Posts.published.all()
+    liked = PostReactions.objects.all()
+    saved = SavedPost.objects.all()
+    if users is not None:
+        written, liked, saved = written.filter(author__in=users), liked.filter(user__in=users), saved.filter(user__in=users)
+    vectors = _vectors(written.values_list("author_id", "tags__id"))
+    for queryset in (liked, saved):
+        for user_id, tag_id in queryset.values_list("user_id", "post__tags__id"):
+            if tag_id is not None:
+                vectors[user_id][tag_id] += 1
+    return vectors
+
+
+def popular_authors():
+    return list(
+        Profile.objects.filter(followers_count__gt=0)
+        .order_by("-followers_count").values_list("user_id", flat=True)[:POPULAR_AUTHORS]
+    )
+
+
+def rank(user_id, following, mutuals, interest, tags, popular):
+    """
+    The `FollowSuggestion`s of one user, best first: every author followed by
+    someone they follow, scored by the number of such mutual follows plus the
+    tag affinity weighted by `SUGGESTION_TAG_WEIGHT`. Popular authors are
+    candidates too, with a bonus worth less than one mutual follow, so that
+    users following nobody get suggestions.
+    """
+    candidates = Counter(mutuals)
+    bonus = {}
+    for position, author_id in enumerate(popular):
+        candidates.setdefault(author_id, 0)
+        bonus[author_id] = 0.5 / (position + 1)
+    excluded = following | {user_id}
+
+    suggestions = []
+    for author_id, count in candidates.items():
+        if author_id in excluded:
+            continue
+        score = count + bonus.get(author_id, 0) + settings.SUGGESTION_TAG_WEIGHT * cosine(interest, tags.get(author_id))
+        suggestions.append(FollowSuggestion(user_id=user_id, suggested_id=author_id, mutuals=count, score=score))
+    suggestions.sort(key=lambda suggestion: (-suggestion.score, -suggestion.mutuals, suggestion.suggested_id))
+    return suggestions[:settings.SUGGESTIONS_PER_USER]
+
+
+def rebuild(batch_size=1000):
+    """
+    Recompute the suggestions of every active user.
+
+    The follow graph is loaded once as a sparse adjacency list and the mutual
+    follow counts of a user are the row of the graph squared, computed from the
+    lists of the users they follow. Suggestions are replaced one batch of users
+    per transaction. Returns the number of users.
+    """
+    following = defaultdict(set)
+    for follower_id, followee_id in Follow.objects.values_list("follower_id", "followee_id").iterator():
+        following[follower_id].add(followee_id)
+    tags = author_tags()
+    vectors = interests()
+    popular = popular_authors()
+
+    users = list(User.objects.filter(is_active=True).order_by("id").values_list("id", flat=True))
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        rows = []
+        for user_id in batch:
+            mutuals = Counter()
+            for followee_id in following[user_id]:
+                mutuals.update(following[followee_id])
+            rows += rank(user_id, following[user_id], mutuals, vectors.get(user_id), tags, popular)
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=batch).delete()
+            FollowSuggestion.objects.bulk_create(rows)
+            _mark(batch)
+    return len(users)
+
+
+def _mark(user_ids):
+    """Record that the suggestions of `user_ids` were just computed in full"""
+    FollowSuggestionMark.objects.bulk_create(
+        [FollowSuggestionMark(user_id=pk) for pk in user_ids],
+        update_conflicts=True, unique_fields=["user"], update_fields=["computed"],
+    )
+
+
+def refresh(user):
+    """
+    Recompute the suggestions of one user in full when they are first read,
+    with aggregate queries over the follows of the users they follow. Follows
+    are applied to them with `apply_follows`, the suggestions of other users
+    are left to `rebuild`.
+    """
+    following = set(Follow.objects.filter(follower=user).values_list("followee_id", flat=True))
+    mutuals = dict(
+        Follow.objects.filter(follower__in=following)
+        .exclude(followee__in=following | {user.pk})
+        .values("followee_id").annotate(mutuals=Count("id"))
+        .order_by("-mutuals").values_list("followee_id", "mutuals")[:settings.SUGGESTION_CANDIDATES]
+    )
+    popular = popular_authors()
+    tags = author_tags(set(mutuals) | set(popular))
+    interest = interests([user.pk]).get(user.pk)
+
+    rows = rank(user.pk, following, mutuals, interest, tags, popular)
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user=user).delete()
+        FollowSuggestion.objects.bulk_create(rows)
+        _mark([user.pk])
+    return rows
+
+
+def apply_follows(user, added=(), removed=()):
+    """
+    Update the suggestions of `user` for the follows they just added or removed
+    instead of recomputing them: the authors followed by a newly followed user
+    gain a mutual follow, those followed by an unfollowed user lose one, the
+    newly followed users are no longer suggested and the unfollowed ones are
+    scored again as candidates. Only the edges of the changed follows are read.
+    Authors kept out of the stored list are only counted through those edges,
+    `suggest_follows` ranks every candidate again.
+    """
+    added, removed = set(added), set(removed)
+    if not (added or removed) or not FollowSuggestionMark.objects.filter(user=user).exists():
+        # suggestions never computed are computed in full on first use
+        return
+
+    suggestions = FollowSuggestion.objects.filter(user=user)
+    following = set(Follow.objects.filter(follower=user).values_list("followee_id", flat=True))
+    returning = removed - following - {user.pk}
+    excluded = following | returning | {user.pk}
+    changes = Counter()
+    for follower_id, followee_id in Follow.objects.filter(follower__in=added | removed).values_list("follower_id", "followee_id"):
+        changes[followee_id] += 1 if follower_id in added else -1
+    changes = {pk: change for pk, change in changes.items() if change and pk not in excluded}
+
+    with transaction.atomic():
+        suggestions.filter(suggested__in=added | returning).delete()
+        current = set(suggestions.filter(suggested__in=changes).values_list("suggested_id", flat=True))
+        # one UPDATE per distinct change, usually a single +1 or -1
+        by_change = defaultdict(list)
+        for pk in current:
+            by_change[changes[pk]].append(pk)
+        for change, pks in by_change.items():
+            suggestions.filter(suggested__in=pks).update(
+                mutuals=Greatest(F("mutuals") + change, 0), score=F("score") + change,
+            )
+
+        new = [pk for pk, change in changes.items() if change > 0 and pk not in current]
+        if not (new or returning):
+            return
+        popular = popular_authors() if returning else []
+        tags = author_tags(set(new) | returning)
+        interest = interests([user.pk]).get(user.pk)
+        rows = [
+            FollowSuggestion(
+                user=user, suggested_id=pk, mutuals=changes[pk],
+                score=changes[pk] + settings.SUGGESTION_TAG_WEIGHT * cosine(interest, tags.get(pk)),
+            )
+            for pk in new
+        ]
+        if returning:
+            # the unfollowed users are candidates again, scored like `rank` does
+            mutuals = dict(
+                Follow.objects.filter(follower__in=following, followee__in=returning)
+                .values("followee_id").annotate(mutuals=Count("id")).values_list("followee_id", "mutuals")
+            )
+            rows += [
+                row for row in rank(user.pk, following, mutuals, interest, tags, popular)
+                if row.suggested_id in returning
+            ]
+        FollowSuggestion.objects.bulk_create(rows)
+        best = list(
+            suggestions.order_by("-score", "-mutuals", "suggested_id")
+            .values_list("id", flat=True)[:settings.SUGGESTIONS_PER_USER]
+        )
+        suggestions.exclude(id__in=best).delete()
+
+
+def suggested_users(user, limit=None):
+    """The suggested authors of `user`, best first, computed on first use"""
+    limit = limit or settings.SUGGESTIONS_PER_USER
+    if not FollowSuggestionMark.objects.filter(user=user).exists():
+        refresh(user)
+    suggestions = FollowSuggestion.objects.filter(user=user).select_related("suggested__profile").order_by("-score", "-mutuals", "suggested_id")
+    users = []
+    for suggestion in suggestions[:limit]:
+        suggestion.suggested.mutuals = suggestion.mutuals
+        users.append(suggestion.suggested)
+    return users
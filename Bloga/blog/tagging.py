@@ -0,0 +1,66 @@
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import Tag, TaggedItem
+
+from .models import Posts
+from . import fragments, trending
+
+
+def normalize(names):
+    """Strip, lower-case and de-duplicate tag names, dropping empty ones, keeping their order"""
+    return list(dict.fromkeys(name.strip().lower() for name in names if name and name.strip()))
+
+
+def parse(value):
+    """The normalized names of a comma separated list of tags"""
+    return normalize(value.split(",")) if value else []
+
+
+def resolve(names):
+    """
+    The tags named `names`, in order, creating the missing ones.
+
+    Existing tags are fetched with one query and the missing ones created with one
+    INSERT that skips names a concurrent writer just created. Only a new tag whose
+    slug is taken by another name falls back to taggit's slug de-duplication.
+    """
+    names = normalize(names)
+    if not names:
+        return []
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=Tag().slugify(name)) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+        for name in missing:
+            if name not in tags:
+                tags[name], created = Tag.objects.get_or_create(name=name)
+    return [tags[name] for name in names]
+
+
+def set_tags(post, names):
+    """
+    Make `names` the tags of `post`: the tags are resolved in bulk, the removed
+    tags are deleted with one query and the new ones inserted with one query.
+    No signal is sent for them, the post's fragments and trending lists are
+    updated here. Returns whether the tags changed.
+    """
+    tags = resolve(names)
+    lookup = {"content_type": ContentType.objects.get_for_model(Posts), "object_id": post.pk}
+    current = dict(TaggedItem.objects.filter(**lookup).values_list("tag_id", "tag__name"))
+    wanted = {tag.pk for tag in tags}
+
+    removed = [name for pk, name in current.items() if pk not in wanted]
+    if removed:
+        TaggedItem.objects.filter(tag_id__in=set(current) - wanted, **lookup).delete()
+    added = [tag for tag in tags if tag.pk not in current]
+    TaggedItem.objects.bulk_create([TaggedItem(tag=tag, **lookup) for tag in added], ignore_conflicts=True)
+
+    getattr(post, "_prefetched_objects_cache", {}).pop("tags", None)
+    changed = bool(removed or added)
+    if changed:
+        fragments.bump("post", post.pk)
+        trending.retag(post.pk, added=[tag.name for tag in added], removed=removed)
+    return changed
@@ -1,17 +1,27 @@
 from django import template
 
-from ..models import CommentReactions, PostReactions, SavedPost
+from ..viewer import ViewerState
 
 register = template.Library()
 
-@register.simple_tag
-def likes_post(post, user):
-    return PostReactions.objects.filter(post=post, user=user).exists()
 
-@register.simple_tag
-def likes_comment(comment, user):
-    return CommentReactions.objects.filter(comment=comment, user=user).exists()
+def viewer_state(context, user):
+    """The viewer state loaded by the view, or a lazily filled one for this render"""
+    viewer = context.get('viewer')
+    if viewer is None:
+        viewer = context.render_context.get('viewer')
+        if viewer is None:
+            viewer = context.render_context['viewer'] = ViewerState(user)
+    return viewer
 
-@register.simple_tag
-def post_saved(post, user):
-    return SavedPost.objects.filter(user=user, post=post).exists()
\ No newline at end of file
+@register.simple_tag(takes_context=True)
+def likes_post(context, post, user):
+    return viewer_state(context, user).likes_post(post)
+
+@register.simple_tag(takes_context=True)
+def likes_comment(context, comment, user):
+    return viewer_state(context, user).likes_comment(comment)
+
+@register.simple_tag(takes_context=True)
+def post_saved(context, post, user):
+    return viewer_state(context, user).saved_post(post)
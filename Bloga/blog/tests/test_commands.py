@@ -0,0 +1,66 @@
+from django.test import TestCase
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from io import StringIO
+
+from authentication.models import Profile
+from blog.models import Posts, Comments, PostReactions, CommentReactions, SavedPost
+from blog.rendering import renderer_version
+
+
+class ReconcileCountersCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="testuser", email="testuser@gmail.com", password="iamgroot")
+        cls.post = Posts.objects.create(title="post", content="content", author=cls.user, status="PB")
+        cls.comment = Comments.objects.create(user=cls.user, post=cls.post, content="comment")
+        PostReactions.objects.create(user=cls.user, post=cls.post)
+        CommentReactions.objects.create(user=cls.user, comment=cls.comment)
+        SavedPost.objects.create(user=cls.user, post=cls.post)
+        
+    def test_counters_are_recomputed(self):
+        # simulate drift
+        Posts.objects.update(likes_count=10, comments_count=10, saves_count=10)
+        Comments.objects.update(likes_count=10)
+        Profile.objects.update(posts_count=10)
+        
+        out = StringIO()
+        call_command("reconcile_counters", batch_size=1, stdout=out)
+        
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.post.saves_count, 1)
+        self.assertEqual(self.comment.likes_count, 1)
+        self.assertEqual(Profile.objects.get(user=self.user).posts_count, 1)
+        self.assertIn("Reconciled", out.getvalue())
+
+
+class RenderPostsCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="testuser", email="testuser@gmail.com", password="iamgroot")
+        for item in range(5):
+            Posts.objects.create(title=f"post {item}", content=f"**{item}**", author=cls.user, status="PB")
+        
+    def test_stale_posts_are_rendered(self):
+        Posts.objects.filter(title__in=["post 0", "post 3"]).update(content_html="", render_version="stale")
+        
+        for workers in [1, 2]:
+            out = StringIO()
+            call_command("render_posts", chunk_size=1, workers=workers, stdout=out)
+            self.assertIn("Rendered 2 posts" if workers == 1 else "Rendered 0 posts", out.getvalue())
+        
+        post = Posts.objects.get(title="post 3")
+        self.assertEqual(post.content_html, "<p><strong>3</strong></p>")
+        self.assertEqual(post.render_version, renderer_version())
+        
+    def test_all_posts_are_rendered_in_parallel(self):
+        Posts.objects.update(content_html="", excerpt_html="", render_version="")
+        
+        out = StringIO()
+        call_command("render_posts", "--all", chunk_size=2, workers=2, stdout=out)
+        
+        self.assertIn("Rendered 5 posts", out.getvalue())
+        self.assertFalse(Posts.objects.filter(content_html="").exists())
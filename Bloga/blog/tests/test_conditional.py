@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+
+from blog.conditional import VIEWS_BUCKET
+from blog.models import Posts
+
+
+class PostDetailConditionalTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.other = User.objects.create_user(username="otheruser", password="iamgroot")
+        cls.post = Posts.objects.create(author=cls.user, title="Title", content="content", status="PB")
+        cls.draft = Posts.objects.create(author=cls.user, title="Draft", content="content", status="DF")
+    
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="testuser", password="iamgroot")
+        self.url = reverse("blog:post", args=[self.post.link])
+    
+    def test_unchanged_page_is_not_modified(self):
+        # the first visit sets the csrf cookie the page's token is made from
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        
+        # session, user and the validator row, nothing is rendered
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_reactions_change_the_etag(self):
+        self.client.get(self.url)
+        etag = self.client.get(self.url)["ETag"]
+        self.client.get(reverse("blog:post_like", args=[self.post.link]))
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+    
+    def test_views_change_the_etag_by_bucket(self):
+        self.client.get(self.url)
+        etag = self.client.get(self.url)["ETag"]
+        Posts.objects.filter(pk=self.post.pk).update(views_count=VIEWS_BUCKET - 1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        Posts.objects.filter(pk=self.post.pk).update(views_count=VIEWS_BUCKET)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+    
+    def test_etag_depends_on_the_viewer(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.login(username="otheruser", password="iamgroot")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_hidden_draft_is_never_validated(self):
+        url = reverse("blog:post", args=[self.draft.link])
+        etag = self.client.get(url)["ETag"]
+        
+        self.client.login(username="otheruser", password="iamgroot")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,137 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from authentication.models import Profile
+from blog.models import Posts, Comments
+from blog import fragments
+
+
+class FragmentKeysTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.posts = [
+            Posts.objects.create(author=cls.user, title=f"Title {item}", content="content", status="PB")
+            for item in range(3)
+        ]
+    
+    def setUp(self):
+        cache.clear()
+    
+    def keys(self):
+        posts = list(Posts.objects.for_feed())
+        page = fragments.prepare_cards(posts)
+        return page, {post.pk: post.fragment_key for post in posts}
+    
+    def test_keys_are_stable(self):
+        self.assertEqual(self.keys(), self.keys())
+    
+    def test_empty_page_has_no_fragment(self):
+        self.assertIsNone(fragments.prepare_cards([]))
+    
+    def test_saving_a_post_changes_its_card_and_the_page(self):
+        page, cards = self.keys()
+        self.posts[0].save(update=True)
+        new_page, new_cards = self.keys()
+        
+        self.assertNotEqual(page, new_page)
+        self.assertNotEqual(cards[self.posts[0].pk], new_cards[self.posts[0].pk])
+        self.assertEqual(cards[self.posts[1].pk], new_cards[self.posts[1].pk])
+    
+    def test_tagging_a_post_changes_its_card(self):
+        page, cards = self.keys()
+        self.posts[1].tags.add("python")
+        new_page, new_cards = self.keys()
+        
+        self.assertNotEqual(page, new_page)
+        self.assertNotEqual(cards[self.posts[1].pk], new_cards[self.posts[1].pk])
+    
+    def test_profile_change_changes_every_card_of_the_author(self):
+        page, cards = self.keys()
+        profile = Profile.objects.get(user=self.user)
+        profile.bio = "new bio"
+        profile.save()
+        new_page, new_cards = self.keys()
+        
+        self.assertNotEqual(page, new_page)
+        for post in self.posts:
+            self.assertNotEqual(cards[post.pk], new_cards[post.pk])
+    
+    def test_evicted_version_never_reuses_old_key(self):
+        page, cards = self.keys()
+        cache.clear()
+        new_page, new_cards = self.keys()
+        self.assertNotEqual(page, new_page)
+    
+    def test_comment_keys(self):
+        post = self.posts[0]
+        comment = Comments.objects.create(user=self.user, post=post, content="comment")
+        fragments.prepare_post(post, [comment])
+        post_key, key = post.fragment_key, comment.fragment_key
+        
+        comment.content = "edited"
+        comment.save()
+        fragments.prepare_post(post, [comment])
+        self.assertNotEqual(key, comment.fragment_key)
+        self.assertEqual(post_key, post.fragment_key)
+    
+    def test_renderer_change_changes_every_key(self):
+        page, cards = self.keys()
+        with override_settings(MARKDOWNIFY={"default": {"WHITELIST_TAGS": ["p"]}}):
+            new_page, new_cards = self.keys()
+        
+        self.assertNotEqual(page, new_page)
+        for post in self.posts:
+            self.assertNotEqual(cards[post.pk], new_cards[post.pk])
+
+
+class FragmentCacheViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.post = Posts.objects.create(author=cls.user, title="First title", content="content", status="PB")
+    
+    def setUp(self):
+        cache.clear()
+        # anonymous visitors get whole cached pages
+        self.client.login(username="testuser", password="iamgroot")
+    
+    def test_cached_page_skips_card_queries(self):
+        self.client.get(reverse("blog:home"))
+        # session, user, feed and the viewer's profile, the tags of cached cards are not prefetched
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("blog:home"))
+        self.assertContains(response, "First title")
+    
+    def test_edited_post_is_rendered_again(self):
+        self.client.get(reverse("blog:home"))
+        self.post.title = "Second title"
+        self.post.save(update=True)
+        
+        response = self.client.get(reverse("blog:home"))
+        self.assertContains(response, "Second title")
+        self.assertNotContains(response, "First title")
+    
+    def test_cached_post_page_skips_the_tags_query(self):
+        self.post.tags.add("python")
+        url = reverse("blog:post", args=[self.post.link])
+        self.client.get(url)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "python")
+        self.assertFalse([query for query in queries.captured_queries if "taggit_tag" in query["sql"]])
+    
+    def test_comments_are_rendered_from_the_cache(self):
+        Comments.objects.create(user=self.user, post=self.post, content="a comment")
+        url = reverse("blog:post", args=[self.post.link])
+        self.client.get(url)
+        
+        self.user.username = "renamed"
+        self.user.save()
+        response = self.client.get(url)
+        self.assertContains(response, "@renamed")
@@ -1,12 +1,17 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from unittest import mock
 from ..models import (
     Posts, random_string_generator,
     Comments, PostReactions, CommentReactions,
-    SavedPost)
+    SavedPost, allocate_link, allocate_links)
 from django.utils import timezone
 from taggit.models import Tag
 from django.contrib.auth.models import User
-from django.utils.text import slugify
+from django.utils.text import slugify, Truncator
+from ..rendering import renderer_version
+from authentication.models import Profile
 
 class PostsModelTest(TestCase):
     @classmethod
@@ -96,6 +101,47 @@ class PostsModelTest(TestCase):
         
         self.assertNotEqual(post1.link, post2.link)
         
+    def test_link_is_allocated_with_a_single_lookup(self):
+        author = User.objects.get(username="testuser")
+        Posts.objects.create(title="busy title", author=author)
+        
+        with CaptureQueriesContext(connection) as queries:
+            post = Posts.objects.create(title="busy title", author=author)
+        
+        lookups = [query for query in queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(lookups), 1)
+        self.assertTrue(post.link.startswith("busy-title-"))
+        
+    def test_resaving_a_post_keeps_its_link(self):
+        post = Posts.objects.get(title="Post one")
+        link = post.link
+        post.save()
+        
+        self.assertEqual(post.link, link)
+        
+    def test_save_retries_when_link_is_taken_concurrently(self):
+        author = User.objects.get(username="testuser")
+        taken = Posts.objects.get(title="Post one").link
+        
+        with mock.patch("blog.models.allocate_link", side_effect=[taken, "fresh-link"]):
+            post = Posts.objects.create(title="Post one", author=author)
+            
+        self.assertEqual(post.link, "fresh-link")
+        
+    def test_allocate_links_in_batch(self):
+        taken = Posts.objects.get(title="Post two").link
+        links = allocate_links(["Post two", "Post two", "Brand new"])
+        
+        self.assertEqual(len(set(links)), 3)
+        self.assertNotIn(taken, links)
+        self.assertIn("brand-new", links)
+        for link in links:
+            self.assertLessEqual(len(link), 250)
+            
+    def test_allocate_link_fits_long_titles(self):
+        link = allocate_link("word " * 100)
+        self.assertLessEqual(len(link), 250)
+        
         
 class CommentsModelTest(TestCase):
     @classmethod
@@ -250,4 +296,136 @@ class SavedPostModelTest(TestCase):
         saves = SavedPost.objects.all()
         published = Posts.published.all()
         
-        self.assertEqual(saves.count(), published.count())
\ No newline at end of file
+        self.assertEqual(saves.count(), published.count())
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="testuser", email="testuser@gmail.com", password="iamgroot")
+        cls.other = User.objects.create(username="otheruser", email="otheruser@gmail.com", password="iamgroot")
+        cls.post = Posts.objects.create(title="counted", content="content", author=cls.user, status="PB")
+        cls.draft = Posts.objects.create(title="draft", content="content", author=cls.user, status="DF")
+        
+    def test_post_likes_are_counted(self):
+        PostReactions.objects.create(user=self.user, post=self.post)
+        PostReactions.objects.create(user=self.user, post=self.post)
+        reaction = PostReactions.objects.create(user=self.other, post=self.post)
+        
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        
+        reaction.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        
+    def test_comments_are_counted(self):
+        comment = Comments.objects.create(user=self.user, post=self.post, content="first")
+        Comments.objects.create(user=self.other, post=self.post, content="second")
+        Comments.objects.create(user=self.other, post=self.draft, content="ignored")
+        
+        self.post.refresh_from_db()
+        self.draft.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+        self.assertEqual(self.draft.comments_count, 0)
+        
+        # editing a comment does not count it again
+        comment.content = "edited"
+        comment.save()
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        
+    def test_comment_likes_are_counted(self):
+        comment = Comments.objects.create(user=self.user, post=self.post, content="first")
+        reaction = CommentReactions.objects.create(user=self.other, comment=comment)
+        
+        comment.refresh_from_db()
+        self.assertEqual(comment.likes_count, 1)
+        
+        reaction.delete()
+        comment.refresh_from_db()
+        self.assertEqual(comment.likes_count, 0)
+        
+    def test_saves_are_counted(self):
+        saved = SavedPost.objects.create(user=self.other, post=self.post)
+        SavedPost.objects.create(user=self.other, post=self.draft)
+        
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.saves_count, 1)
+        
+        saved.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.saves_count, 0)
+    
+    def test_published_posts_are_counted_on_the_profile(self):
+        def count():
+            return Profile.objects.get(user=self.user).posts_count
+        self.assertEqual(count(), 1)
+        
+        self.draft.status = "PB"
+        self.draft.save(update=True)
+        self.assertEqual(count(), 2)
+        self.draft.status = "DF"
+        self.draft.save(update=True)
+        self.assertEqual(count(), 1)
+        
+        self.draft.delete()
+        self.assertEqual(count(), 1)
+        Posts.objects.get(pk=self.post.pk).delete()
+        self.assertEqual(count(), 0)
+    
+    def test_editing_a_stale_post_keeps_its_counters(self):
+        for update in (True, False):
+            post = Posts.objects.get(pk=self.post.pk)
+            PostReactions.objects.create(user=self.other if update else self.user, post=self.post)
+            Posts.objects.filter(pk=self.post.pk).update(views_count=5)
+            
+            # the instance was loaded before the like, then edited
+            post.title = f"edited {update}"
+            post.save(update=update)
+            post = Posts.objects.get(pk=self.post.pk)
+            self.assertEqual(post.title, f"edited {update}")
+            self.assertEqual(post.likes_count, 1 if update else 2)
+            self.assertEqual(post.views_count, 5)
+
+
+class RenderedContentTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="testuser", email="testuser@gmail.com", password="iamgroot")
+        
+    def test_html_is_rendered_on_save(self):
+        post = Posts.objects.create(title="md", content="# Hello\n\n<script>x</script>**bold**", author=self.user)
+        post.refresh_from_db()
+        
+        self.assertIn("<h1>Hello</h1>", post.content_html)
+        self.assertIn("<strong>bold</strong>", post.excerpt_html)
+        self.assertNotIn("<script>", post.content_html)
+        self.assertEqual(post.render_version, renderer_version())
+        
+        post.content = "edited"
+        post.save(update=True)
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, "<p>edited</p>")
+        
+    def test_excerpt_matches_card_filter(self):
+        content = "word " * 50
+        post = Posts.objects.create(title="long", content=content, author=self.user)
+        self.assertEqual(post.excerpt_html, f"<p>{Truncator(content).chars(100)}</p>")
+        
+    def test_stored_html_is_served_without_rendering(self):
+        post = Posts.objects.create(title="md", content="**bold**", author=self.user)
+        Posts.objects.filter(pk=post.pk).update(content_html="<p>stored</p>")
+        post.refresh_from_db()
+        
+        with mock.patch("blog.models.render_markdown") as render:
+            self.assertEqual(post.rendered_content, "<p>stored</p>")
+        render.assert_not_called()
+        
+    def test_stale_html_is_rendered_on_the_fly(self):
+        post = Posts.objects.create(title="md", content="**bold**", author=self.user)
+        
+        with override_settings(MARKDOWNIFY={"default": {"WHITELIST_TAGS": ["p"]}}):
+            self.assertNotEqual(post.render_version, renderer_version())
+            self.assertEqual(post.rendered_content, "<p>bold</p>")
+            self.assertEqual(post.rendered_excerpt, "<p>bold</p>")
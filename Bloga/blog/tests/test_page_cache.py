@@ -0,0 +1,122 @@
+from django.test import TestCase, RequestFactory
+from django.contrib import messages
+from django.contrib.auth.models import User, AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.urls import reverse
+
+from blog import views
+from blog.models import Posts
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.reader = User.objects.create_user(username="reader", password="iamgroot")
+        cls.post = Posts.objects.create(author=cls.user, title="First title", content="content", status="PB")
+        cls.post.tags.add("python")
+        cls.other = Posts.objects.create(author=cls.reader, title="Other title", content="content", status="PB")
+    
+    def setUp(self):
+        cache.clear()
+    
+    def assertCached(self, url, num=0):
+        self.client.get(url)
+        with self.assertNumQueries(num):
+            return self.client.get(url)
+    
+    def assertNotCached(self, url):
+        with self.assertRaises(AssertionError):
+            self.assertCached(url)
+    
+    def test_anonymous_pages_are_cached_and_tagged(self):
+        response = self.assertCached(reverse("blog:home"))
+        self.assertContains(response, "First title")
+        self.assertEqual(
+            set(response["Surrogate-Key"].split()),
+            {"feed", f"post:{self.post.pk}", f"post:{self.other.pk}", f"user:{self.user.pk}", f"user:{self.reader.pk}"},
+        )
+        
+        # only the conditional GET validators are queried
+        response = self.assertCached(reverse("blog:post", args=[self.post.link]), 1)
+        self.assertIn(f"post:{self.post.pk}", response["Surrogate-Key"].split())
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+        
+        response = self.assertCached(reverse("blog:tag", args=["python"]))
+        self.assertIn("tag:python", response["Surrogate-Key"].split())
+        self.assertCached(reverse("blog:profile", args=["testuser"]))
+    
+    def test_authenticated_pages_are_not_cached(self):
+        self.client.login(username="reader", password="iamgroot")
+        response = self.client.get(reverse("blog:home"))
+        self.assertNotIn("Surrogate-Key", response)
+        self.assertNotCached(reverse("blog:home"))
+    
+    def test_query_strings_are_cached_separately(self):
+        self.client.get(reverse("blog:home"))
+        response = self.client.get(reverse("blog:home") + "?after=bad")
+        self.assertEqual(response.status_code, 404)
+    
+    def test_comment_purges_the_post_only(self):
+        detail = reverse("blog:post", args=[self.post.link])
+        other = reverse("blog:post", args=[self.other.link])
+        self.client.get(detail)
+        self.client.get(other)
+        
+        self.client.login(username="reader", password="iamgroot")
+        self.client.post(reverse("blog:post_comment", args=[self.post.link]), {"content": "nice post"})
+        self.client.logout()
+        
+        self.assertContains(self.client.get(detail), "nice post")
+        with self.assertNumQueries(1):
+            self.client.get(other)
+    
+    def test_publishing_purges_the_feed_and_tags(self):
+        self.client.get(reverse("blog:home"))
+        self.client.get(reverse("blog:tag", args=["django"]))
+        
+        self.client.login(username="testuser", password="iamgroot")
+        self.client.post(reverse("blog:write"), {"title": "Brand new", "content": "content", "status": "PB", "tags": "django"})
+        self.client.logout()
+        
+        self.assertContains(self.client.get(reverse("blog:home")), "Brand new")
+        self.assertContains(self.client.get(reverse("blog:tag", args=["django"])), "Brand new")
+    
+    def test_editing_purges_pages_listing_the_post(self):
+        self.client.get(reverse("blog:profile", args=["testuser"]))
+        self.client.get(reverse("blog:tag", args=["python"]))
+        
+        self.client.login(username="testuser", password="iamgroot")
+        self.client.post(
+            reverse("blog:post_edit", args=[self.post.link]),
+            {"title": "Edited title", "content": "content", "status": "PB", "tags": "python"},
+        )
+        self.client.logout()
+        
+        self.assertContains(self.client.get(reverse("blog:profile", args=["testuser"])), "Edited title")
+        self.assertContains(self.client.get(reverse("blog:tag", args=["python"])), "Edited title")
+    
+    def test_api_writes_purge(self):
+        detail = reverse("blog:post", args=[self.post.link])
+        self.client.get(detail)
+        
+        self.client.login(username="reader", password="iamgroot")
+        self.client.post(reverse("comments-list"), {
+            "post": reverse("posts-detail", args=[self.post.link]),
+            "content": "from the api",
+        })
+        self.client.logout()
+        
+        self.assertContains(self.client.get(detail), "from the api")
+    
+    def test_pages_with_messages_are_not_cached(self):
+        request = RequestFactory().get(reverse("blog:home"))
+        request.user = AnonymousUser()
+        request._messages = CookieStorage(request)
+        messages.info(request, "A pending message")
+        
+        response = views.home(request)
+        self.assertContains(response, "A pending message")
+        self.assertNotIn("Surrogate-Key", response)
+        self.assertNotContains(self.client.get(reverse("blog:home")), "A pending message")
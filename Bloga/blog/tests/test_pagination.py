@@ -0,0 +1,119 @@
+import base64
+import json
+
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Posts
+from blog.pagination import paginate, encode_cursor, decode_cursor
+
+
+# well formed cursors whose values do not fit the ("-publish", "-id") keys
+CRAFTED = [
+    ["abc", 1],
+    [{"a": 1}, 1],
+    [[1], 2],
+    [{"dt": "2024-01-01T00:00:00+00:00"}, "x"],
+    [{"dt": "2024-01-01T00:00:00"}, 1],
+    [{"dt": "not a date"}, 1],
+    [{"dt": 1}, 1],
+    [{"dt": "2024-01-01T00:00:00+00:00"}, True],
+    [{"dt": "2024-01-01T00:00:00+00:00"}, 2 ** 64],
+]
+
+
+def craft(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="testuser", email="testuser@gmail.com", password="iamgroot")
+        for item in range(7):
+            Posts.objects.create(
+                author=cls.user,
+                title=f"Title {item}",
+                content=f"Content {item}",
+                status="PB" if item < 5 else "DF",
+            )
+        # posts published at the same instant are ordered by id
+        Posts.objects.filter(status="PB").update(publish=timezone.now())
+        
+    def setUp(self):
+        self.factory = RequestFactory()
+        
+    def walk(self, queryset, **kwargs):
+        pages = []
+        cursor = None
+        while True:
+            request = self.factory.get("/", {"after": cursor} if cursor else {})
+            page = paginate(request, queryset, per_page=2, **kwargs)
+            pages.append(list(page))
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+        
+    def test_cursor_round_trip(self):
+        now = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor([now, 3]), Posts, ("-publish", "-id")), [now, 3])
+        self.assertEqual(decode_cursor(encode_cursor([None, 3]), Posts, ("-publish", "-id")), [None, 3])
+        
+    def test_invalid_cursor_raises_404(self):
+        for cursor in ["not-a-cursor", encode_cursor([1])]:
+            with self.assertRaises(Http404):
+                decode_cursor(cursor, Posts, ("-publish", "-id"))
+        
+    def test_cursor_values_must_fit_their_keys(self):
+        for values in CRAFTED:
+            with self.subTest(values=values), self.assertRaises(Http404):
+                decode_cursor(craft(values), Posts, ("-publish", "-id"))
+        with self.assertRaises(Http404):
+            decode_cursor(encode_cursor([None]), Posts, ("-id",))
+        
+    def test_pages_cover_every_row_once(self):
+        pages = self.walk(Posts.published.all())
+        posts = [post for page in pages for post in page]
+        
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(posts, list(Posts.published.order_by("-publish", "-id")))
+        
+    def test_nullable_keys_list_nulls_last(self):
+        pages = self.walk(Posts.objects.filter(author=self.user), nullable=("publish",))
+        posts = [post for page in pages for post in page]
+        
+        self.assertEqual(len(posts), 7)
+        self.assertEqual(len(set(posts)), 7)
+        self.assertEqual([post.status for post in posts[-2:]], ["DF", "DF"])
+        
+    def test_page_is_fetched_without_count(self):
+        request = self.factory.get("/")
+        with CaptureQueriesContext(connection) as queries:
+            page = paginate(request, Posts.published.all(), per_page=2)
+        
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("COUNT(", queries[0]["sql"].upper())
+        self.assertTrue(page.has_next)
+        
+    @override_settings(BLOG_PAGE_SIZE=2)
+    def test_feed_views_follow_cursor(self):
+        response = self.client.get(reverse("blog:post_list"))
+        posts = response.context.get("posts")
+        self.assertContains(response, f"?after={posts.next_cursor}")
+        
+        response = self.client.get(reverse("blog:post_list"), {"after": posts.next_cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(set(response.context.get("posts")).isdisjoint(posts))
+        
+    def test_feed_views_reject_invalid_cursor(self):
+        response = self.client.get(reverse("blog:home"), {"after": "garbage"})
+        self.assertEqual(response.status_code, 404)
+        for values in CRAFTED:
+            with self.subTest(values=values):
+                response = self.client.get(reverse("blog:post_list"), {"after": craft(values)})
+                self.assertEqual(response.status_code, 404)
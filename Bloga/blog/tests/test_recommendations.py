@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Posts, PostNeighbor, PostReactions, SavedPost
+from blog import recommendations, toggles
+from blog.trending import LIKE_WEIGHT, SAVE_WEIGHT
+
+
+class NeighborsTest(TestCase):
+    def test_cosine_similarity_of_readers(self):
+        result = recommendations.neighbors([
+            (1, "a", 1), (1, "b", 1),
+            (2, "a", 1), (2, "b", 1), (2, "c", 1),
+            (3, "c", 1), (3, "d", 1),
+        ], size=2)
+        self.assertEqual([post for score, post in result["a"]], ["b", "c"])
+        self.assertAlmostEqual(result["a"][0][0], 1.0)
+        self.assertAlmostEqual(result["a"][1][0], 0.5)
+        self.assertEqual([post for score, post in result["d"]], ["c"])
+
+    def test_weights_add_up(self):
+        result = recommendations.neighbors([(1, "a", 1), (1, "a", 3), (1, "b", 4), (2, "b", 3)])
+        # (4 * 4) / (4 * 5)
+        self.assertAlmostEqual(result["a"][0][0], 0.8)
+
+    def test_only_the_latest_history_counts(self):
+        result = recommendations.neighbors([(1, "a", 1), (1, "b", 1), (1, "c", 1)], history=2)
+        self.assertNotIn("a", result)
+        self.assertEqual([post for score, post in result["b"]], ["c"])
+
+
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.readers = [User.objects.create_user(username=f"reader{item}", password="iamgroot") for item in range(3)]
+        cls.author = User.objects.create_user(username="author", password="iamgroot")
+        cls.posts = [
+            Posts.objects.create(author=cls.author, title=f"Post {item}", content="content", status="PB")
+            for item in range(4)
+        ]
+        first, second, third, fourth = cls.posts
+        for reader in cls.readers[:2]:
+            toggles.POST_LIKE.turn_on(reader, first.pk)
+            toggles.POST_LIKE.turn_on(reader, second.pk)
+        toggles.POST_SAVE.turn_on(cls.readers[1], third.pk)
+        toggles.POST_LIKE.turn_on(cls.readers[2], third.pk)
+        toggles.POST_LIKE.turn_on(cls.readers[2], fourth.pk)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rebuild(self):
+        posts, rows = recommendations.rebuild()
+        self.assertEqual(posts, 4)
+        self.assertEqual(PostNeighbor.objects.count(), rows)
+        self.assertEqual(recommendations.also_liked(self.posts[0]), [self.posts[1], self.posts[2]])
+
+        # rebuilding replaces the neighbours
+        toggles.POST_LIKE.turn_off(self.readers[2], self.posts[3].pk)
+        recommendations.rebuild()
+        self.assertEqual(recommendations.also_liked(self.posts[3]), [])
+
+    def test_drafts_are_not_recommended(self):
+        recommendations.rebuild()
+        Posts.objects.filter(pk=self.posts[1].pk).update(status="DF")
+        self.assertEqual(recommendations.also_liked(self.posts[0]), [self.posts[2]])
+
+    def test_likes_and_saves_are_read_by_date(self):
+        now = timezone.now()
+        reader = self.readers[1]
+        # the like of the first post is the oldest, then the save, then the like of the second post
+        PostReactions.objects.filter(user=reader, post=self.posts[0]).update(date=now - timedelta(days=3))
+        SavedPost.objects.filter(user=reader).update(date=now - timedelta(days=2))
+        PostReactions.objects.filter(user=reader, post=self.posts[1]).update(date=now - timedelta(days=1))
+        
+        read = [(post_id, weight) for user_id, post_id, weight in recommendations.interactions() if user_id == reader.pk]
+        self.assertEqual(read, [
+            (self.posts[0].pk, LIKE_WEIGHT), (self.posts[2].pk, SAVE_WEIGHT), (self.posts[1].pk, LIKE_WEIGHT),
+        ])
+        self.assertEqual(recommendations.history(reader, size=2), {self.posts[1].pk, self.posts[2].pk})
+    
+    def test_for_you_leaves_out_what_the_user_read(self):
+        recommendations.rebuild()
+        reader = self.readers[0]
+        # history, neighbours, posts and their tags
+        with self.assertNumQueries(5):
+            posts = recommendations.for_you(reader)
+        self.assertEqual(posts, [self.posts[2]])
+
+    def test_for_you_without_history_is_trending(self):
+        recommendations.rebuild()
+        self.assertEqual(len(recommendations.for_you(self.author)), 4)
+
+    def test_views(self):
+        recommendations.rebuild()
+        response = self.client.get(reverse("blog:post", args=[self.posts[0].link]))
+        self.assertContains(response, "Readers who liked this also liked")
+
+        self.client.login(username="reader0", password="iamgroot")
+        response = self.client.get(reverse("blog:for_you"))
+        self.assertContains(response, "Post 2")
+        self.assertNotContains(response, "Post 1")
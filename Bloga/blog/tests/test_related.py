@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from io import StringIO
+
+from blog.models import Posts, RelatedPost
+from blog import related
+
+
+class RelatedPostsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="author", password="iamgroot")
+        cls.python = cls.publish("Python", "python", "django", "web")
+        cls.django = cls.publish("Django", "django", "web")
+        cls.web = cls.publish("Web", "web")
+        cls.rust = cls.publish("Rust", "rust")
+
+    @classmethod
+    def publish(cls, title, *tags, status="PB"):
+        post = Posts.objects.create(author=cls.user, title=title, content="content", status=status)
+        post.tags.add(*tags)
+        related.refresh(post)
+        return post
+
+    def setUp(self):
+        cache.clear()
+
+    def test_similarity_is_weighted_jaccard(self):
+        weights = {1: 1.0, 2: 3.0}
+        self.assertEqual(related.similarity({1, 2}, {1, 2}, weights), 1)
+        self.assertEqual(related.similarity({1}, {1, 2}, weights), 0.25)
+        self.assertEqual(related.similarity({1}, {2}, weights), 0)
+
+    def test_rarer_tags_weigh_more(self):
+        tags = dict(self.python.tags.values_list("name", "id"))
+        weights = related.tag_weights(tags.values())
+        self.assertGreater(weights[tags["python"]], weights[tags["django"]])
+        self.assertGreater(weights[tags["django"]], weights[tags["web"]])
+
+    def test_related_posts_are_ranked(self):
+        self.assertEqual(related.related_posts(self.python), [self.django, self.web])
+        self.assertEqual(related.related_posts(self.web), [self.django, self.python])
+        self.assertEqual(related.related_posts(self.rust), [])
+
+    def test_related_posts_are_one_query(self):
+        with self.assertNumQueries(1):
+            related.related_posts(self.python)
+
+    def test_refresh_follows_tag_changes(self):
+        self.rust.tags.add("web")
+        related.refresh(self.rust)
+        self.assertIn(self.rust, related.related_posts(self.web))
+
+        self.rust.tags.set(["rust"])
+        related.refresh(self.rust)
+        self.assertNotIn(self.rust, related.related_posts(self.web))
+        self.assertFalse(RelatedPost.objects.filter(related=self.rust).exists())
+
+    def test_drafts_are_not_related(self):
+        draft = self.publish("Draft", "django", status="DF")
+        self.assertNotIn(draft, related.related_posts(self.django))
+        self.assertFalse(RelatedPost.objects.filter(post=draft).exists())
+
+    def test_rebuild_command(self):
+        RelatedPost.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_related_posts", stdout=out)
+        self.assertEqual(related.related_posts(self.python), [self.django, self.web])
+        self.assertIn("Refreshed the related posts of 4 posts", out.getvalue())
+
+    def test_post_detail_lists_related_posts(self):
+        response = self.client.get(reverse("blog:post", args=[self.python.link]))
+        self.assertEqual(response.context["related_posts"], [self.django, self.web])
+        self.assertContains(response, "Related posts")
+
+    def test_editing_tags_refreshes_related_posts(self):
+        self.client.login(username="author", password="iamgroot")
+        self.client.post(reverse("blog:post_edit", args=[self.rust.link]), {
+            "title": "Rust", "content": "content", "status": "PB", "tags": "rust,django",
+        })
+        self.assertIn(self.rust, related.related_posts(self.django))
+
+    @override_settings(RELATED_POSTS=1)
+    def test_only_the_best_related_posts_are_kept(self):
+        RelatedPost.objects.all().delete()
+        for post in (self.python, self.django, self.web, self.rust):
+            related.refresh(post)
+        self.assertEqual(related.related_posts(self.python), [self.django])
+        self.assertEqual(related.related_posts(self.web), [self.django])
+
+        # a new post ranking first for web pushes out its previous best
+        twin = self.publish("Twin", "web")
+        self.assertEqual(related.related_posts(self.web), [twin])
+        for post in (self.python, self.django, self.web, self.rust, twin):
+            self.assertLessEqual(RelatedPost.objects.filter(post=post).count(), 1)
+
+    def test_editing_without_tag_change_skips_refresh(self):
+        self.client.login(username="author", password="iamgroot")
+        with mock.patch("blog.views.related.refresh") as refresh:
+            self.client.post(reverse("blog:post_edit", args=[self.rust.link]), {
+                "title": "Rust edited", "content": "content", "status": "PB", "tags": "rust",
+            })
+        refresh.assert_not_called()
+
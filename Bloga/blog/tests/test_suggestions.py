@@ -0,0 +1,100 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from authentication.models import Follow, Profile
+from blog.models import Posts, FollowSuggestion, FollowSuggestionMark
+from blog import suggestions, tagging
+
+
+class SuggestionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {}
+        for name in ("reader", "friend", "pal", "author", "other", "stranger"):
+            cls.users[name] = User.objects.create_user(username=name, password="iamgroot")
+            Profile.objects.create(user=cls.users[name])
+        reader, friend, pal, author, other = (cls.users[name] for name in ("reader", "friend", "pal", "author", "other"))
+        Follow.objects.follow(reader, [friend, pal])
+        Follow.objects.follow(friend, [author, other])
+        Follow.objects.follow(pal, [author, reader])
+
+    def suggested(self, user):
+        return [(user.username, user.mutuals) for user in suggestions.suggested_users(user)]
+
+    def test_friends_of_friends_are_ranked_by_mutual_follows(self):
+        suggestions.rebuild()
+        self.assertEqual(self.suggested(self.users["reader"]), [("author", 2), ("other", 1)])
+
+    def test_popular_authors_are_suggested_to_new_users(self):
+        suggestions.rebuild()
+        self.assertEqual([user.username for user in suggestions.suggested_users(self.users["stranger"])][:1], ["author"])
+
+    def test_shared_tags_break_ties(self):
+        reader, other = self.users["reader"], self.users["other"]
+        tagging.set_tags(Posts.objects.create(author=reader, title="Mine", content="content", status="PB"), ["django"])
+        tagging.set_tags(Posts.objects.create(author=other, title="Theirs", content="content", status="PB"), ["django"])
+        Follow.objects.follow(self.users["pal"], [other])
+        suggestions.rebuild()
+        self.assertEqual(self.suggested(reader), [("other", 2), ("author", 2)])
+
+    def test_refresh_matches_rebuild(self):
+        suggestions.rebuild()
+        rebuilt = self.suggested(self.users["reader"])
+        FollowSuggestion.objects.all().delete()
+        suggestions.refresh(self.users["reader"])
+        self.assertEqual(self.suggested(self.users["reader"]), rebuilt)
+
+    def test_lists_are_bounded(self):
+        with self.settings(SUGGESTIONS_PER_USER=1):
+            suggestions.rebuild()
+        self.assertEqual(FollowSuggestion.objects.filter(user=self.users["reader"]).count(), 1)
+
+    def test_following_updates_the_suggestions(self):
+        self.client.login(username="reader", password="iamgroot")
+        suggestions.rebuild()
+        self.client.get(reverse("blog:user_follow", args=["author"]))
+        self.assertEqual(self.suggested(self.users["reader"]), [("other", 1)])
+
+        response = self.client.get(reverse("blog:suggested_users"))
+        self.assertContains(response, "@other")
+        self.assertNotContains(response, "@author")
+
+    def test_follows_update_the_suggestions_incrementally(self):
+        reader, stranger = self.users["reader"], self.users["stranger"]
+        Follow.objects.follow(stranger, [self.users["other"]])
+        suggestions.rebuild()
+        
+        # only the edges of the changed follows are read, nothing is recomputed
+        added = Follow.objects.follow(reader, [stranger])
+        suggestions.apply_follows(reader, added=added)
+        self.assertEqual(self.suggested(reader), [("author", 2), ("other", 2)])
+        
+        removed = Follow.objects.unfollow(reader, [self.users["friend"]])
+        suggestions.apply_follows(reader, removed=removed)
+        incremental = self.suggested(reader)
+        suggestions.refresh(reader)
+        self.assertEqual(incremental, self.suggested(reader))
+    
+    def test_unfollowed_authors_are_suggested_again(self):
+        reader, author = self.users["reader"], self.users["author"]
+        suggestions.rebuild()
+        suggestions.apply_follows(reader, added=Follow.objects.follow(reader, [author]))
+        self.assertEqual(self.suggested(reader), [("other", 1)])
+        
+        suggestions.apply_follows(reader, removed=Follow.objects.unfollow(reader, [author]))
+        self.assertEqual(self.suggested(reader), [("author", 2), ("other", 1)])
+    
+    def test_users_without_suggestions_are_not_recomputed(self):
+        loner = self.users["stranger"]
+        Profile.objects.update(followers_count=0)
+        self.assertEqual(suggestions.suggested_users(loner), [])
+        self.assertTrue(FollowSuggestionMark.objects.filter(user=loner).exists())
+        
+        # the mark, then the empty list
+        with self.assertNumQueries(2):
+            self.assertEqual(suggestions.suggested_users(loner), [])
+    
+    def test_suggestions_need_a_login(self):
+        response = self.client.get(reverse("blog:suggested_users"))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,69 @@
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import User
+from django.urls import reverse
+from taggit.models import Tag
+
+from blog.models import Posts
+from blog import tagging
+
+
+class TaggingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="author", password="iamgroot")
+        cls.post = Posts.objects.create(author=cls.user, title="Post", content="content", status="PB")
+
+    def test_names_are_normalized(self):
+        self.assertEqual(tagging.parse(" Django, python,,django ,Web "), ["django", "python", "web"])
+        self.assertEqual(tagging.parse(""), [])
+        self.assertEqual(tagging.parse(None), [])
+
+    def test_missing_tags_are_created_in_bulk(self):
+        Tag.objects.create(name="django")
+        with self.assertNumQueries(3):
+            tags = tagging.resolve(["django", "python", "web"])
+        self.assertEqual([tag.name for tag in tags], ["django", "python", "web"])
+        self.assertTrue(all(tag.pk for tag in tags))
+        self.assertEqual(Tag.objects.get(name="python").slug, "python")
+
+    def test_taken_slugs_fall_back_to_taggit(self):
+        Tag.objects.create(name="c", slug="c")
+        [tag] = tagging.resolve(["c++"])
+        self.assertEqual(tag.name, "c++")
+        self.assertNotEqual(tag.slug, "c")
+
+    def test_set_tags(self):
+        tagging.set_tags(self.post, ["django", "python"])
+        self.assertEqual(set(self.post.tags.names()), {"django", "python"})
+
+        self.assertTrue(tagging.set_tags(self.post, ["python", "web"]))
+        self.assertEqual(set(self.post.tags.names()), {"python", "web"})
+        self.assertFalse(tagging.set_tags(self.post, ["web", "python"]))
+
+        tagging.set_tags(self.post, [])
+        self.assertFalse(self.post.tags.exists())
+
+    def test_queries_do_not_grow_with_tags(self):
+        names = [f"tag{item}" for item in range(20)]
+        Tag.objects.bulk_create([Tag(name=name, slug=name) for name in names[:10]])
+        ContentType.objects.get_for_model(Posts)
+        # tags, insert, new tags, current rows, insert rows
+        with self.assertNumQueries(5):
+            tagging.set_tags(self.post, names)
+        self.assertEqual(self.post.tags.count(), 20)
+
+    def test_write_view_queries_do_not_grow_with_tags(self):
+        self.client.login(username="author", password="iamgroot")
+        queries = []
+        for count in (2, 20):
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(reverse("blog:write"), {
+                    "title": f"{count} tags", "content": "content", "status": "PB",
+                    "tags": ",".join(f"tag{count}_{item}" for item in range(count)),
+                })
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(Posts.objects.get(title="20 tags").tags.count(), 20)
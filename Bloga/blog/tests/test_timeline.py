@@ -0,0 +1,113 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test.client import RequestFactory
+from django.urls import reverse
+
+from authentication.models import Profile
+from blog.models import Posts, TimelineEntry
+from blog import timeline
+from blog.tests.test_pagination import CRAFTED, craft
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="iamgroot")
+        cls.reader = User.objects.create_user(username="reader", password="iamgroot")
+        cls.stranger = User.objects.create_user(username="stranger", password="iamgroot")
+        for user in (cls.author, cls.reader, cls.stranger):
+            Profile.objects.create(user=user)
+        cls.reader.profile.follow(cls.author.profile)
+    
+    def publish(self, title, author=None, status="PB"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Posts.objects.create(author=author or self.author, title=title, content="content", status=status)
+    
+    def page(self, user, after=None, per_page=None):
+        request = RequestFactory().get("/feed/", {"after": after} if after else {})
+        return timeline.timeline_page(request, user, per_page=per_page)
+    
+    def test_publishing_fans_out_to_followers(self):
+        post = self.publish("Fresh")
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.stranger).exists())
+    
+    def test_drafts_fan_out_when_published(self):
+        post = self.publish("Draft", status="DF")
+        self.assertFalse(TimelineEntry.objects.exists())
+        
+        post.status = "PB"
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save(update=True)
+        self.assertIsNotNone(post.publish)
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        
+        post.status = "DF"
+        post.save(update=True)
+        self.assertIsNone(post.publish)
+        self.assertFalse(TimelineEntry.objects.exists())
+    
+    @override_settings(TIMELINE_FANOUT_BATCH_SIZE=1)
+    def test_fan_out_in_batches(self):
+        self.stranger.profile.follow(self.author.profile)
+        self.publish("Fresh")
+        self.assertEqual(TimelineEntry.objects.count(), 2)
+    
+    def test_page_is_keyset_paginated(self):
+        posts = [self.publish(f"Post {item}") for item in range(5)]
+        self.publish("Stranger's post", author=self.stranger)
+        
+        first = self.page(self.reader, per_page=3)
+        second = self.page(self.reader, after=first.next_cursor, per_page=3)
+        self.assertEqual(list(first) + list(second), posts[::-1])
+        self.assertFalse(second.has_next)
+    
+    @override_settings(TIMELINE_PULL_THRESHOLD=0)
+    def test_celebrity_posts_are_pulled_on_read(self):
+        post = self.publish("Famous")
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(list(self.page(self.reader)), [post])
+    
+    @override_settings(TIMELINE_PULL_THRESHOLD=1)
+    def test_celebrities_are_told_by_their_follower_count(self):
+        self.assertFalse(timeline.is_celebrity(self.author.pk))
+        # the denormalized count decides, the follower edges are never counted
+        Profile.objects.filter(user=self.author).update(followers_count=2)
+        self.assertTrue(timeline.is_celebrity(self.author.pk))
+        with self.assertNumQueries(1):
+            self.assertEqual(timeline.followed_celebrities(self.reader), [self.author.pk])
+    
+    def test_follow_and_unfollow_update_the_timeline(self):
+        post = self.publish("Stranger's post", author=self.stranger)
+        self.client.login(username="reader", password="iamgroot")
+        
+        self.client.get(reverse("blog:user_follow", args=["stranger"]))
+        self.assertEqual(list(self.page(self.reader)), [post])
+        
+        self.client.get(reverse("blog:user_unfollow", args=["stranger"]))
+        self.assertEqual(list(self.page(self.reader)), [])
+    
+    def test_feed_view(self):
+        post = self.publish("Fresh")
+        self.client.login(username="reader", password="iamgroot")
+        response = self.client.get(reverse("blog:feed"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["posts"]), [post])
+    
+    def test_feed_view_rejects_invalid_cursor(self):
+        self.client.login(username="reader", password="iamgroot")
+        for values in CRAFTED:
+            with self.subTest(values=values):
+                response = self.client.get(reverse("blog:feed"), {"after": craft(values)})
+                self.assertEqual(response.status_code, 404)
+    
+    def test_backfill_and_trim_commands(self):
+        posts = [self.publish(f"Post {item}") for item in range(4)]
+        TimelineEntry.objects.all().delete()
+        
+        call_command("backfill_timelines", stdout=open("/dev/null", "w"))
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 4)
+        
+        call_command("trim_timelines", keep=2, stdout=open("/dev/null", "w"))
+        self.assertEqual(list(self.page(self.reader)), posts[:1:-1])
@@ -0,0 +1,77 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from blog.models import Posts, Comments, PostReactions, CommentReactions, SavedPost
+from blog import toggles
+
+
+class ToggleTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="iamgroot")
+        cls.author = User.objects.create_user(username="author", password="iamgroot")
+        cls.post = Posts.objects.create(author=cls.author, title="Post", content="content", status="PB")
+        cls.comment = Comments.objects.create(user=cls.author, post=cls.post, content="comment")
+
+    def test_turning_on_is_idempotent(self):
+        self.assertTrue(toggles.POST_LIKE.turn_on(self.user, self.post.pk))
+        self.assertFalse(toggles.POST_LIKE.turn_on(self.user, self.post.pk))
+        self.assertEqual(PostReactions.objects.filter(post=self.post).count(), 1)
+        self.assertEqual(toggles.POST_LIKE.count(self.post.pk), 1)
+
+    def test_turning_off_is_idempotent(self):
+        toggles.POST_SAVE.turn_on(self.user, self.post.pk)
+        self.assertTrue(toggles.POST_SAVE.turn_off(self.user, self.post.pk))
+        self.assertFalse(toggles.POST_SAVE.turn_off(self.user, self.post.pk))
+        self.assertFalse(SavedPost.objects.exists())
+        self.assertEqual(toggles.POST_SAVE.count(self.post.pk), 0)
+
+    def test_flip(self):
+        self.assertTrue(toggles.COMMENT_LIKE.flip(self.user, self.comment.pk))
+        self.assertEqual(toggles.COMMENT_LIKE.count(self.comment.pk), 1)
+        self.assertFalse(toggles.COMMENT_LIKE.flip(self.user, self.comment.pk))
+        self.assertFalse(CommentReactions.objects.exists())
+        self.assertEqual(toggles.COMMENT_LIKE.count(self.comment.pk), 0)
+
+    def test_turning_off_is_one_delete(self):
+        toggles.COMMENT_LIKE.turn_on(self.user, self.comment.pk)
+        # savepoint, delete, counter update, release
+        with self.assertNumQueries(4):
+            toggles.COMMENT_LIKE.turn_off(self.user, self.comment.pk)
+        with self.assertNumQueries(3):
+            toggles.COMMENT_LIKE.turn_off(self.user, self.comment.pk)
+
+
+class ToggleViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="iamgroot")
+        cls.post = Posts.objects.create(author=cls.user, title="Post", content="content", status="PB")
+        cls.draft = Posts.objects.create(author=cls.user, title="Draft", content="content")
+        cls.comment = Comments.objects.create(user=cls.user, post=cls.post, content="comment")
+
+    def setUp(self):
+        self.client.login(username="reader", password="iamgroot")
+
+    def test_put_and_delete_answer_with_the_state(self):
+        url = reverse("blog:post_like", args=[self.post.link])
+        for expected in ({"active": True, "count": 1}, {"active": True, "count": 1}):
+            response = self.client.put(url)
+            self.assertEqual(response.json(), expected)
+        for expected in ({"active": False, "count": 0}, {"active": False, "count": 0}):
+            response = self.client.delete(url)
+            self.assertEqual(response.json(), expected)
+
+    def test_bookmarks_and_comment_likes(self):
+        response = self.client.put(reverse("blog:post_save", args=[self.post.link]))
+        self.assertEqual(response.json(), {"active": True, "count": 1})
+        response = self.client.put(reverse("blog:comment_like", args=[self.comment.pk]))
+        self.assertEqual(response.json(), {"active": True, "count": 1})
+        response = self.client.delete(reverse("blog:comment_like", args=[self.comment.pk]))
+        self.assertEqual(response.json(), {"active": False, "count": 0})
+
+    def test_drafts_can_not_be_liked(self):
+        response = self.client.put(reverse("blog:post_like", args=[self.draft.link]))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(PostReactions.objects.exists())
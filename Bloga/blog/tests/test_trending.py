@@ -0,0 +1,135 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from io import StringIO
+
+from blog.models import Posts, PostReactions, Comments, SavedPost
+from blog import tagging, trending
+
+
+class HotScoreTest(TestCase):
+    def test_engagement_is_log_scaled(self):
+        publish = trending.EPOCH
+        self.assertEqual(trending.hot_score(0, 0, 0, publish), 0)
+        self.assertAlmostEqual(trending.hot_score(10, 0, 0, publish), 1)
+        self.assertAlmostEqual(trending.hot_score(0, 50, 0, publish), 2)
+
+    @override_settings(TRENDING_DECAY=3600)
+    def test_newer_posts_need_less_engagement(self):
+        older = trending.hot_score(10, 0, 0, trending.EPOCH)
+        newer = trending.hot_score(1, 0, 0, trending.EPOCH + timedelta(hours=1))
+        self.assertAlmostEqual(older, newer)
+
+    def test_unpublished_posts_score_zero(self):
+        self.assertEqual(trending.hot_score(100, 100, 100, None), 0)
+
+
+# a day old post needs only 10 ** 0.1 times the engagement of a new one
+@override_settings(TRENDING_SIZE=2, TRENDING_DECAY=60 * 60 * 24 * 10)
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="iamgroot")
+        cls.readers = [User.objects.create_user(username=f"reader{item}", password="iamgroot") for item in range(3)]
+        cls.old = Posts.objects.create(author=cls.author, title="Old", content="content", status="PB")
+        cls.new = Posts.objects.create(author=cls.author, title="New", content="content", status="PB")
+        cls.old.tags.add("django")
+        Posts.objects.filter(pk=cls.old.pk).update(publish=cls.old.publish - timedelta(days=1))
+        cls.old.refresh_from_db()
+        cls.old.save(update=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_publishing_sets_the_score(self):
+        self.assertGreater(self.new.hot_score, self.old.hot_score)
+        draft = Posts.objects.create(author=self.author, title="Draft", content="content")
+        self.assertEqual(draft.hot_score, 0)
+
+    def test_engagement_updates_the_score(self):
+        before = self.old.hot_score
+        PostReactions.objects.create(post=self.old, user=self.readers[0])
+        Comments.objects.create(post=self.old, user=self.readers[0], content="Nice")
+        SavedPost.objects.create(post=self.old, user=self.readers[0])
+        self.old.refresh_from_db()
+        self.assertAlmostEqual(self.old.hot_score, before + 0.77815125)
+
+        PostReactions.objects.get(post=self.old).delete()
+        self.old.refresh_from_db()
+        self.assertAlmostEqual(self.old.hot_score, before + 0.69897000)
+
+    def test_lists_are_updated_incrementally(self):
+        self.assertEqual(trending.trending(), [self.new, self.old])
+        self.assertEqual(trending.trending(tag="django"), [self.old])
+
+        for reader in self.readers:
+            Comments.objects.create(post=self.old, user=reader, content="Nice")
+        # the cached list moved the post, only the posts are loaded
+        with self.assertNumQueries(1):
+            self.assertEqual(trending.trending(posts=Posts.published.all()), [self.old, self.new])
+
+    def test_lists_are_bounded(self):
+        third = Posts.objects.create(author=self.author, title="Third", content="content", status="PB")
+        trending.trending()
+        for title in ("Newer", "Newest"):
+            post = Posts.objects.create(author=self.author, title=title, content="content", status="PB")
+            trending.offer(post.pk, post.hot_score)
+        
+        entries = cache.get(trending._list_key())
+        self.assertEqual(len(entries), trending.capacity())
+        self.assertNotIn(self.old.pk, [post_id for post_id, score in entries])
+        self.assertEqual(trending.trending(), [post, Posts.objects.get(title="Newer")])
+
+    def test_lists_are_changed_under_their_lock(self):
+        trending.trending()
+        key = trending._list_key()
+        post = Posts.objects.create(author=self.author, title="Newer", content="content", status="PB")
+        trending.offer(post.pk, post.hot_score)
+        self.assertIsNone(cache.get(f"{key}:lock"))
+        self.assertEqual(cache.get(key)[0], [post.pk, post.hot_score])
+        
+        # a writer that can not take the lock drops the list rather than overwrite it blindly
+        cache.add(f"{key}:lock", 1)
+        with mock.patch.object(trending, "LOCK_TIMEOUT", 0):
+            trending.offer(self.old.pk, post.hot_score + 1)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(trending.trending(), [post, self.new])
+
+    def test_unpublished_posts_are_skipped(self):
+        trending.trending()
+        self.new.status = "DF"
+        self.new.save(update=True)
+        self.assertEqual(trending.trending(), [self.old])
+
+    def test_retagging_moves_the_post_between_tag_lists(self):
+        trending.trending(tag="django")
+        trending.trending(tag="flask")
+        tagging.set_tags(self.old, ["flask"])
+        
+        self.assertEqual(cache.get(trending._list_key("django")), [])
+        self.assertEqual(cache.get(trending._list_key("flask")), [[self.old.pk, self.old.hot_score]])
+        self.assertEqual(trending.trending(tag="flask"), [self.old])
+
+    def test_refresh_rebuilds_recent_lists(self):
+        cache.set(trending._list_key(), [])
+        Posts.objects.filter(pk=self.old.pk).update(likes_count=1000)
+        
+        out = StringIO()
+        call_command("refresh_trending", stdout=out)
+        self.old.refresh_from_db()
+        self.assertEqual(cache.get(trending._list_key()), [[self.old.pk, self.old.hot_score], [self.new.pk, self.new.hot_score]])
+        self.assertEqual(cache.get(trending._list_key("django")), [[self.old.pk, self.old.hot_score]])
+        self.assertIn("Rebuilt 2 trending lists", out.getvalue())
+
+    def test_views(self):
+        response = self.client.get(reverse("blog:trending"))
+        self.assertEqual(list(response.context["posts"]), [self.new, self.old])
+
+        response = self.client.get(reverse("blog:tag_trending", args=["django"]))
+        self.assertEqual(list(response.context["posts"]), [self.old])
+        self.assertContains(response, "Trending")
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from blog.models import Posts
+from blog import view_counts
+from blog.view_counts import BloomFilter, ViewBuffer
+
+
+class BloomFilterTest(TestCase):
+    def test_membership(self):
+        seen = BloomFilter(1000, 0.01)
+        self.assertFalse(seen.add("user:1:first-post"))
+        self.assertTrue(seen.add("user:1:first-post"))
+        self.assertFalse(seen.add("user:2:first-post"))
+
+    def test_false_positive_rate(self):
+        seen = BloomFilter(1000, 0.01)
+        for item in range(1000):
+            seen.add(f"added:{item}")
+        self.assertTrue(all(f"added:{item}" in seen for item in range(1000)))
+        false_positives = sum(f"other:{item}" in seen for item in range(1000))
+        self.assertLess(false_positives, 30)
+        self.assertEqual(len(seen.bits), 1199)
+
+
+class ViewBufferTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.posts = [
+            Posts.objects.create(author=cls.user, title=f"Post {item}", content="content", status="PB")
+            for item in range(3)
+        ]
+        cls.draft = Posts.objects.create(author=cls.user, title="Draft", content="content")
+
+    def setUp(self):
+        self.buffer = ViewBuffer()
+        patcher = mock.patch.object(view_counts, "buffer", self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def views(self, post):
+        post.refresh_from_db(fields=["views_count"])
+        return post.views_count
+
+    def test_viewers_count_once_per_window(self):
+        first, second, third = self.posts
+        self.assertTrue(self.buffer.record("user:1", first.link))
+        self.assertFalse(self.buffer.record("user:1", first.link))
+        self.assertTrue(self.buffer.record("user:2", first.link))
+        self.assertTrue(self.buffer.record("user:1", second.link))
+        self.assertEqual(self.views(first), 0)
+
+        with override_settings(VIEW_DEDUP_WINDOW=0):
+            self.assertTrue(self.buffer.record("user:1", first.link))
+
+    @override_settings(VIEW_FLUSH_BATCH_SIZE=2)
+    def test_flush_is_one_update_per_batch(self):
+        for viewer in range(3):
+            for post in self.posts:
+                self.buffer.record(f"user:{viewer}", post.link)
+        self.buffer.record("user:0", self.draft.link)
+
+        # one UPDATE per batch, then the posts and 4 writes folding the views into the day's stats
+        with self.assertNumQueries(7):
+            self.assertEqual(self.buffer.flush(), 10)
+        self.assertEqual([self.views(post) for post in self.posts], [3, 3, 3])
+        self.assertEqual(self.views(self.draft), 0)
+        with self.assertNumQueries(0):
+            self.buffer.flush()
+
+    def test_views_are_counted_after_the_response(self):
+        url = reverse("blog:post", args=[self.posts[0].link])
+        with override_settings(VIEW_FLUSH_INTERVAL=3600):
+            self.client.get(url)
+        self.assertEqual(self.views(self.posts[0]), 0)
+        self.assertEqual(self.buffer.counts[self.posts[0].link], 1)
+
+        # a second visit by the same viewer does not count, the third by someone else flushes
+        with override_settings(VIEW_FLUSH_INTERVAL=0):
+            self.client.get(url)
+            self.assertEqual(self.views(self.posts[0]), 0)
+            self.client.login(username="testuser", password="iamgroot")
+            response = self.client.get(url)
+        self.assertEqual(self.views(self.posts[0]), 2)
+        self.assertContains(response, "fa-eye")
+
+    @override_settings(VIEW_FLUSH_INTERVAL=0)
+    def test_api_views_are_counted(self):
+        url = reverse("posts-detail", args=[self.posts[1].link])
+        self.client.get(url)
+        self.assertEqual(self.views(self.posts[1]), 1)
+        self.assertEqual(self.client.get(url).data["views_count"], 1)
+
+    @override_settings(VIEW_FLUSH_INTERVAL=0)
+    def test_missing_posts_are_not_counted(self):
+        self.client.get(reverse("blog:post", args=["missing"]))
+        self.assertFalse(self.buffer.counts)
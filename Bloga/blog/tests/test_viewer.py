@@ -0,0 +1,64 @@
+from django.test import TestCase
+from django.contrib.auth.models import User, AnonymousUser
+from django.urls import reverse
+
+from blog.models import Posts, Comments, PostReactions, CommentReactions, SavedPost
+from blog.viewer import ViewerState
+
+
+class ViewerStateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.other = User.objects.create_user(username="otheruser", password="iamgroot")
+        cls.posts = [
+            Posts.objects.create(author=cls.other, title=f"Title {item}", content="content", status="PB")
+            for item in range(3)
+        ]
+        cls.comments = [
+            Comments.objects.create(user=cls.other, post=cls.posts[0], content=f"comment {item}")
+            for item in range(3)
+        ]
+        PostReactions.objects.create(user=cls.user, post=cls.posts[0])
+        SavedPost.objects.create(user=cls.user, post=cls.posts[1])
+        CommentReactions.objects.create(user=cls.user, comment=cls.comments[2])
+        # reactions of other users are ignored
+        PostReactions.objects.create(user=cls.other, post=cls.posts[2])
+        
+    def test_state_is_loaded_with_one_query_per_relation(self):
+        with self.assertNumQueries(3):
+            viewer = ViewerState(self.user).load(posts=self.posts, comments=self.comments)
+            
+        with self.assertNumQueries(0):
+            self.assertEqual([viewer.likes_post(post) for post in self.posts], [True, False, False])
+            self.assertEqual([viewer.saved_post(post) for post in self.posts], [False, True, False])
+            self.assertEqual([viewer.likes_comment(comment) for comment in self.comments], [False, False, True])
+    
+    def test_objects_not_loaded_up_front_are_resolved_lazily(self):
+        viewer = ViewerState(self.user)
+        self.assertTrue(viewer.likes_post(self.posts[0]))
+        self.assertTrue(viewer.likes_comment(self.comments[2]))
+        
+    def test_anonymous_viewer_never_queries(self):
+        for user in [None, AnonymousUser()]:
+            with self.assertNumQueries(0):
+                viewer = ViewerState(user).load(posts=self.posts, comments=self.comments)
+                self.assertFalse(viewer.likes_post(self.posts[0]))
+                self.assertFalse(viewer.saved_post(self.posts[1]))
+                self.assertFalse(viewer.likes_comment(self.comments[2]))
+    
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        self.client.login(username="testuser", password="iamgroot")
+        url = reverse("blog:post", kwargs={"link": self.posts[0].link})
+        
+        self.client.get(url)
+        # the conditional GET validators, the related posts and the also liked posts add one query each,
+        # the tags come with the cached post body
+        with self.assertNumQueries(12):
+            response = self.client.get(url)
+        self.assertContains(response, "fa-solid fa-heart", count=2)
+            
+        for item in range(10):
+            Comments.objects.create(user=self.other, post=self.posts[0], content=f"more {item}")
+        with self.assertNumQueries(12):
+            self.client.get(url)
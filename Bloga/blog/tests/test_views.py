@@ -1,6 +1,9 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from blog.models import *
 from blog.forms import *
 from authentication.models import *
@@ -12,6 +15,10 @@ import io
 from PIL import Image
 
 class HomeViewTest(TestCase):
+    def setUp(self):
+        # anonymous pages are cached across tests
+        cache.clear()
+    
     @classmethod
     def setUpTestData(cls):
         user = User.objects.create_user(
@@ -35,7 +42,7 @@ class HomeViewTest(TestCase):
         response = self.client.get(reverse("blog:home"))
         posts = response.context.get('posts')
         
-        self.assertNotEqual(posts.count(), 0, "posts are not being loaded")
+        self.assertNotEqual(len(posts), 0, "posts are not being loaded")
         for post in posts:
             self.assertEqual(post.status, "PB")
     
@@ -132,6 +139,10 @@ class PostWriteViewTest(TestCase):
         
         
 class PostListViewTest(TestCase):
+    def setUp(self):
+        # anonymous pages are cached across tests
+        cache.clear()
+    
     @classmethod
     def setUpTestData(cls):
         user = User.objects.create_user(
@@ -155,7 +166,7 @@ class PostListViewTest(TestCase):
         response = self.client.get(reverse("blog:post_list"))
         posts = response.context.get('posts')
         
-        self.assertNotEqual(posts.count(), 0, "posts are not being loaded")
+        self.assertNotEqual(len(posts), 0, "posts are not being loaded")
         for post in posts:
             self.assertEqual(post.status, "PB")
     
@@ -176,6 +187,10 @@ class PostListViewTest(TestCase):
         
         
 class PostDetailViewTest(TestCase):
+    def setUp(self):
+        # anonymous pages are cached across tests
+        cache.clear()
+    
     @classmethod
     def setUpTestData(cls):
         user = User.objects.create_user(
@@ -967,6 +982,10 @@ class TagListViewTest(TestCase):
         
 
 class TagViewTest(TestCase):
+    def setUp(self):
+        # anonymous pages are cached across tests
+        cache.clear()
+    
     @classmethod
     def setUpTestData(cls):
         user = User.objects.create_user(
@@ -1044,7 +1063,7 @@ class UserListViewTest(TestCase):
         users = response.context.get('users')
         users_list = User.objects.all()
         
-        self.assertEqual(users.count(), users_list.count())
+        self.assertEqual(len(users), users_list.count())
 
     def test_user_is_not_loaded_in_context_without_authentication(self):
         response = self.client.get(reverse("blog:user_list"))
@@ -1151,6 +1170,17 @@ class UserFollowersViewTest(TestCase):
         
         for user in users:
             self.assertIn(user, profile.followers.all())
+    
+    @override_settings(BLOG_PAGE_SIZE=4)
+    def test_view_pages_through_followers_newest_first(self):
+        url = reverse("blog:user_followers", kwargs={"username": "testuser"})
+        first = self.client.get(url).context['users']
+        self.assertTrue(first.has_next)
+        second = self.client.get(url, {"after": first.next_cursor}).context['users']
+        self.assertFalse(second.has_next)
+        
+        followers = [user.username for user in list(first) + list(second)]
+        self.assertEqual(followers, [f"testuser{item}" for item in reversed(range(6))])
                     
     def test_user_is_not_loaded_in_context_without_authentication(self):
         response = self.client.get(reverse("blog:user_followers", kwargs={"username": "testuser"}))
@@ -1423,6 +1453,10 @@ class UserFavoritesViewTest(TestCase):
         
 
 class ProfileViewTest(TestCase):
+    def setUp(self):
+        # anonymous pages are cached across tests
+        cache.clear()
+    
     @classmethod
     def setUpTestData(cls):
         # Create two users
@@ -1513,6 +1547,13 @@ class ProfileViewTest(TestCase):
         response = self.client.get(reverse("blog:profile", kwargs={"username": "testuser"}))
         user = response.context.get('user')
         self.assertIsNone(user)
+    
+    def test_view_shows_the_stored_post_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("blog:profile", kwargs={"username": "otheruser"}))
+        self.assertContains(response, '<span class="font-semibold">1</span> posts')
+        # the total is read from the profile, the posts are never counted
+        self.assertFalse([query for query in queries.captured_queries if "COUNT(" in query["sql"]])
 
 
 class UserFollowViewTest(TestCase):
@@ -1612,3 +1653,57 @@ class UserUnfollowViewTest(TestCase):
         self.assertRedirects(response, reverse("blog:profile", kwargs={"username": "otheruser"}))
 
 
+
+
+class FeedQueryCountTest(TestCase):
+    """The number of queries of a feed page does not depend on the number of posts on it"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+    
+    def setUp(self):
+        cache.clear()
+        
+    def create_posts(self, count):
+        for item in range(count):
+            author = User.objects.create(username=f"author{Posts.objects.count()}")
+            Profile.objects.create(user=author, bio="bio")
+            post = Posts.objects.create(
+                author=author,
+                title=f"Title {item}",
+                content=f"Content {item}",
+                status="PB",
+            )
+            post.tags.add("first", f"tag{item}")
+            SavedPost.objects.create(user=self.user, post=post)
+            PostReactions.objects.create(user=self.user, post=post)
+    
+    def assertConstantQueries(self, url, num):
+        self.create_posts(2)
+        with self.assertNumQueries(num):
+            self.client.get(url)
+        
+        self.create_posts(6)
+        # posts created through the ORM do not purge the anonymous page cache
+        cache.clear()
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context.get('posts')), 8)
+    
+    def test_home_query_count(self):
+        self.assertConstantQueries(reverse("blog:home"), 2)
+        
+    def test_posts_list_query_count(self):
+        self.assertConstantQueries(reverse("blog:post_list"), 2)
+    
+    def test_tag_query_count(self):
+        self.assertConstantQueries(reverse("blog:tag", kwargs={"name": "first"}), 2)
+        
+    def test_saved_and_favorites_query_count(self):
+        self.client.login(username="testuser", password="iamgroot")
+        # session, viewer, profile owner, page of bookmarks, posts, tags, viewer profile
+        self.assertConstantQueries(reverse("blog:user_saved", kwargs={"username": "testuser"}), 7)
+        
+        # the same cards were cached by the saved page, so their tags are not loaded
+        with self.assertNumQueries(6):
+            self.client.get(reverse("blog:user_favorites", kwargs={"username": "testuser"}))
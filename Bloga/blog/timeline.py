@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+from authentication.models import Follow, Profile
+from .models import Posts, TimelineEntry
+from .pagination import KeysetPage, decode_cursor, encode_cursor, keyset_filter
+
+TIMELINE_KEYS = ("-publish", "-post_id")
+POST_KEYS = ("-publish", "-id")
+
+
+def is_celebrity(author_id):
+    """Whether the posts of an author are pulled when timelines are read instead of fanned out"""
+    return Profile.objects.filter(user_id=author_id, followers_count__gt=settings.TIMELINE_PULL_THRESHOLD).exists()
+
+
+def followed_celebrities(user):
+    """The ids of the followed authors whose posts are not fanned out, from their denormalized follower counts"""
+    return list(
+        Follow.objects.filter(follower=user, followee__profile__followers_count__gt=settings.TIMELINE_PULL_THRESHOLD)
+        .values_list("followee_id", flat=True)
+    )
+
+
+def fan_out(post):
+    """
+    Write a newly published post into the timelines of its author's followers,
+    one batch of followers per INSERT. Posts of celebrities are skipped, their
+    followers pull them when reading.
+    """
+    if post.status != Posts.Status.PUBLISHED or is_celebrity(post.author_id):
+        return 0
+
+    batch_size = settings.TIMELINE_FANOUT_BATCH_SIZE
+    followers = Follow.objects.filter(followee_id=post.author_id).order_by("follower_id")
+    written = 0
+    last_id = 0
+    while True:
+        batch = list(
+            followers.filter(follower_id__gt=last_id)
+            .values_list("follower_id", flat=True)[:batch_size]
+        )
+        if not batch:
+            return written
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post=post, publish=post.publish) for user_id in batch],
+            ignore_conflicts=True,
+        )
+        written += len(batch)
+        last_id = batch[-1]
+
+
+def backfill(user, authors=None, limit=None):
+    """
+    Copy the latest posts of the authors `user` follows, or of `authors`, into
+    their timeline. Used when following someone and by `backfill_timelines`.
+    """
+    limit = limit or settings.TIMELINE_LENGTH
+    if authors is None:
+        authors = Follow.objects.filter(follower=user).values("followee_id")
+    posts = Posts.published.filter(author_id__in=authors).order_by("-publish", "-id").values_list("id", "publish")[:limit]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user=user, post_id=post_id, publish=publish) for post_id, publish in posts],
+        ignore_conflicts=True,
+    )
+
+
+def forget(user, author):
+    """Remove the posts of an unfollowed author from a timeline"""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def trim(user, keep=None):
+    """Delete the entries of `user` beyond the newest `keep`"""
+    keep = keep or settings.TIMELINE_LENGTH
+    entries = TimelineEntry.objects.filter(user=user)
+    oldest = (
+        entries.order_by("-publish", "-post_id")
+        .values_list("publish", "post_id")[keep - 1:keep]
+        .first()
+    )
+    if oldest is None:
+        return 0
+    deleted, _ = entries.filter(keyset_filter(TIMELINE_KEYS, oldest)).delete()
+    return deleted
+
+
+def timeline_page(request, user, posts=None, per_page=None):
+    """
+    One `KeysetPage` of the posts of the authors `user` follows, newest first.
+
+    Fanned out posts come from the timeline table and the posts of followed
+    celebrities are pulled from `Posts`, both with a LIMIT query starting after
+    the `?after=` cursor, then merged.
+    """
+    per_page = per_page or settings.BLOG_PAGE_SIZE
+    posts = Posts.objects.for_feed() if posts is None else posts
+    cursor = request.GET.get("after")
+    values = decode_cursor(cursor, TimelineEntry, TIMELINE_KEYS) if cursor else None
+
+    entries = TimelineEntry.objects.filter(user=user).order_by("-publish", "-post_id")
+    if values:
+        try:
+            entries = entries.filter(keyset_filter(TIMELINE_KEYS, values))
+        except (ValidationError, TypeError, ValueError):
+            raise Http404("Invalid cursor")
+    rows = list(entries.values_list("publish", "post_id")[:per_page + 1])
+
+    celebrities = followed_celebrities(user)
+    if celebrities:
+        pulled = Posts.published.filter(author_id__in=celebrities).order_by("-publish", "-id")
+        if values:
+            pulled = pulled.filter(keyset_filter(POST_KEYS, values))
+        rows = sorted(rows + list(pulled.values_list("publish", "id")[:per_page + 1]), reverse=True)
+        # a post can be in both when its author became a celebrity after publishing it
+        unique = {}
+        for publish, post_id in rows:
+            unique.setdefault(post_id, (publish, post_id))
+        rows = list(unique.values())
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1])
+
+    found = posts.in_bulk([post_id for publish, post_id in rows])
+    return KeysetPage([found[post_id] for publish, post_id in rows if post_id in found], next_cursor)
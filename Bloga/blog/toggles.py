@@ -0,0 +1,98 @@
+from django.db import IntegrityError, transaction
+
+from .models import PostReactions, CommentReactions, SavedPost
+
+
+class Toggle:
+    """
+    A per user on/off relation to a post or a comment, like a like or a bookmark,
+    with the denormalized counter it maintains on its target.
+
+    Turning it on is one INSERT in a savepoint, the unique constraint rejecting
+    duplicates, and turning it off is one DELETE whose row count tells whether
+    there was anything to remove. The counter is only adjusted, in the same
+    transaction, when a row was actually written, so repeated and concurrent
+    clicks can never count twice.
+    """
+    def __init__(self, model, field, counter):
+        self.model = model
+        self.field = field
+        self.counter = counter
+        self.target_model = model._meta.get_field(field).related_model
+
+    def _lookup(self, user, target_id):
+        return {"user": user, f"{self.field}_id": target_id}
+
+    def _adjust(self, target_id, delta):
+        self.target_model.adjust_counters(target_id, **{self.counter.removesuffix("_count"): delta})
+
+    def turn_on(self, user, target_id):
+        """Returns whether the toggle was off"""
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([self.model(**self._lookup(user, target_id))])
+            except IntegrityError:
+                return False
+            self._adjust(target_id, 1)
+        return True
+
+    def turn_off(self, user, target_id):
+        """Returns whether the toggle was on"""
+        with transaction.atomic():
+            deleted, _ = self.model.objects.filter(**self._lookup(user, target_id)).delete()
+            if deleted:
+                self._adjust(target_id, -1)
+        return bool(deleted)
+
+    def turn_on_many(self, user, target_ids):
+        """
+        Turn the toggle on for every target with one INSERT and one counter UPDATE,
+        returns the ids of the targets it was off for
+        """
+        target_ids = set(target_ids)
+        with transaction.atomic():
+            existing = set(
+                self.model.objects.filter(user=user, **{f"{self.field}_id__in": target_ids})
+                .values_list(f"{self.field}_id", flat=True)
+            )
+            new = target_ids - existing
+            if not new:
+                return set()
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([self.model(**self._lookup(user, pk)) for pk in new])
+            except IntegrityError:
+                # a concurrent request turned one of them on, settle them one by one
+                return {pk for pk in new if self.turn_on(user, pk)}
+            self._adjust(sorted(new), 1)
+        return new
+
+    def turn_off_many(self, user, target_ids):
+        """
+        Turn the toggle off for every target with one DELETE and one counter UPDATE,
+        returns the ids of the targets it was on for
+        """
+        with transaction.atomic():
+            rows = self.model.objects.filter(user=user, **{f"{self.field}_id__in": set(target_ids)})
+            # locked, so a concurrent request can not remove them between the read and the DELETE
+            removed = set(rows.select_for_update().values_list(f"{self.field}_id", flat=True))
+            if removed:
+                rows.delete()
+                self._adjust(sorted(removed), -1)
+        return removed
+
+    def flip(self, user, target_id):
+        """Turn the toggle on, or off if it already was, and return the new state"""
+        if self.turn_on(user, target_id):
+            return True
+        self.turn_off(user, target_id)
+        return False
+
+    def count(self, target_id):
+        return self.target_model.objects.filter(pk=target_id).values_list(self.counter, flat=True).first() or 0
+
+
+POST_LIKE = Toggle(PostReactions, "post", "likes_count")
+POST_SAVE = Toggle(SavedPost, "post", "saves_count")
+COMMENT_LIKE = Toggle(CommentReactions, "comment", "likes_count")
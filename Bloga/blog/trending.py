@@ -0,0 +1,212 @@
+import hashlib
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, FloatField, Value, When
+from django.utils import timezone
+
+from .models import Posts
+
+# engagement weights of the hot score
+LIKE_WEIGHT = 1
+COMMENT_WEIGHT = 2
+SAVE_WEIGHT = 3
+
+# scores are offsets from this date, so they never have to be decayed: a newer
+# post starts higher and an older one needs more engagement to stay ahead of it
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+# a list keeps more posts than it serves so that entries falling behind between
+# two refreshes can be replaced without reading the database
+CAPACITY_FACTOR = 2
+
+# a cached list is changed by one writer at a time, the lock expires after this
+# many seconds should its holder die, and is polled every LOCK_WAIT seconds
+LOCK_TIMEOUT = 1
+LOCK_WAIT = 0.005
+
+
+def hot_score(likes, comments, saves, publish):
+    """
+    The rank of a post on the trending lists: the log of its weighted engagement
+    plus its publish time, one point per `TRENDING_DECAY` seconds. A post needs ten
+    times the engagement of one published `TRENDING_DECAY` seconds later to rank
+    with it. Unpublished posts score 0.
+    """
+    if publish is None:
+        return 0.0
+    engagement = likes * LIKE_WEIGHT + comments * COMMENT_WEIGHT + saves * SAVE_WEIGHT
+    age = (publish - EPOCH).total_seconds()
+    return math.log10(max(engagement, 1)) + age / settings.TRENDING_DECAY
+
+
+def capacity():
+    return settings.TRENDING_SIZE * CAPACITY_FACTOR
+
+
+def _list_key(tag=None):
+    if tag is None:
+        return "trending:global"
+    return "trending:tag:" + hashlib.md5(tag.encode()).hexdigest()
+
+
+def _offer(entries, post_id, score):
+    """Insert or move a post in a sorted list of [post id, score], None if it does not make the cut"""
+    updated = [entry for entry in entries if entry[0] != post_id]
+    if len(updated) == len(entries) and len(entries) >= capacity() and score <= entries[-1][1]:
+        return None
+    updated.append([post_id, score])
+    updated.sort(key=lambda entry: (-entry[1], -entry[0]))
+    return updated[:capacity()]
+
+
+@contextmanager
+def _locked(key):
+    """
+    Hold the lock of the cached list `key` while it is read, changed and written
+    back, yields whether it was taken. A writer still waiting once a dead holder's
+    lock would have expired drops the list instead, the next read rebuilds it.
+    """
+    lock = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(lock, 1, LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            cache.delete(key)
+            yield False
+            return
+        time.sleep(LOCK_WAIT)
+    try:
+        yield True
+    finally:
+        cache.delete(lock)
+
+
+def _update(keys, change):
+    """
+    Apply `change`, taking a list of entries and returning the new list or None
+    to leave it, to each cached list among `keys` under its lock
+    """
+    for key in cache.get_many(keys):
+        with _locked(key) as locked:
+            entries = cache.get(key) if locked else None
+            updated = None if entries is None else change(entries)
+            if updated is not None:
+                cache.set(key, updated, settings.FRAGMENT_CACHE_TIMEOUT)
+
+
+def record(*post_ids):
+    """
+    Recompute the score of posts after their counters changed and move them in
+    the trending lists they belong to. Only lists that are already cached are
+    updated, the others are built from the database when they are first read.
+    """
+    rows = Posts.objects.filter(pk__in=post_ids).values(
+        "id", "status", "publish", "likes_count", "comments_count", "saves_count",
+    )
+    scores = {
+        row["id"]: hot_score(row["likes_count"], row["comments_count"], row["saves_count"], row["publish"])
+        for row in rows
+    }
+    if not scores:
+        return
+    Posts.objects.filter(pk__in=scores).update(hot_score=Case(
+        *(When(pk=post_id, then=Value(score)) for post_id, score in scores.items()), output_field=FloatField(),
+    ))
+    published = [row["id"] for row in rows if row["status"] == Posts.Status.PUBLISHED]
+    if not published:
+        return
+    # the tags of all the posts in one query rather than one per post
+    tags = {post_id: [] for post_id in published}
+    for post_id, name in Posts.objects.filter(pk__in=published).values_list("id", "tags__name"):
+        if name is not None:
+            tags[post_id].append(name)
+    for post_id in published:
+        offer(post_id, scores[post_id], tags[post_id])
+
+
+def offer(post_id, score, tags=None):
+    """
+    Move a published post to its place in the cached global list and the lists
+    of its tags, the names in `tags` or else read from the database.
+    """
+    if tags is None:
+        tags = Posts(pk=post_id).tags.names()
+    keys = [_list_key()] + [_list_key(name) for name in tags]
+    _update(keys, lambda entries: _offer(entries, post_id, score))
+
+
+def retag(post_id, added=(), removed=()):
+    """
+    Move a post between the cached lists of its tags after they changed: it
+    leaves the lists of the `removed` names and is offered to those of the
+    `added` ones if it is published. Lists that are not cached are left alone.
+    """
+    def leave(entries):
+        updated = [entry for entry in entries if entry[0] != post_id]
+        return updated if len(updated) != len(entries) else None
+
+    _update([_list_key(name) for name in removed], leave)
+    keys = [_list_key(name) for name in added]
+    if keys and cache.get_many(keys):
+        score = Posts.published.filter(pk=post_id).values_list("hot_score", flat=True).first()
+        if score is not None:
+            _update(keys, lambda entries: _offer(entries, post_id, score))
+
+
+def rebuild(tag=None):
+    """Load the top of a trending list from the `hot_score` index and cache it"""
+    posts = Posts.published.all()
+    if tag is not None:
+        posts = posts.filter(tags__name=tag)
+    key = _list_key(tag)
+    with _locked(key) as locked:
+        entries = [
+            [post_id, score]
+            for post_id, score in posts.order_by("-hot_score", "-id").values_list("id", "hot_score")[:capacity()]
+        ]
+        if locked:
+            cache.set(key, entries, settings.FRAGMENT_CACHE_TIMEOUT)
+    return entries
+
+
+def refresh(window=None):
+    """
+    Rescore the posts published in the last `window`, whose counters may have been
+    reconciled since, then rebuild the global list and the lists of their tags
+    from at most `capacity()` rows each. Older posts are left alone: the ranking
+    decays through the publish time in every score, not by rewriting it.
+    Returns the number of lists rebuilt.
+    """
+    window = window or timedelta(seconds=settings.TRENDING_WINDOW)
+    recent = Posts.published.filter(publish__gte=timezone.now() - window)
+    posts = list(recent.only("likes_count", "comments_count", "saves_count", "publish"))
+    for post in posts:
+        post.rescore()
+    Posts.objects.bulk_update(posts, ["hot_score"], batch_size=500)
+
+    tags = set(recent.values_list("tags__name", flat=True).distinct())
+    tags.discard(None)
+    rebuild()
+    for name in tags:
+        rebuild(name)
+    return len(tags) + 1
+
+
+def trending(tag=None, limit=None, posts=None):
+    """The hottest published posts, optionally only those tagged `tag`, hottest first"""
+    limit = limit or settings.TRENDING_SIZE
+    entries = cache.get(_list_key(tag))
+    if entries is None:
+        entries = rebuild(tag)
+
+    posts = Posts.published.for_feed() if posts is None else posts
+    if tag is not None:
+        posts = posts.filter(tags__name=tag)
+    ids = [post_id for post_id, score in entries]
+    found = posts.in_bulk(ids)
+    # posts unpublished or untagged since they were listed are skipped
+    return [found[post_id] for post_id in ids if post_id in found][:limit]
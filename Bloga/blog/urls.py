@@ -6,6 +6,9 @@ app_name = "blog"
 urlpatterns = [
     path("", views.home, name="home"),
     path("posts/", views.posts_list, name="post_list"),
+    path("feed/", views.feed, name="feed"),
+    path("trending/", views.trending_posts, name="trending"),
+    path("for-you/", views.for_you, name="for_you"),
     path("posts/<slug:link>/",views.post_detail, name="post"),
     path("posts/<slug:link>/edit/",views.post_edit, name="post_edit"),
     path("posts/<slug:link>/delete/",views.post_delete, name="post_delete"),
@@ -14,9 +17,12 @@ urlpatterns = [
     path("posts/<slug:link>/save/",views.post_save, name="post_save"),
     path("posts/comment/<str:comment_id>/like/",views.comment_like, name="comment_like"),
     path("write/", views.write, name="write"),
+    path("write/suggest-tags/", views.write_suggestions, name="write_suggestions"),
     path("tags/", views.tags_list, name="tags_list"),
     path("tags/<str:name>/", views.tag, name="tag"),
+    path("tags/<str:name>/trending/", views.tag_trending, name="tag_trending"),
     path("users/", views.user_list, name="user_list"),
+    path("users/suggested/", views.suggested_users, name="suggested_users"),
     path("users/<str:username>/", views.profile, name="profile"),
     path("users/<str:username>/saved/", views.user_saved, name="user_saved"),
     path("users/<str:username>/favorites/", views.user_favorites, name="user_favorites"),
@@ -0,0 +1,138 @@
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Case, F, Value, When, PositiveIntegerField
+from django.dispatch import Signal
+
+from .models import Posts
+
+# sent with the {link: views} written by every flush
+views_flushed = Signal()
+
+
+class BloomFilter:
+    """
+    A set of strings answering membership with no false negatives and a false
+    positive rate of `error` up to `capacity` items, in about 1.2 bytes per item
+    at 1%, whatever the length of the strings.
+    """
+    def __init__(self, capacity, error):
+        self.size = max(8, math.ceil(-capacity * math.log(error) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # two independent hashes combined into as many as needed (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << position % 8) for position in self._positions(item))
+
+    def add(self, item):
+        """Add `item` and return whether it may already have been in the set"""
+        seen = True
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                seen = False
+                self.bits[byte] |= 1 << bit
+        return seen
+
+
+class ViewBuffer:
+    """
+    The post views counted by this process and not yet written to the database.
+
+    Views are counted in memory by post link, each viewer counting once per post
+    per `VIEW_DEDUP_WINDOW` thanks to a Bloom filter that is reset every window.
+    `flush` writes the counts with one UPDATE per `VIEW_FLUSH_BATCH_SIZE` posts.
+    It runs once a response counting a view has been sent and at least
+    `VIEW_FLUSH_INTERVAL` seconds passed since the last flush, so the views of
+    that interval are lost if the process is killed.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.flushed = time.monotonic()
+        self._reset_seen()
+
+    def _reset_seen(self):
+        self.seen = BloomFilter(settings.VIEW_DEDUP_CAPACITY, settings.VIEW_DEDUP_ERROR)
+        self.window = time.monotonic()
+
+    def record(self, viewer, link):
+        """Count one view of the post `link` by `viewer`, returns whether it counted"""
+        with self.lock:
+            if time.monotonic() - self.window >= settings.VIEW_DEDUP_WINDOW:
+                self._reset_seen()
+            if self.seen.add(f"{viewer}:{link}"):
+                return False
+            self.counts[link] += 1
+            return True
+
+    def due(self):
+        return bool(self.counts) and time.monotonic() - self.flushed >= settings.VIEW_FLUSH_INTERVAL
+
+    def flush(self):
+        """Write the buffered counts of published posts, returns the number of views written"""
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.flushed = time.monotonic()
+        links = sorted(counts)
+        written = 0
+        for start in range(0, len(links), settings.VIEW_FLUSH_BATCH_SIZE):
+            batch = links[start:start + settings.VIEW_FLUSH_BATCH_SIZE]
+            increment = Case(
+                *(When(link=link, then=Value(counts[link])) for link in batch),
+                output_field=PositiveIntegerField(),
+            )
+            Posts.published.filter(link__in=batch).update(views_count=F("views_count") + increment)
+            written += sum(counts[link] for link in batch)
+        if counts:
+            views_flushed.send(sender=self.__class__, counts=counts)
+        return written
+
+
+buffer = ViewBuffer()
+# whether the request being handled by this thread counted a view
+_local = threading.local()
+
+
+def viewer(request):
+    """Who is viewing: the user, else their session, else their address and browser"""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    if request.session.session_key:
+        return f"session:{request.session.session_key}"
+    agent = request.META.get("HTTP_USER_AGENT", "")
+    return f"address:{request.META.get('REMOTE_ADDR', '')}:{agent}"
+
+
+def count_view(view):
+    """
+    Count a view of the post whose `link` the view is called with when it
+    answers with the post, including from the page cache or with a 304.
+    Nothing is written on the request path.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.method == "GET" and response.status_code in (200, 304):
+            _local.counted = buffer.record(viewer(request), kwargs["link"]) or getattr(_local, "counted", False)
+        return response
+    return wrapper
+
+
+def flush_if_due(**kwargs):
+    """Flush the buffer after a response that counted a view, once it is due"""
+    if getattr(_local, "counted", False):
+        _local.counted = False
+        if buffer.due():
+            buffer.flush()
@@ -0,0 +1,56 @@
+from .models import PostReactions, CommentReactions, SavedPost
+
+
+class ViewerState:
+    """
+    Whether the current viewer liked or saved the posts and comments of a page.
+
+    Views `load` every post and comment they are about to render, which resolves
+    each relation with a single `IN (...)` query. Objects that were not loaded up
+    front are resolved lazily, one query each, so templates stay correct either way.
+    """
+    def __init__(self, user):
+        self.user = user if user is not None and user.is_authenticated else None
+        self.post_ids = set()
+        self.comment_ids = set()
+        self.liked_posts = set()
+        self.saved_posts = set()
+        self.liked_comments = set()
+
+    def load(self, posts=(), comments=()):
+        post_ids = {post.pk for post in posts} - self.post_ids
+        comment_ids = {comment.pk for comment in comments} - self.comment_ids
+
+        if self.user is not None and post_ids:
+            self.liked_posts.update(
+                PostReactions.objects.filter(user=self.user, post_id__in=post_ids)
+                .values_list('post_id', flat=True)
+            )
+            self.saved_posts.update(
+                SavedPost.objects.filter(user=self.user, post_id__in=post_ids)
+                .values_list('post_id', flat=True)
+            )
+        if self.user is not None and comment_ids:
+            self.liked_comments.update(
+                CommentReactions.objects.filter(user=self.user, comment_id__in=comment_ids)
+                .values_list('comment_id', flat=True)
+            )
+
+        self.post_ids |= post_ids
+        self.comment_ids |= comment_ids
+        return self
+
+    def likes_post(self, post):
+        if post.pk not in self.post_ids:
+            self.load(posts=[post])
+        return post.pk in self.liked_posts
+
+    def saved_post(self, post):
+        if post.pk not in self.post_ids:
+            self.load(posts=[post])
+        return post.pk in self.saved_posts
+
+    def likes_comment(self, comment):
+        if comment.pk not in self.comment_ids:
+            self.load(comments=[comment])
+        return comment.pk in self.liked_comments
@@ -1,60 +1,137 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from taggit.models import Tag
 from django.contrib.auth.models import User
 from django.contrib.auth import update_session_auth_hash
+from django.conf import settings
+from django.views.decorators.http import condition, require_POST
 
 from authentication.forms import ProfileForm
-from authentication.models import Profile
-from .models import Posts, Comments, PostReactions, CommentReactions, SavedPost
+from authentication.models import Follow, Profile
+from search import similarity
+from .models import Posts, Comments, PostReactions, SavedPost
 from .forms import PostsForm, CommentsForm
 from .permissions import is_post_owner
-
+from .pagination import paginate
+from .viewer import ViewerState
+from . import fragments, page_cache, recommendations, related, suggestions, tagging, timeline, toggles, trending
+from .page_cache import cache_anonymous_page
+from .view_counts import count_view
+from .conditional import post_page_etag, post_page_last_modified
+
+@cache_anonymous_page
 def home(request):
     user = request.user
-    posts = Posts.published.all()
+    posts = paginate(request, Posts.published.for_feed(tags=False))
+    page_cache.surrogate_keys(request, "feed", *page_cache.post_keys(posts))
     
     context = {
         "user": user if user.is_authenticated else None,
         "posts": posts,
+        **fragments.feed_context(posts),
     }
     return render(request, 'blog/home.html', context)
 
 
+@login_required
+def feed(request):
+    user = request.user
+    posts = timeline.timeline_page(request, user, posts=Posts.objects.for_feed(tags=False))
+    
+    context = {
+        "user": user,
+        "posts": posts,
+        "page_title": "Following 📰",
+        **fragments.feed_context(posts),
+    }
+    return render(request, 'blog/posts.html', context)
+
+
+@cache_anonymous_page
 def posts_list(request):
     user = request.user
-    posts = Posts.published.all()
+    posts = paginate(request, Posts.published.for_feed(tags=False))
+    page_cache.surrogate_keys(request, "feed", *page_cache.post_keys(posts))
     
     context = {
         "user": user if user.is_authenticated else None,
         "posts": posts,
         "page_title": "Explore Posts 🧭",
+        **fragments.feed_context(posts),
+    }
+    return render(request, 'blog/posts.html', context)
+
+
+def trending_posts(request):
+    user = request.user
+    posts = trending.trending(posts=Posts.published.for_feed(tags=False))
+    
+    context = {
+        "user": user if user.is_authenticated else None,
+        "posts": posts,
+        "page_title": "Trending 🔥",
+        **fragments.feed_context(posts),
+    }
+    return render(request, 'blog/posts.html', context)
+
+
+@login_required
+def for_you(request):
+    user = request.user
+    posts = recommendations.for_you(user, posts=Posts.published.for_feed(tags=False))
+    
+    context = {
+        "user": user,
+        "posts": posts,
+        "page_title": "For you",
+        **fragments.feed_context(posts),
     }
     return render(request, 'blog/posts.html', context)
 
 
+@count_view
+@condition(etag_func=post_page_etag, last_modified_func=post_page_last_modified)
+@cache_anonymous_page
 def post_detail(request, link):
     user=request.user
     
+    posts = Posts.objects.select_related('author', 'author__profile')
     if user.is_authenticated and Posts.objects.filter(author=user, link=link, status="DF").exists():
         post = get_object_or_404(
-            Posts,
+            posts,
             link=link,
         )
     else:
         post = get_object_or_404(
-            Posts,
+            posts,
             link=link,
             status = "PB"
         )
     
     form = CommentsForm()
+    comments = list(post.comments.select_related('user__profile'))
+    viewer = ViewerState(user).load(posts=[post], comments=comments)
+    fragments.prepare_post(post, comments)
+    related_posts = related.related_posts(post)
+    also_liked = recommendations.also_liked(post)
+    page_cache.surrogate_keys(
+        request,
+        *page_cache.post_keys([post, *related_posts, *also_liked]),
+        *(f"user:{comment.user_id}" for comment in comments),
+    )
     
     context = {
         "user": user if user.is_authenticated else None,
         "post": post,
+        "comments": comments,
+        "related_posts": related_posts,
+        "also_liked": also_liked,
+        "viewer": viewer,
         "form": form,
+        "fragment_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
     }
     
     return render(request, 'blog/post.html', context)
@@ -87,22 +164,17 @@ def post_edit(request, link):
             tags = form.cleaned_data.get('tags')
             status = form.cleaned_data.get('status')
             content = form.cleaned_data.get('content')
+            before = page_cache.post_state(post)
+            was_status = post.status
             
             post.title = title
             post.status = status
             post.content = content
-            post.tags.clear()
-            post.save(update=True)
-            
-            if tags:
-                tags = tags.split(",")
-                for tag in tags:
-                    tag = tag.lower()
-                    tag, created = Tag.objects.get_or_create(name=tag)
-                    
-                    post.tags.add(tag)
-                    
             post.save(update=True)
+            # the related posts only depend on the tags and the status
+            if tagging.set_tags(post, tagging.parse(tags)) or post.status != was_status:
+                related.refresh(post)
+            page_cache.purge_post(post.pk, post.author_id, before, page_cache.post_state(post))
             
             if status == 'PB':    
                 messages.success(request, f"Updated - {title}")
@@ -117,6 +189,7 @@ def post_edit(request, link):
     context = {
         "user": user,
         "form": form,
+        "link": link,
     }
     
     return render(request, 'blog/write.html', context)    
@@ -131,7 +204,9 @@ def post_delete(request, link):
         link=link
     )
     title = post.title
+    post_id, before = post.pk, page_cache.post_state(post)
     post.delete()
+    page_cache.purge_post(post_id, post.author_id, before, page_cache.UNLISTED)
     messages.success(request,f"Deleted - {title}")
     return redirect("blog:home")
 
@@ -151,65 +226,58 @@ def post_comment(request, link):
         
         if form.is_valid():
             form.save()
+            page_cache.purge(f"post:{post.pk}")
             messages.success(request, "comment posted")
         messages.error(request, form.errors.as_text())
     return redirect('blog:post', link=link)
 
 
-@login_required
-def post_like(request, link):
-    # if like exist delete else create
-    post = get_object_or_404(
-        Posts,
-        link=link
-    )
-    user = request.user
-    
-    if PostReactions.objects.filter(post=post, user=user).exists():
-        reaction = PostReactions.objects.get(post=post, user=user)
-        reaction.delete()
+def _toggle(request, toggle, target_id, post_id):
+    """
+    Apply a toggle as asked by the request method: PUT turns it on and DELETE off,
+    answering with its state and count in JSON, while the links of the page flip
+    it and are redirected back to the post.
+    """
+    if request.method == "PUT":
+        changed = toggle.turn_on(request.user, target_id)
+        active = True
+    elif request.method == "DELETE":
+        changed = toggle.turn_off(request.user, target_id)
+        active = False
     else:
-        reaction = PostReactions(post=post, user=user)
-        reaction.save()
+        changed = True
+        active = toggle.flip(request.user, target_id)
+    if changed:
+        page_cache.purge(f"post:{post_id}")
     
-    return redirect('blog:post', link=link)
+    if request.method in ("PUT", "DELETE"):
+        return JsonResponse({"active": active, "count": toggle.count(target_id)})
+    return None
+
+
+@login_required
+def post_like(request, link):
+    post = get_object_or_404(Posts.published.only("id", "link"), link=link)
+    return _toggle(request, toggles.POST_LIKE, post.pk, post.pk) or redirect('blog:post', link=link)
 
 
 @login_required
 def post_save(request, link):
-    user = request.user
-    post = get_object_or_404(
-        Posts,
-        link=link
-    )
-    
-    if SavedPost.objects.filter(user=user, post=post).exists():
-        bookmark = SavedPost.objects.get(user=user, post=post)
-        bookmark.delete()
-    else:
-        bookmark = SavedPost(user=user, post=post)
-        bookmark.save()
-    
-    return redirect('blog:post', link=link)
+    post = get_object_or_404(Posts.published.only("id", "link"), link=link)
+    return _toggle(request, toggles.POST_SAVE, post.pk, post.pk) or redirect('blog:post', link=link)
 
 
 @login_required
 def comment_like(request, comment_id):
-    # if like exist delete else create
     comment = get_object_or_404(
-        Comments,
-        id=comment_id
+        Comments.objects.select_related('post').only('id', 'post', 'post__link'),
+        id=comment_id,
+        post__status='PB',
+    )
+    return (
+        _toggle(request, toggles.COMMENT_LIKE, comment.pk, comment.post_id)
+        or redirect('blog:post', link=comment.post.link)
     )
-    user = request.user
-    
-    if CommentReactions.objects.filter(comment=comment, user=user).exists():
-        reaction = CommentReactions.objects.get(comment=comment, user=user)
-        reaction.delete()
-    else:
-        reaction = CommentReactions(comment=comment, user=user)
-        reaction.save()
-    
-    return redirect('blog:post', link=comment.post.link)
 
 
 def tags_list(request):
@@ -224,21 +292,39 @@ def tags_list(request):
     return render(request, 'blog/tags.html', context)
 
 
+@cache_anonymous_page
 def tag(request, name):
     user=request.user
-    posts = Posts.published.filter(tags__name__in=[name])
+    posts = paginate(request, Posts.published.filter(tags__name__in=[name]).for_feed(tags=False))
+    page_cache.surrogate_keys(request, f"tag:{name}", *page_cache.post_keys(posts))
+    
+    context = {
+        "user": user if user.is_authenticated else None,
+        "posts": posts,
+        "tag": name,
+        **fragments.feed_context(posts),
+    }
+    
+    return render(request, 'blog/tag.html', context)
+
+
+def tag_trending(request, name):
+    user=request.user
+    posts = trending.trending(tag=name, posts=Posts.published.for_feed(tags=False))
     
     context = {
         "user": user if user.is_authenticated else None,
         "posts": posts,
         "tag": name,
+        "page_title": "Trending 🔥",
+        **fragments.feed_context(posts),
     }
     
     return render(request, 'blog/tag.html', context)
 
 
 def user_list(request):
-    users = User.objects.exclude(is_active=False)
+    users = paginate(request, User.objects.exclude(is_active=False), keys=("id",))
     user = request.user
     
     context = {
@@ -249,13 +335,26 @@ def user_list(request):
     return render(request, 'blog/users.html', context)
 
 
+@login_required
+def suggested_users(request):
+    user = request.user
+    
+    context = {
+        "users": suggestions.suggested_users(user),
+        "user": user,
+    }
+    
+    return render(request, 'blog/users.html', context)
+
+
 
 def user_following(request, username):
     user = get_object_or_404(
         User,
         username=username,
     )
-    users = user.profile.follows.all()
+    edges = Follow.objects.filter(follower=user).select_related('followee__profile')
+    users = paginate(request, edges, keys=("-created", "-id")).map(lambda edge: edge.followee)
     
     user = request.user
     context = {
@@ -273,7 +372,8 @@ def user_followers(request, username):
         username=username,
     )
     
-    users = user.profile.followers.all()
+    edges = Follow.objects.filter(followee=user).select_related('follower__profile')
+    users = paginate(request, edges, keys=("-created", "-id")).map(lambda edge: edge.follower)
     
     user = request.user
     context = {
@@ -311,6 +411,7 @@ def user_edit(request, username):
         
         if form.is_valid():
             form.save()
+            page_cache.purge(f"user:{user.pk}")
             if form.cleaned_data.get('password1'):
                 update_session_auth_hash(request, request.user)
             return redirect('blog:user_edit', username = user.username)
@@ -335,8 +436,9 @@ def user_saved(request, username):
     )
 
     if profile == user:
-        posts = SavedPost.objects.filter(user=user).all()
-        posts = [post.post for post in posts]
+        saved = paginate(request, SavedPost.objects.filter(user=user), keys=("-date", "-id"))
+        posts = Posts.objects.for_feed(tags=False).in_bulk([item.post_id for item in saved])
+        posts = saved.map(lambda item: posts[item.post_id])
         page_title = "My Saved Posts 🔖"
     else:
         return redirect('blog:profile', username=username)
@@ -347,6 +449,7 @@ def user_saved(request, username):
         "profile": profile,
         "posts": posts,
         "page_title": page_title,
+        **fragments.feed_context(posts),
     }
     return render(request, 'blog/home.html', context)
 
@@ -360,8 +463,9 @@ def user_favorites(request, username):
     )
 
     if profile == user:
-        posts = PostReactions.objects.filter(user=user).all()
-        posts = [post.post for post in posts]
+        reactions = paginate(request, PostReactions.objects.filter(user=user), keys=("-id",))
+        posts = Posts.objects.for_feed(tags=False).in_bulk([item.post_id for item in reactions])
+        posts = reactions.map(lambda item: posts[item.post_id])
         page_title = "My Favorites ❤"
     else:
         return redirect('blog:profile', username=username)
@@ -372,10 +476,12 @@ def user_favorites(request, username):
         "profile": profile,
         "posts": posts,
         "page_title": page_title,
+        **fragments.feed_context(posts),
     }
     return render(request, 'blog/home.html', context)
 
 
+@cache_anonymous_page
 def profile(request, username):
     user = request.user
     profile = get_object_or_404(
@@ -384,18 +490,28 @@ def profile(request, username):
     )
 
     if profile == user:
-        posts = Posts.objects.filter(author=profile)
+        posts = Posts.objects.filter(author=profile).for_feed(tags=False)
         page_title = "My Posts"
     else:
         page_title = f"Explore {profile.username}'s Posts"
-        posts = Posts.objects.filter(author=profile, status='PB')
+        posts = Posts.objects.filter(author=profile, status='PB').for_feed(tags=False)
+    
+    # drafts have no publish date and are listed after the published posts
+    posts = paginate(request, posts, nullable=("publish",))
+    page_cache.surrogate_keys(request, f"user:{profile.pk}", *page_cache.post_keys(posts))
     
+    is_following = (
+        user.is_authenticated and user != profile
+        and Follow.objects.filter(follower=user, followee=profile).exists()
+    )
     
     context = {
         "user":user if user.is_authenticated else None,
         "profile": profile,
+        "is_following": is_following,
         "posts": posts,
         "page_title": page_title,
+        **fragments.feed_context(posts),
     }
     return render(request, 'blog/profile.html', context)
 
@@ -415,7 +531,10 @@ def user_follow(request, username):
     follower_profile, created = Profile.objects.get_or_create(user=request.user)
     followed_profile, created = Profile.objects.get_or_create(user=user)
     
-    follower_profile.follow(followed_profile)
+    added = follower_profile.follow(followed_profile)
+    timeline.backfill(request.user, authors=[user.pk])
+    suggestions.apply_follows(request.user, added=added)
+    page_cache.purge(f"user:{request.user.pk}", f"user:{user.pk}")
     return redirect('blog:profile', username=username)
 
 
@@ -435,7 +554,10 @@ def user_unfollow(request, username):
     follower_profile, created = Profile.objects.get_or_create(user=request.user)
     followed_profile, created = Profile.objects.get_or_create(user=user)
     
-    follower_profile.unfollow(followed_profile)
+    removed = follower_profile.unfollow(followed_profile)
+    timeline.forget(request.user, user)
+    suggestions.apply_follows(request.user, removed=removed)
+    page_cache.purge(f"user:{request.user.pk}", f"user:{user.pk}")
     
     
     return redirect('blog:profile', username=username)
@@ -458,16 +580,9 @@ def write(request):
             post = Posts(title=title, content=content,status=status, author=user)
             post.save(update=False)
             print(post.status)
-            
-            if tags:
-                tags = tags.split(",")
-                for tag in tags:
-                    tag = tag.lower().strip()
-                    tag, created = Tag.objects.get_or_create(name=tag)
-                    
-                    post.tags.add(tag)
-                    
-            post.save(update=False)
+            if tagging.set_tags(post, tagging.parse(tags)):
+                related.refresh(post)
+            page_cache.purge_post(post.pk, post.author_id, page_cache.UNLISTED, page_cache.post_state(post))
             
             if status == 'PB':    
                 messages.success(request, f"Posted - {title}")
@@ -484,4 +599,30 @@ def write(request):
         "form": form,
     }
     
-    return render(request, 'blog/write.html', context)
\ No newline at end of file
+    return render(request, 'blog/write.html', context)
+
+
+@login_required
+@require_POST
+def write_suggestions(request):
+    title = request.POST.get("title", "")
+    content = request.POST.get("content", "")
+    
+    similar = similarity.similar_posts(title, content, limit=settings.SIMILAR_POSTS_CANDIDATES)
+    # a post being edited is not a duplicate of itself
+    link = request.POST.get("link")
+    if link:
+        similar = [post for post in similar if post.link != link]
+    
+    return JsonResponse({
+        "tags": similarity.suggest_tags(title, content, similar=similar),
+        "similar": [
+            {
+                "title": post.title,
+                "url": reverse("blog:post", args=[post.link]),
+                "similarity": round(post.similarity, 3),
+                "duplicate": post.duplicate,
+            }
+            for post in similar[:settings.SIMILAR_POSTS]
+        ],
+    })
\ No newline at end of file
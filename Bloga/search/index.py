@@ -0,0 +1,113 @@
+import hashlib
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Term, Document, Posting, Corpus
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_TOKEN_LENGTH = 64
+# a title word counts as much as this many words of the body
+TITLE_WEIGHT = 2
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+
+def tokenize(text):
+    """Lower case word tokens of `text`, without stop words"""
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if 1 < len(token) <= MAX_TOKEN_LENGTH and token not in STOP_WORDS
+    ]
+
+
+def term_counts(post):
+    counts = Counter(tokenize(post.content or ""))
+    for token in tokenize(post.title or ""):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+def impact(tf, length, average_length):
+    """
+    The BM25 term frequency part of the score of a posting, by which the postings
+    of a term are read best first. It uses the average length of the corpus when
+    the post is indexed, search recomputes the exact score of the posts it reads.
+    """
+    norm = K1 * (1 - B + B * length / (average_length or length or 1))
+    return tf * (K1 + 1) / (tf + norm)
+
+
+def _signature(post):
+    return hashlib.sha1(f"{post.title}\0{post.content}".encode()).hexdigest()
+
+
+def _term_ids(tokens):
+    """The ids of `tokens`, creating the terms that do not exist yet"""
+    Term.objects.bulk_create([Term(token=token) for token in tokens], ignore_conflicts=True)
+    return dict(Term.objects.filter(token__in=tokens).values_list("token", "id"))
+
+
+def index_post(post):
+    """
+    Bring the index of `post` up to date.
+
+    Only published posts are indexed. A post whose title and content did not
+    change since it was indexed is skipped with a single query.
+    """
+    if post.status != "PB":
+        remove_post(post.pk)
+        return
+
+    signature = _signature(post)
+    with transaction.atomic():
+        document = Document.objects.select_for_update().filter(post_id=post.pk).first()
+        if document is not None and document.signature == signature:
+            return
+
+        counts = term_counts(post)
+        length = sum(counts.values())
+        average_length = Corpus.get().average_length
+        term_ids = _term_ids(list(counts))
+        old_ids = set(Posting.objects.filter(post_id=post.pk).values_list("term_id", flat=True))
+        new_ids = set(term_ids.values())
+
+        Posting.objects.filter(post_id=post.pk).delete()
+        Posting.objects.bulk_create([
+            Posting(
+                term_id=term_ids[token], post_id=post.pk, tf=tf, length=length,
+                impact=impact(tf, length, average_length),
+            )
+            for token, tf in counts.items()
+        ])
+        Term.objects.filter(id__in=new_ids - old_ids).update(doc_freq=F("doc_freq") + 1)
+        Term.objects.filter(id__in=old_ids - new_ids).update(doc_freq=F("doc_freq") - 1)
+
+        if document is None:
+            Document.objects.create(post_id=post.pk, length=length, signature=signature)
+            Corpus.adjust(documents=1, total_length=length)
+        else:
+            Corpus.adjust(total_length=length - document.length)
+            document.length = length
+            document.signature = signature
+            document.save()
+
+
+def remove_post(post_id):
+    """Drop a post from the index, it was unpublished or is being deleted"""
+    with transaction.atomic():
+        document = Document.objects.select_for_update().filter(post_id=post_id).first()
+        if document is None:
+            return
+        term_ids = list(Posting.objects.filter(post_id=post_id).values_list("term_id", flat=True))
+        Term.objects.filter(id__in=term_ids).update(doc_freq=F("doc_freq") - 1)
+        Posting.objects.filter(post_id=post_id).delete()
+        Corpus.adjust(documents=-1, total_length=-document.length)
+        document.delete()
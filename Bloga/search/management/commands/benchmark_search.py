@@ -0,0 +1,50 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from search.models import Term
+from search.ranking import search
+
+
+class Command(BaseCommand):
+    help = "Time searches against the current index, by default for its most common terms"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--query', action='append', dest='queries',
+            help="A query to time, can be repeated",
+        )
+        parser.add_argument(
+            '--terms', type=int, default=10,
+            help="Without --query, time each of this many most common terms alone and in pairs",
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--page', type=int, default=1)
+
+    def queries(self, options):
+        """The longest posting lists are the slowest to rank"""
+        if options['queries']:
+            return options['queries']
+        tokens = list(Term.objects.order_by('-doc_freq').values_list('token', flat=True)[:options['terms']])
+        return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+    def handle(self, *args, **options):
+        timings = []
+        for query in self.queries(options):
+            elapsed = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                results = search(query, page=options['page'])
+                elapsed.append(time.perf_counter() - start)
+            timings.append(min(elapsed))
+            self.stdout.write(f"{query!r}: {min(elapsed) * 1000:.1f}ms, {len(results)} results")
+
+        if not timings:
+            self.stdout.write("nothing to search, the index is empty")
+            return
+        timings.sort()
+        self.stdout.write(f"queries: {len(timings)}")
+        self.stdout.write(f"median: {statistics.median(timings) * 1000:.1f}ms")
+        self.stdout.write(f"p95: {timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000:.1f}ms")
+        self.stdout.write(f"max: {timings[-1] * 1000:.1f}ms")
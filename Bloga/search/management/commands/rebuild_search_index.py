@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Posts
+from search.index import index_post
+from search.models import Term, Document, Posting, Corpus
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from every published post"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help="Number of posts loaded at a time",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Posting.objects.all().delete()
+            Document.objects.all().delete()
+            Term.objects.all().delete()
+            Corpus.objects.all().delete()
+
+        posts = Posts.published.only('id', 'title', 'content', 'status').order_by('id')
+        indexed = 0
+        for post in posts.iterator(chunk_size=options['chunk_size']):
+            index_post(post)
+            indexed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts"))
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+from search.index import impact
+
+
+def backfill_impact(apps, schema_editor):
+    Corpus = apps.get_model('search', 'Corpus')
+    Posting = apps.get_model('search', 'Posting')
+    corpus = Corpus.objects.filter(pk=1).first()
+    average_length = corpus.total_length / corpus.documents if corpus and corpus.documents else 0
+
+    batch = []
+    for posting in Posting.objects.only('id', 'tf', 'length').iterator(chunk_size=2000):
+        posting.impact = impact(posting.tf, posting.length, average_length)
+        batch.append(posting)
+        if len(batch) == 2000:
+            Posting.objects.bulk_update(batch, ['impact'])
+            batch = []
+    Posting.objects.bulk_update(batch, ['impact'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posting',
+            name='impact',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_impact, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='posting',
+            index=models.Index(fields=['term', '-impact'], name='search_post_term_id_327fac_idx'),
+        ),
+    ]
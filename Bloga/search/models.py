@@ -0,0 +1,68 @@
+from django.db import models
+from django.db.models import F
+
+from blog.models import Posts
+
+
+class Term(models.Model):
+    """A token of the inverted index and the number of documents containing it"""
+    token = models.CharField(max_length=64, unique=True)
+    doc_freq = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.token
+
+
+class Document(models.Model):
+    """The indexed state of a published post"""
+    post = models.OneToOneField(Posts, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    length = models.PositiveIntegerField(default=0)
+    # hash of the indexed text, saves that do not change it skip the index
+    signature = models.CharField(max_length=40)
+
+
+class Posting(models.Model):
+    """
+    One (term, post) entry of the inverted index.
+
+    The document length is copied onto every posting so that BM25 scores a term
+    from its postings alone, without joining the documents. `impact` orders the
+    postings of a term so a search only reads the best of them.
+    """
+    term = models.ForeignKey(Term, on_delete=models.CASCADE, related_name='postings')
+    post = models.ForeignKey(Posts, on_delete=models.CASCADE, related_name='+')
+    tf = models.PositiveIntegerField()
+    length = models.PositiveIntegerField()
+    impact = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'], name='unique_term_posting'),
+        ]
+        indexes = [
+            models.Index(fields=['post']),
+            models.Index(fields=['term', '-impact']),
+        ]
+
+
+class Corpus(models.Model):
+    """Singleton row with the corpus statistics BM25 needs, kept up to date incrementally"""
+    documents = models.PositiveIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def get(cls):
+        corpus, created = cls.objects.get_or_create(pk=1)
+        return corpus
+
+    @classmethod
+    def adjust(cls, documents=0, total_length=0):
+        cls.objects.get_or_create(pk=1)
+        cls.objects.filter(pk=1).update(
+            documents=F('documents') + documents,
+            total_length=F('total_length') + total_length,
+        )
+
+    @property
+    def average_length(self):
+        return self.total_length / self.documents if self.documents else 0
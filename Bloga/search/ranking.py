@@ -0,0 +1,150 @@
+import math
+import re
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.db.models import Case, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from blog.models import Posts
+from .index import tokenize, K1, B
+from .models import Term, Posting, Corpus
+
+# terms found in more than this share of the corpus are dropped from multi-term
+# queries, their long posting lists cost the most and barely change the ranking
+COMMON_TERM_RATIO = 0.5
+SNIPPET_LENGTH = 200
+
+
+class SearchResults(Sequence):
+    """One page of ranked posts, each carrying its `score` and highlighted `snippet`"""
+    def __init__(self, posts, page, has_next):
+        self.posts = list(posts)
+        self.page = page
+        self.has_next = has_next
+
+    def __getitem__(self, index):
+        return self.posts[index]
+
+    def __len__(self):
+        return len(self.posts)
+
+    @property
+    def has_previous(self):
+        return self.page > 1
+
+    @property
+    def next_page(self):
+        return self.page + 1
+
+    @property
+    def previous_page(self):
+        return self.page - 1
+
+
+def idf(documents, doc_freq):
+    """The BM25 inverse document frequency, always positive"""
+    return math.log(1 + (documents - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def query_weights(tokens, documents):
+    """The idf of every known query term, by term id"""
+    terms = list(Term.objects.filter(token__in=tokens, doc_freq__gt=0).values_list("id", "doc_freq"))
+    rare = [(pk, df) for pk, df in terms if df <= documents * COMMON_TERM_RATIO]
+    if rare:
+        terms = rare
+    return {pk: idf(documents, df) for pk, df in terms}
+
+
+def bm25(weights, average_length):
+    """The BM25 score of a post, summed over its postings of the query terms"""
+    tf = Cast("tf", FloatField())
+    norm = Value(K1) * (Value(1 - B) + Value(B) * Cast("length", FloatField()) / Value(average_length))
+    weight = Case(
+        *(When(term_id=pk, then=Value(value)) for pk, value in weights.items()),
+        output_field=FloatField(),
+    )
+    return Sum(weight * tf * Value(K1 + 1) / (tf + norm), output_field=FloatField())
+
+
+def candidates(postings, weights, limit=None):
+    """
+    The posts of the `limit` highest impact `postings` of every query term, read
+    from the (term, impact) index with one LIMIT query per term.
+    """
+    limit = limit or settings.SEARCH_TERM_POSTINGS
+    found = set()
+    for pk in weights:
+        found.update(postings.filter(term_id=pk).order_by("-impact").values_list("post_id", flat=True)[:limit])
+    return found
+
+
+def highlight(text, tokens, length=SNIPPET_LENGTH):
+    """
+    An excerpt of `text` around the first query term, with every term wrapped
+    in <mark>. The text is escaped, only the marks are HTML.
+    """
+    if not tokens:
+        return escape(text[:length])
+    pattern = re.compile(r"(?<!\w)(%s)(?!\w)" % "|".join(map(re.escape, tokens)), re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(0, match.start() - length // 4) if match else 0
+    excerpt = text[start:start + length]
+
+    parts = []
+    position = 0
+    for match in pattern.finditer(excerpt):
+        parts.append(escape(excerpt[position:match.start()]))
+        parts.append(f"<mark>{escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(escape(excerpt[position:]))
+    prefix = "…" if start else ""
+    suffix = "…" if start + length < len(text) else ""
+    return mark_safe(prefix + "".join(parts) + suffix)
+
+
+def search(query, tag=None, author=None, page=1, per_page=None):
+    """
+    Rank the published posts matching `query` with BM25, optionally only those
+    with the tag `tag` or written by the user named `author`.
+
+    Only the best `SEARCH_TERM_POSTINGS` postings of each term are read, the
+    posts they name are then scored by the database from all their postings of
+    the query terms and only the posts of the requested page are loaded. A post
+    that is not among the best of any term is not found, however deep the page.
+    """
+    per_page = per_page or settings.BLOG_PAGE_SIZE
+    tokens = list(dict.fromkeys(tokenize(query)))
+    corpus = Corpus.get()
+    weights = query_weights(tokens, corpus.documents) if tokens and corpus.documents else {}
+    if not weights:
+        return SearchResults([], page, False)
+
+    postings = Posting.objects.all()
+    if tag:
+        postings = postings.filter(post__tags__name=tag)
+    if author:
+        postings = postings.filter(post__author__username=author)
+
+    offset = (page - 1) * per_page
+    rows = list(
+        postings.filter(term_id__in=weights, post_id__in=candidates(postings, weights))
+        .values("post_id")
+        .annotate(score=bm25(weights, corpus.average_length))
+        .order_by("-score", "-post_id")[offset:offset + per_page + 1]
+    )
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    posts = Posts.published.for_feed(content=True).in_bulk([row["post_id"] for row in rows])
+    results = []
+    for row in rows:
+        post = posts.get(row["post_id"])
+        if post is None:
+            continue
+        post.score = row["score"]
+        post.snippet = highlight(strip_tags(post.rendered_content), tokens)
+        results.append(post)
+    return SearchResults(results, page, has_next)
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from blog.models import Posts
+from .index import index_post, remove_post
+
+
+@receiver(post_save, sender=Posts)
+def post_saved(sender, instance, created, **kwargs):
+    # a new draft has nothing to remove from the index
+    if created and instance.status != "PB":
+        return
+    index_post(instance)
+
+
+# before the delete, the cascade would remove the postings without updating the terms
+@receiver(pre_delete, sender=Posts)
+def post_deleted(sender, instance, **kwargs):
+    remove_post(instance.pk)
@@ -0,0 +1,113 @@
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from taggit.models import Tag, TaggedItem
+
+from blog.models import Posts
+from .index import TITLE_WEIGHT, tokenize
+from .models import Term, Posting, Corpus
+from .ranking import COMMON_TERM_RATIO
+
+
+def tf_idf(tf, documents, doc_freq):
+    """The sublinear TF-IDF weight of a term, with an idf that is never zero"""
+    return (1 + math.log(tf)) * (math.log((1 + documents) / (1 + doc_freq)) + 1)
+
+
+def _norm(vector):
+    return math.sqrt(sum(weight * weight for weight in vector.values()))
+
+
+def draft_vector(title, content, documents):
+    """
+    The TF-IDF vector of a draft over the terms of the search index and the
+    document frequency of those terms, both by term id. Words the index has
+    never seen are left out, no published post can share them.
+    """
+    counts = Counter(tokenize(content or ""))
+    for token in tokenize(title or ""):
+        counts[token] += TITLE_WEIGHT
+    terms = list(Term.objects.filter(token__in=list(counts), doc_freq__gt=0).values_list("id", "token", "doc_freq"))
+    vector = {pk: tf_idf(counts[token], documents, doc_freq) for pk, token, doc_freq in terms}
+    return vector, {pk: doc_freq for pk, token, doc_freq in terms}
+
+
+def similar_posts(title, content, limit=None, exclude=None):
+    """
+    The published posts closest to a draft, best first, each with its cosine
+    `similarity` to the draft and a `duplicate` flag above `DUPLICATE_SIMILARITY`.
+
+    The index is the TF-IDF model: candidates are ranked by the database from
+    the postings of the draft's rarer terms, like a search, and only the best
+    `SIMILAR_POSTS_CANDIDATES` have their whole vectors loaded for the cosine.
+    """
+    limit = limit or settings.SIMILAR_POSTS
+    documents = Corpus.get().documents
+    if not documents:
+        return []
+    vector, doc_freqs = draft_vector(title, content, documents)
+    if not vector:
+        return []
+
+    query = [pk for pk, doc_freq in doc_freqs.items() if doc_freq <= documents * COMMON_TERM_RATIO] or list(vector)
+    weight = Case(*(When(term_id=pk, then=Value(vector[pk])) for pk in query), output_field=FloatField())
+    postings = Posting.objects.filter(term_id__in=query)
+    if exclude is not None:
+        postings = postings.exclude(post_id=exclude)
+    candidates = list(
+        postings.values("post_id")
+        .annotate(score=Sum(weight * Cast("tf", FloatField()) / Cast("length", FloatField())))
+        .order_by("-score", "-post_id").values_list("post_id", flat=True)[:settings.SIMILAR_POSTS_CANDIDATES]
+    )
+
+    vectors = defaultdict(dict)
+    rows = Posting.objects.filter(post_id__in=candidates).values_list("post_id", "term_id", "tf", "term__doc_freq")
+    for post_id, term_id, tf, doc_freq in rows:
+        vectors[post_id][term_id] = tf_idf(tf, documents, doc_freq)
+    norm = _norm(vector)
+    scores = {
+        post_id: sum(weight * other.get(term_id, 0) for term_id, weight in vector.items()) / (norm * _norm(other))
+        for post_id, other in vectors.items()
+    }
+
+    ranked = sorted(scores, key=lambda post_id: (-scores[post_id], -post_id))[:limit]
+    posts = Posts.published.select_related("author").in_bulk(ranked)
+    results = []
+    for post_id in ranked:
+        post = posts.get(post_id)
+        if post is None:
+            continue
+        post.similarity = scores[post_id]
+        post.duplicate = post.similarity >= settings.DUPLICATE_SIMILARITY
+        results.append(post)
+    return results
+
+
+def suggest_tags(title, content, limit=None, similar=None):
+    """
+    The existing tags most likely to fit a draft, best first.
+
+    Every tag of the posts most similar to the draft, `similar` when they were
+    already looked up, gets their similarity as a vote, and a tag named like
+    one of the draft's words gets a vote of one, so authors are steered to the
+    tags already in use instead of new near-duplicates.
+    """
+    limit = limit or settings.SUGGESTED_TAGS
+    if similar is None:
+        similar = similar_posts(title, content, limit=settings.SIMILAR_POSTS_CANDIDATES)
+    similarity = {post.pk: post.similarity for post in similar}
+    votes = Counter()
+    tagged = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Posts), object_id__in=similarity,
+    ).values_list("object_id", "tag__name")
+    for object_id, name in tagged:
+        votes[name] += similarity[object_id]
+
+    words = set(tokenize(f"{title or ''} {content or ''}"))
+    for name in Tag.objects.filter(name__in=words).values_list("name", flat=True):
+        votes[name] += 1
+    return [name for name, vote in sorted(votes.items(), key=lambda item: (-item[1], item[0]))[:limit]]
@@ -0,0 +1,78 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from blog.models import Posts
+from search.index import tokenize
+from search.models import Term, Document, Posting, Corpus
+
+
+class IndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+    
+    def create_post(self, title, content, status="PB"):
+        return Posts.objects.create(author=self.user, title=title, content=content, status=status)
+    
+    def doc_freq(self, token):
+        return Term.objects.get(token=token).doc_freq
+    
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Django ORM, and *Markdown*!"), ["django", "orm", "markdown"])
+    
+    def test_published_posts_are_indexed(self):
+        post = self.create_post("Django tips", "django queries and django views")
+        
+        self.assertEqual(Posting.objects.get(post=post, term__token="django").tf, 4)
+        # title words count twice
+        self.assertEqual(Document.objects.get(post=post).length, 8)
+        self.assertEqual(self.doc_freq("django"), 1)
+        self.assertEqual((Corpus.get().documents, Corpus.get().total_length), (1, 8))
+    
+    def test_drafts_are_not_indexed(self):
+        post = self.create_post("Draft", "secret words", status="DF")
+        self.assertFalse(Posting.objects.filter(post=post).exists())
+        self.assertEqual(Corpus.get().documents, 0)
+    
+    def test_edit_updates_postings_and_frequencies(self):
+        post = self.create_post("Title", "python rocks")
+        self.create_post("Other", "python too")
+        self.assertEqual(self.doc_freq("python"), 2)
+        
+        post.content = "rust rocks"
+        post.save(update=True)
+        
+        self.assertEqual(self.doc_freq("python"), 1)
+        self.assertEqual(self.doc_freq("rust"), 1)
+        self.assertFalse(Posting.objects.filter(post=post, term__token="python").exists())
+        self.assertEqual(Corpus.get().documents, 2)
+    
+    def test_unchanged_post_is_not_reindexed(self):
+        post = self.create_post("Title", "python rocks")
+        # the counters, the update, then a savepoint around the document lookup
+        with self.assertNumQueries(5):
+            post.save(update=True)
+    
+    def test_unpublish_and_delete_remove_the_post(self):
+        post = self.create_post("Title", "python rocks")
+        other = self.create_post("Other", "python too")
+        
+        post.status = "DF"
+        post.save(update=True)
+        self.assertEqual(self.doc_freq("python"), 1)
+        self.assertEqual(Corpus.get().documents, 1)
+        
+        other.delete()
+        self.assertEqual(self.doc_freq("python"), 0)
+        self.assertEqual((Corpus.get().documents, Corpus.get().total_length), (0, 0))
+        self.assertFalse(Posting.objects.exists())
+    
+    def test_rebuild_command(self):
+        post = self.create_post("Title", "python rocks")
+        Posting.objects.all().delete()
+        
+        call_command("rebuild_search_index", stdout=open("/dev/null", "w"))
+        self.assertTrue(Posting.objects.filter(post=post, term__token="python").exists())
+        self.assertEqual(self.doc_freq("python"), 1)
+        self.assertEqual(Corpus.get().documents, 1)
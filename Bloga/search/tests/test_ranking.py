@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+
+from blog.models import Posts
+from search.ranking import search, highlight
+
+
+class RankingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.other = User.objects.create_user(username="otheruser", password="iamgroot")
+        cls.focused = Posts.objects.create(
+            author=cls.user, title="Python", content="python python python generators", status="PB",
+        )
+        cls.passing = Posts.objects.create(
+            author=cls.other, title="Cooking", content="a long story about pasta that mentions python once " * 3,
+            status="PB",
+        )
+        cls.unrelated = Posts.objects.create(author=cls.user, title="Rust", content="ownership", status="PB")
+        cls.draft = Posts.objects.create(author=cls.user, title="Python draft", content="python", status="DF")
+        cls.passing.tags.add("food")
+    
+    def test_results_are_ranked_by_bm25(self):
+        results = search("python")
+        self.assertEqual(list(results), [self.focused, self.passing])
+        self.assertGreater(results[0].score, results[1].score)
+    
+    def test_filters(self):
+        self.assertEqual(list(search("python", tag="food")), [self.passing])
+        self.assertEqual(list(search("python", author="testuser")), [self.focused])
+    
+    def test_unknown_and_empty_queries(self):
+        self.assertEqual(list(search("haskell")), [])
+        self.assertEqual(list(search("the")), [])
+    
+    def test_pagination(self):
+        first = search("python", per_page=1)
+        second = search("python", page=2, per_page=1)
+        self.assertTrue(first.has_next)
+        self.assertFalse(second.has_next)
+        self.assertEqual(list(first) + list(second), [self.focused, self.passing])
+    
+    @override_settings(SEARCH_TERM_POSTINGS=1)
+    def test_postings_read_per_term_are_capped(self):
+        with CaptureQueriesContext(connection) as queries:
+            results = search("python")
+        self.assertEqual(list(results), [self.focused])
+        self.assertFalse(results.has_next)
+        self.assertTrue(any(query["sql"].endswith("LIMIT 1") for query in queries))
+    
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_search", query=["python", "python generators"], repeat=1, stdout=out)
+        self.assertIn("'python': ", out.getvalue())
+        self.assertIn("queries: 2", out.getvalue())
+    
+    def test_constant_queries(self):
+        # corpus, terms, best postings of the rarer term, scores, posts, tags
+        with self.assertNumQueries(6):
+            results = search("python generators")
+            [list(post.tags.all()) for post in results]
+    
+    def test_highlight_escapes_the_text(self):
+        snippet = highlight("<b>Python</b> is fun", ["python"])
+        self.assertEqual(snippet, "&lt;b&gt;<mark>Python</mark>&lt;/b&gt; is fun")
+        
+    def test_highlight_centers_on_the_first_match(self):
+        snippet = highlight("word " * 100 + "python " + "word " * 100, ["python"], length=40)
+        self.assertIn("<mark>python</mark>", snippet)
+        self.assertTrue(snippet.startswith("…"))
+        self.assertTrue(snippet.endswith("…"))
@@ -0,0 +1,69 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from blog.models import Posts
+from search.similarity import similar_posts, suggest_tags
+
+
+class SimilarityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.generators = Posts.objects.create(
+            author=cls.user, title="Python generators",
+            content="generators yield values lazily, a generator expression looks like a comprehension", status="PB",
+        )
+        cls.asyncio = Posts.objects.create(
+            author=cls.user, title="Python asyncio",
+            content="coroutines and the event loop, await yields control", status="PB",
+        )
+        cls.pasta = Posts.objects.create(
+            author=cls.user, title="Fresh pasta", content="flour eggs and patience", status="PB",
+        )
+        cls.draft = Posts.objects.create(
+            author=cls.user, title="Python generators draft", content="generators yield values lazily", status="DF",
+        )
+        cls.generators.tags.add("python", "generators")
+        cls.asyncio.tags.add("python", "asyncio")
+        cls.pasta.tags.add("food")
+
+    def test_similar_posts(self):
+        posts = similar_posts("Generators", "how generators yield values in python")
+        self.assertEqual(posts[0], self.generators)
+        self.assertNotIn(self.pasta, posts)
+        self.assertNotIn(self.draft, posts)
+        self.assertGreater(posts[0].similarity, 0)
+
+    def test_duplicates_are_flagged(self):
+        [post, *others] = similar_posts(self.generators.title, self.generators.content)
+        self.assertEqual(post, self.generators)
+        self.assertAlmostEqual(post.similarity, 1)
+        self.assertTrue(post.duplicate)
+        self.assertFalse(any(other.duplicate for other in others))
+
+    def test_unknown_words(self):
+        self.assertEqual(similar_posts("Haskell", "monads"), [])
+        self.assertEqual(suggest_tags("", ""), [])
+
+    def test_suggest_tags(self):
+        tags = suggest_tags("Generators", "how generators yield values lazily")
+        self.assertEqual(tags[:2], ["generators", "python"])
+        self.assertNotIn("food", tags)
+        # a tag named like a word of the draft is suggested even without similar posts
+        self.assertEqual(suggest_tags("", "asyncio"), ["asyncio", "python"])
+
+    def test_write_suggestions_view(self):
+        url = reverse("blog:write_suggestions")
+        self.assertEqual(self.client.post(url).status_code, 302)
+
+        self.client.login(username="testuser", password="iamgroot")
+        self.assertEqual(self.client.get(url).status_code, 405)
+        data = {"title": self.generators.title, "content": self.generators.content}
+        response = self.client.post(url, data).json()
+        self.assertIn("python", response["tags"])
+        self.assertEqual(response["similar"][0]["url"], reverse("blog:post", args=[self.generators.link]))
+        self.assertTrue(response["similar"][0]["duplicate"])
+
+        response = self.client.post(url, {**data, "link": self.generators.link}).json()
+        self.assertNotIn(reverse("blog:post", args=[self.generators.link]), [post["url"] for post in response["similar"]])
@@ -0,0 +1,28 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from blog.models import Posts
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="iamgroot")
+        cls.post = Posts.objects.create(author=cls.user, title="Django", content="django <b>orm</b> tips", status="PB")
+    
+    def test_view_renders_results(self):
+        response = self.client.get(reverse("search:search"), {"q": "orm"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "search/search.html")
+        self.assertEqual(list(response.context["results"]), [self.post])
+        self.assertContains(response, "<mark>orm</mark>")
+    
+    def test_view_without_query(self):
+        response = self.client.get(reverse("search:search"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["results"])
+    
+    def test_invalid_page(self):
+        response = self.client.get(reverse("search:search"), {"q": "orm", "page": "x"})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,33 @@
+from django.http import Http404
+from django.shortcuts import render
+
+from .ranking import search
+
+
+def page_number(request):
+    """The `?page=` of the request, raising Http404 if it is not a positive number"""
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        raise Http404("Invalid page")
+    if page < 1:
+        raise Http404("Invalid page")
+    return page
+
+
+def search_posts(request):
+    user = request.user
+    query = request.GET.get("q", "").strip()
+    tag = request.GET.get("tag", "").strip()
+    author = request.GET.get("author", "").strip()
+    
+    results = search(query, tag=tag, author=author, page=page_number(request)) if query else None
+    
+    context = {
+        "user": user if user.is_authenticated else None,
+        "query": query,
+        "tag": tag,
+        "author": author,
+        "results": results,
+    }
+    return render(request, 'search/search.html', context)
@@ -67,6 +67,29 @@ document.addEventListener("DOMContentLoaded", function () {
     setTimeout(() => commentModal.classList.add("hidden"), 300); // Smooth transition
   };
 
+  // Like and bookmark without reloading the page, the links still work without javascript
+  document.querySelectorAll("a[data-toggle]").forEach((link) =>
+    link.addEventListener("click", async (event) => {
+      event.preventDefault();
+      const icon = link.querySelector("i");
+      const active = icon.classList.contains("fa-solid");
+      const csrftoken = document.cookie.match(/csrftoken=([^;]+)/)?.[1];
+      const response = await fetch(link.href, {
+        method: active ? "DELETE" : "PUT",
+        headers: { "X-CSRFToken": csrftoken, Accept: "application/json" },
+      });
+      if (!response.ok || !response.headers.get("Content-Type")?.includes("json")) {
+        window.location = link.href;
+        return;
+      }
+      const state = await response.json();
+      icon.classList.toggle("fa-solid", state.active);
+      icon.classList.toggle("fa-regular", !state.active);
+      const count = link.parentElement.querySelector("[data-toggle-count]");
+      if (count) count.innerText = state.count.toLocaleString();
+    })
+  );
+
   // Open the modal
 });
 function openModal(target) {
@@ -181,6 +204,61 @@ if (tag && tag.value) {
   });
 }
 
+// suggest existing tags and flag similar posts while writing
+const blogForm = document.getElementById("blogForm");
+let suggestionTimer;
+
+function showSuggestions(suggestions) {
+  const current = document.getElementById("tags").value.split(",");
+  const tagsElement = document.getElementById("suggested-tags");
+  tagsElement.replaceChildren();
+  suggestions.tags
+    .filter((name) => !current.includes(name))
+    .forEach((name) => {
+      const pill = document.createElement("button");
+      pill.type = "button";
+      pill.className = "tag-pill opacity-60";
+      pill.textContent = name;
+      pill.addEventListener("click", () => {
+        addTag(name);
+        pill.remove();
+      });
+      tagsElement.appendChild(pill);
+    });
+
+  const similarElement = document.getElementById("similar-posts");
+  similarElement.replaceChildren();
+  suggestions.similar.forEach((post) => {
+    const item = document.createElement("li");
+    const link = document.createElement("a");
+    link.href = post.url;
+    link.target = "_blank";
+    link.textContent = post.title;
+    item.append(post.duplicate ? "Possible duplicate of " : "Similar to ", link);
+    if (post.duplicate) item.className = "text-red-600";
+    similarElement.appendChild(item);
+  });
+}
+
+async function fetchSuggestions() {
+  const data = new FormData();
+  data.append("title", blogForm.querySelector("[name=title]").value);
+  data.append("content", document.getElementById("content").value);
+  data.append("link", blogForm.dataset.link);
+  const response = await fetch(blogForm.dataset.suggestions, {
+    method: "POST",
+    body: data,
+    headers: { "X-CSRFToken": blogForm.querySelector("[name=csrfmiddlewaretoken]").value },
+  });
+  if (response.ok) showSuggestions(await response.json());
+}
+
+blogForm?.dataset.suggestions &&
+  blogForm.addEventListener("input", () => {
+    clearTimeout(suggestionTimer);
+    suggestionTimer = setTimeout(fetchSuggestions, 800);
+  });
+
 document.querySelectorAll(".flash-message .close-flash").forEach((button) => {
   button.addEventListener("click", function () {
     this.closest(".flash-message").style.display = "none";